@@ -9,6 +9,13 @@ import os
 import sys
 import argparse
 import json
+import fnmatch
+import itertools
+import queue
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 import shutil
@@ -16,7 +23,33 @@ import shutil
 PROJECT_ROOT = Path(__file__).parent.parent.absolute()
 sys.path.insert(0, str(PROJECT_ROOT))
 
-from scripts.config import SUPPORTED_IMAGE_FORMATS
+from scripts import quality
+from scripts.arena import arena_stats, thread_arena
+from scripts.batching import InferenceScheduler
+from scripts.calibration import stored_calibration
+from scripts.config import (
+    SUPPORTED_IMAGE_FORMATS,
+    BATCH_INPUT_MODE,
+    BATCH_OUTPUT_LAYOUT,
+    DECODE_MAX_SIDE,
+    PARSING_BATCH_SIZE,
+    QUALITY_GATE_ENABLED,
+    VISUAL_OUTPUT_TIER,
+)
+from scripts.fileops import INPUT_MODES, place_input, truncate_partial_line
+from scripts.image_io import decode_image, probe
+from scripts.label_index import load_label_index, class_coverage, class_pixels
+from scripts.profiling import profiler, span
+from scripts.reporting import BatchStats, timed
+from scripts.shards import LAYOUTS, ShardWriter
+from scripts.visuals import VISUAL_TIERS
+
+JOURNAL_NAME = "journal.jsonl"
+JOURNAL_FSYNC_EVERY = 100
+SCAN_QUEUE_SIZE = 1024
+
+# Guards batch_info counters and the journal when images run concurrently
+_state_lock = threading.Lock()
 
 def print_header(msg):
     """طباعة رأس / Print header"""
@@ -29,102 +62,458 @@ def print_status(msg, status="INFO"):
     icons = {"SUCCESS": "✓", "ERROR": "✗", "WARNING": "⚠", "INFO": "→"}
     print(f"[{icons.get(status, '→')}] {msg}")
 
+def iter_images(input_dir: Path, recursive: bool = False, pattern: str = "*"):
+    """
+    مسح الصور تدريجياً / Stream image paths with os.scandir
+    Yields paths in directory order as they are found; nothing is sorted or
+    held in memory, so very large trees start producing work immediately.
+    """
+    name_pattern = f"{pattern}*"
+    formats = {ext.lower() for ext in SUPPORTED_IMAGE_FORMATS}
+    pending = [str(input_dir)]
+    
+    while pending:
+        try:
+            entries = os.scandir(pending.pop())
+        except OSError as e:
+            print_status(f"Cannot scan directory: {str(e)}", "WARNING")
+            continue
+        
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive:
+                            pending.append(entry.path)
+                        continue
+                    if not entry.is_file():
+                        continue
+                except OSError:
+                    continue
+                
+                name = entry.name
+                if os.path.splitext(name)[1].lower() in formats and fnmatch.fnmatch(name, name_pattern):
+                    yield Path(entry.path)
+
+def prefetch(iterable, maxsize: int = SCAN_QUEUE_SIZE):
+    """
+    تعبئة طابور العمل مسبقاً / Run a generator in a background thread
+    Items flow through a bounded queue so scanning overlaps with processing.
+    """
+    work = queue.Queue(maxsize=maxsize)
+    done = object()
+    
+    def produce():
+        try:
+            for item in iterable:
+                work.put(item)
+        finally:
+            work.put(done)
+    
+    threading.Thread(target=produce, name="image-scanner", daemon=True).start()
+    
+    while True:
+        item = work.get()
+        if item is done:
+            return
+        yield item
+
 def find_images(input_dir: Path) -> list:
     """البحث عن جميع الصور / Find all images in directory"""
     print_status(f"Searching for images in {input_dir}")
     
-    images = []
-    for ext in SUPPORTED_IMAGE_FORMATS:
-        images.extend(input_dir.glob(f"*{ext}"))
+    images = sorted(iter_images(input_dir))
     
     print_status(f"Found {len(images)} images", "SUCCESS")
-    return sorted(images)
+    return images
+
+class BatchJournal:
+    """
+    سجل الدفعة / Append-only record of every finished image (JSON Lines)
+    This is the per-image batch report, streamed as images finish. It is
+    also used by --resume to skip images that were already processed.
+    Failed images are retried on resume, except quality and pose
+    rejections, which would only be rejected again.
+    """
+    
+    def __init__(self, batch_dir: Path):
+        """فتح السجل / Open the journal of a batch and index finished images"""
+        self.path = Path(batch_dir) / JOURNAL_NAME
+        # A torn last line would swallow the first entry appended after it
+        truncate_partial_line(self.path)
+        self.completed = set(entry["input_path"] for entry in self.replay()
+                             if self.finished(entry))
+        
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._unsynced = 0
+    
+    def replay(self):
+        """إعادة القراءة / Stream the recorded entries from disk"""
+        if not self.path.exists():
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue  # Torn last line after a crash
+    
+    @staticmethod
+    def finished(entry: dict) -> bool:
+        """انتهت / True unless the entry is a failure worth retrying"""
+        return entry.get("status") != "failed" or entry.get("error", "").startswith("rejected:")
+    
+    @staticmethod
+    def key(image_path: Path) -> str:
+        """مفتاح الصورة / Journal key for an image path"""
+        return os.path.abspath(image_path)
+    
+    def is_done(self, image_path: Path) -> bool:
+        """هل تمت معالجتها / True if the image is journaled and need not be retried"""
+        return self.key(image_path) in self.completed
+    
+    def record(self, entry: dict):
+        """تسجيل صورة / Append one finished image"""
+        entry = dict(entry, input_path=self.key(Path(entry["input_path"])))
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+        if self.finished(entry):
+            self.completed.add(entry["input_path"])
+        
+        self._unsynced += 1
+        if self._unsynced >= JOURNAL_FSYNC_EVERY:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+    
+    def close(self):
+        """إغلاق السجل / Flush to disk and close"""
+        if not self._file.closed:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+def find_label_index(image_output_dir: Path):
+    """البحث عن فهرس التسميات / Load the label index sidecar of an image, if any"""
+    for labels_path in sorted(image_output_dir.glob("*labels.npy")):
+        index = load_label_index(labels_path)
+        if index is not None:
+            return index
+    return None
 
-def create_batch_structure(output_dir: Path, num_images: int) -> dict:
-    """إنشاء هيكل الإخراج الجماعي / Create batch output structure"""
-    batch_dir = output_dir / f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+class WarmPipeline:
+    """
+    خط معالجة دافئ / Parsing and pose stages kept loaded across images
+    
+    Each worker thread gets its own MediaPipe estimator. With micro_batch,
+    parsing goes through the micro-batching scheduler so that concurrent
+    workers share forward passes. visual_tier selects how visual artifacts
+    are written (see scripts/visuals.py). With quality_gate, images failing
+    the checks of scripts/quality.py are rejected before any model runs.
+    max_side is the working resolution images are decoded at (see
+    scripts/image_io.decode_image; None for full resolution).
+    """
+    
+    def __init__(self, parsing: bool = True, pose: bool = True, micro_batch: bool = False,
+                 visual_tier: str = VISUAL_OUTPUT_TIER, quality_gate: bool = QUALITY_GATE_ENABLED,
+                 max_side: int = DECODE_MAX_SIDE):
+        """تحميل النماذج / Import stage modules and prepare models"""
+        # Imported lazily: they pull in torch and mediapipe
+        import run_parsing
+        import run_pose
+        
+        self.run_parsing = run_parsing if parsing else None
+        self.run_pose = run_pose if pose else None
+        self.visual_tier = visual_tier
+        self.quality_gate = quality_gate
+        self.max_side = max_side
+        self.scheduler = None
+        if parsing and micro_batch:
+            self.scheduler = InferenceScheduler(parsing_fn=run_parsing.simple_parsing_batch)
+        
+        self._local = threading.local()
+        self._estimators = []
+        self._lock = threading.Lock()
+    
+    def _pose_estimator(self):
+        """مقدر الموضع للخيط / Per-thread warm pose estimator"""
+        estimator = getattr(self._local, "pose", None)
+        if estimator is None:
+            estimator = self.run_pose.create_pose_estimator()
+            self._local.pose = estimator
+            with self._lock:
+                self._estimators.append(estimator)
+        return estimator
+    
+    def run(self, image, output_dir: Path, timings: dict = None) -> dict:
+        """
+        تشغيل المراحل / Run pose and parsing on a decoded image
+        The quality gate runs first, then pose: an image failing either
+        (quality.check_image, run_pose.validate_pose) is rejected with
+        RuntimeError("rejected: ...") before parsing is paid for. Stage wall
+        times (ms) are added to timings when given.
+        """
+        summary = {}
+        if timings is None:
+            timings = {}
+        
+        if self.quality_gate:
+            with timed(timings, "quality"):
+                reason, summary["quality"] = quality.check_image(image)
+            if reason is not None:
+                raise RuntimeError(f"rejected: {reason}")
+        
+        pose_results = None
+        if self.run_pose is not None:
+            stage = self.run_pose
+            with timed(timings, "pose"):
+                pose_results = stage.detect_pose(image, self._pose_estimator())
+            if pose_results is None:
+                reason = "no person detected"
+            else:
+                reason = stage.validate_pose(pose_results, image.shape)
+            if reason is not None:
+                raise RuntimeError(f"rejected: {reason}")
+        
+        if self.run_parsing is not None:
+            stage = self.run_parsing
+            with timed(timings, "parsing"):
+                if self.scheduler is not None:
+                    labels = self.scheduler.parse(image).result()
+                else:
+                    labels = stage.simple_parsing(image)
+            if labels is None:
+                raise RuntimeError("Parsing failed")
+            
+            with timed(timings, "parsing_outputs"):
+                visual = stage.visualize_parsing(image, labels, tier=self.visual_tier)
+                masks = stage.create_masks_from_labels(labels)
+                if not stage.save_masks(masks, image.shape, output_dir):
+                    raise RuntimeError("Saving masks failed")
+                if not stage.save_parsing_results(labels, visual, image, output_dir,
+                                                  tier=self.visual_tier):
+                    raise RuntimeError("Saving parsing results failed")
+            # Written: hand the per-image buffers back to this worker's arena
+            masks.release()
+            thread_arena().give(labels, visual)
+            summary["parsing"] = "done"
+        
+        if pose_results is not None:
+            stage = self.run_pose
+            h, w = image.shape[:2]
+            with timed(timings, "pose_outputs"):
+                keypoints = stage.extract_keypoints(pose_results)
+                measurements = stage.calculate_body_measurements(keypoints, w, h)
+                skeleton = stage.draw_skeleton(image, pose_results, tier=self.visual_tier)
+                stage.save_keypoints(keypoints, output_dir)
+                stage.save_measurements(measurements, output_dir)
+                stage.save_skeleton_image(skeleton, output_dir, tier=self.visual_tier)
+            thread_arena().give(skeleton)
+            summary["pose"] = "done"
+            summary["measurements"] = {
+                name: round(entry["value"], 2) for name, entry in measurements.items()
+            }
+            if measurements:
+                summary["measurement_unit"] = next(iter(measurements.values()))["unit"]
+                summary["calibration"] = stored_calibration(measurements)
+        
+        return summary
+    
+    def close(self):
+        """تحرير النماذج / Stop the scheduler and close estimators"""
+        if self.scheduler is not None:
+            self.scheduler.close()
+        for estimator in self._estimators:
+            estimator.close()
+        self._estimators = []
+
+def find_latest_batch(output_dir: Path):
+    """آخر دفعة / Most recent batch directory in output_dir"""
+    batches = sorted(p for p in output_dir.glob("batch_*") if p.is_dir())
+    return batches[-1] if batches else None
+
+def create_batch_structure(output_dir: Path, num_images: int, batch_dir: Path = None) -> dict:
+    """إنشاء هيكل الإخراج الجماعي / Create (or reopen) batch output structure"""
+    if batch_dir is None:
+        batch_dir = output_dir / f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
     batch_dir.mkdir(parents=True, exist_ok=True)
     
     batch_info = {
         "batch_dir": str(batch_dir),
         "start_time": datetime.now().isoformat(),
         "total_images": num_images,
-        "processed": 0,
-        "successful": 0,
-        "failed": 0,
-        "results": []
+        "stats": BatchStats()
     }
     
     print_status(f"Created batch directory: {batch_dir}", "SUCCESS")
     return batch_info
 
-def process_image(image_path: Path, batch_dir: Path, batch_info: dict) -> bool:
-    """معالجة صورة واحدة / Process single image"""
+def restore_from_journal(batch_info: dict, journal: BatchJournal) -> None:
+    """
+    استعادة التقدم / Rebuild the running aggregates from a journal
+    Failures that will be retried are left out; the retry counts instead.
+    """
+    for entry in journal.replay():
+        if journal.finished(entry):
+            batch_info["stats"].add(entry, restored=True)
+
+def _record_failure(image_path: Path, batch_info: dict, journal, error: str,
+                    error_type: str = None) -> bool:
+    """
+    تسجيل فشل / Count and journal a failed image
+    error_type names the exception, if one was raised; the report counts
+    failures by it (see reporting.failure_class), the journal keeps error.
+    """
+    entry = {
+        "image_name": image_path.name,
+        "input_path": str(image_path),
+        "status": "failed",
+        "error": error,
+        "timestamp": datetime.now().isoformat()
+    }
+    if error_type is not None:
+        entry["error_type"] = error_type
+    with _state_lock:
+        batch_info["stats"].add(entry)
+        if journal is not None:
+            journal.record(entry)
+    return False
+
+def process_image(image_path: Path, batch_dir: Path, batch_info: dict,
+                  journal: BatchJournal = None, pipeline: WarmPipeline = None,
+                  input_mode: str = BATCH_INPUT_MODE, shards: ShardWriter = None) -> bool:
+    """
+    معالجة صورة واحدة / Process single image (safe to call from worker threads)
+    With shards, outputs are staged in a temporary directory and packed
+    into the batch's shard files instead of batch_dir/<image>/.
+    """
+    image_output_dir = None
+    timings = {}
+    started = time.perf_counter()
     try:
         image_name = image_path.stem
-        image_output_dir = batch_dir / image_name
-        image_output_dir.mkdir(parents=True, exist_ok=True)
         
-        print_status(f"Processing: {image_path.name}")
+        # The header must parse even when no stage decodes the pixels, so a
+        # non-image with an image extension is not placed as processed
+        info = probe(image_path)
+        if info is None:
+            print_status(f"Unreadable image: {image_path.name}", "ERROR")
+            return _record_failure(image_path, batch_info, journal, "unreadable image")
         
-        # Copy image to output directory
-        import subprocess
-        output_image = image_output_dir / "input.jpg"
+        # Size check from the file header, before anything is written or decoded
+        if pipeline is not None and pipeline.quality_gate:
+            reason = quality.check_dimensions(*info.size)
+            if reason is not None:
+                raise RuntimeError(f"rejected: {reason}")
         
-        # Convert to standard format for processing
-        import cv2
-        img = cv2.imread(str(image_path))
-        if img is None:
-            print_status(f"Failed to load image: {image_path.name}", "ERROR")
-            batch_info["failed"] += 1
-            return False
+        if shards is not None:
+            image_output_dir = Path(tempfile.mkdtemp(prefix=f"vton_{image_name}_"))
+        else:
+            image_output_dir = batch_dir / image_name
+            image_output_dir.mkdir(parents=True, exist_ok=True)
+        
+        print_status(f"Processing: {image_path.name}")
         
-        cv2.imwrite(str(output_image), img)
+        # Place the original file in the output directory (no re-encode)
+        with span("save_input", nbytes=image_path.stat().st_size), timed(timings, "save_input"):
+            input_file, used_mode = place_input(image_path, image_output_dir, input_mode)
         
-        # Run processing (placeholder - would integrate actual processing)
         result = {
             "image_name": image_path.name,
             "input_path": str(image_path),
+            "input_file": input_file.name,
+            "input_mode": used_mode,
             "output_dir": str(image_output_dir),
             "status": "processed",
             "timestamp": datetime.now().isoformat()
         }
         
-        batch_info["processed"] += 1
-        batch_info["successful"] += 1
-        batch_info["results"].append(result)
+        # Pixels are only decoded when the model stages run
+        if pipeline is not None:
+            with span("decode", nbytes=image_path.stat().st_size), timed(timings, "decode"):
+                img = decode_image(image_path, pipeline.max_side)
+            if img is None:
+                print_status(f"Failed to load image: {image_path.name}", "ERROR")
+                return _record_failure(image_path, batch_info, journal, "decode failed")
+            
+            result.update(pipeline.run(img, image_output_dir, timings))
+        
+        # Class coverage comes from the sidecar index, not the label map
+        label_index = find_label_index(image_output_dir)
+        if label_index is not None:
+            result["class_coverage"] = class_coverage(label_index)
+            result["class_pixels"] = class_pixels(label_index)
+            result["total_pixels"] = label_index["total_pixels"]
+        
+        if shards is not None:
+            with span("pack_shard"), timed(timings, "pack_shard"):
+                entry = shards.add_directory(image_name, image_output_dir,
+                                             {"input_path": str(image_path)})
+            result["output_dir"] = str(batch_dir)
+            result["shard"] = entry["shard"]
+            result["offset"] = entry["offset"]
+        
+        timings["total"] = (time.perf_counter() - started) * 1000.0
+        result["timings_ms"] = {name: round(ms, 3) for name, ms in timings.items()}
+        
+        with _state_lock:
+            batch_info["stats"].add(result)
+            if journal is not None:
+                journal.record(result)
         
         print_status(f"✓ {image_path.name}", "SUCCESS")
         return True
     except Exception as e:
         print_status(f"Error processing {image_path.name}: {str(e)}", "ERROR")
-        batch_info["processed"] += 1
-        batch_info["failed"] += 1
-        return False
+        return _record_failure(image_path, batch_info, journal, str(e), type(e).__name__)
+    finally:
+        if shards is not None and image_output_dir is not None:
+            shutil.rmtree(image_output_dir, ignore_errors=True)
 
 def generate_batch_report(batch_info: dict, output_dir: Path) -> None:
     """إنشاء تقرير المعالجة الجماعية / Generate batch processing report"""
     print_header("Generating Batch Report", )
     
-    batch_info["end_time"] = datetime.now().isoformat()
-    batch_info["success_rate"] = (batch_info["successful"] / max(batch_info["processed"], 1)) * 100
+    # Summary from the running aggregates; per-image results are in the journal
+    report = {key: value for key, value in batch_info.items() if key != "stats"}
+    report["end_time"] = datetime.now().isoformat()
+    report["results_file"] = JOURNAL_NAME
+    report.update(batch_info["stats"].summary())
     
     report_path = Path(batch_info["batch_dir"]) / "batch_report.json"
     
+    if profiler.enabled:
+        report["stage_timings"] = profiler.summary()
+        profiler.write_reports(Path(batch_info["batch_dir"]))
+    
+    # Per-worker buffer arenas (scripts/arena.py), if any stage used one
+    buffers = arena_stats()
+    if buffers["workers"]:
+        report["buffer_arena"] = buffers
+    
     with open(report_path, "w", encoding="utf-8") as f:
-        json.dump(batch_info, f, indent=2, ensure_ascii=False)
+        json.dump(report, f, indent=2, ensure_ascii=False)
     
     print_status(f"Report saved: {report_path}", "SUCCESS")
     
     # Print summary
     print("\nBatch Processing Summary / ملخص المعالجة الجماعية:")
     print("-" * 70)
-    print(f"  Total Images:     {batch_info['total_images']}")
-    print(f"  Processed:        {batch_info['processed']}")
-    print(f"  Successful:       {batch_info['successful']}")
-    print(f"  Failed:           {batch_info['failed']}")
-    print(f"  Success Rate:     {batch_info['success_rate']:.1f}%")
-    print(f"  Output Directory: {batch_info['batch_dir']}")
+    print(f"  Total Images:     {report['total_images']}")
+    print(f"  Processed:        {report['processed']}")
+    print(f"  Successful:       {report['successful']}")
+    print(f"  Failed:           {report['failed']}")
+    if report.get("skipped"):
+        print(f"  Resumed (skipped): {report['skipped']}")
+    print(f"  Success Rate:     {report['success_rate']:.1f}%")
+    print(f"  Throughput:       {report['throughput']['images_per_second']:.2f} images/s")
+    total = report["stage_latency"].get("total")
+    if total:
+        print(f"  Latency p50/p90:  {total['p50_ms']:.0f} / {total['p90_ms']:.0f} ms")
+    if "buffer_arena" in report:
+        buffers = report["buffer_arena"]
+        print(f"  Buffers:          {buffers['allocations']} allocated, {buffers['reuses']} reused, "
+              f"peak {buffers['peak_bytes'] / 2**20:.1f} MB")
+    print(f"  Output Directory: {report['batch_dir']}")
     print("-" * 70)
 
 def cleanup_temp_files(batch_dir: Path) -> None:
@@ -168,8 +557,72 @@ def main():
         default="*",
         help="File pattern to match"
     )
+    parser.add_argument(
+        "--resume",
+        nargs="?",
+        const="latest",
+        default=None,
+        metavar="BATCH_DIR",
+        help="Continue a previous batch (default: the latest one in --output-dir)"
+    )
+    parser.add_argument(
+        "--input-mode",
+        choices=INPUT_MODES,
+        default=BATCH_INPUT_MODE,
+        help="How the original image is placed in the batch (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--layout",
+        choices=LAYOUTS,
+        default=BATCH_OUTPUT_LAYOUT,
+        help="Output layout: one folder per image, or packed shard files (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--visuals",
+        choices=VISUAL_TIERS,
+        default=VISUAL_OUTPUT_TIER,
+        help="Visual artifacts with --run-models: none, thumbnail or full (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--run-models",
+        action="store_true",
+        help="Run parsing and pose in-process for every image"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Images processed concurrently (default: 1, or PARSING_BATCH_SIZE with --micro-batch)"
+    )
+    parser.add_argument(
+        "--micro-batch",
+        action="store_true",
+        help="With --run-models, share parsing forward passes between concurrent images"
+    )
+    parser.add_argument(
+        "--no-quality-gate",
+        action="store_true",
+        help="With --run-models, do not reject small, blurry or badly exposed images"
+    )
+    parser.add_argument(
+        "--max-side",
+        type=int,
+        default=DECODE_MAX_SIDE,
+        help="With --run-models, decode large JPEGs at reduced scale, keeping this long side"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Record per-stage timings in the batch report"
+    )
     
     args = parser.parse_args()
+    if args.workers is None:
+        args.workers = PARSING_BATCH_SIZE if args.micro_batch and args.run_models else 1
+    args.workers = max(1, args.workers)
+    
+    if args.profile:
+        profiler.enable()
     
     input_dir = Path(args.input_dir)
     output_dir = Path(args.output_dir)
@@ -182,29 +635,85 @@ def main():
         print_status(f"Input directory not found: {input_dir}", "ERROR")
         return 1
     
-    # Find images
-    if args.recursive:
-        images = list(input_dir.glob(f"**/{args.pattern}*"))
-    else:
-        images = list(input_dir.glob(f"{args.pattern}*"))
-    
-    images = [img for img in images if img.suffix.lower() in SUPPORTED_IMAGE_FORMATS]
+    # Resolve the batch to resume, if any
+    resume_dir = None
+    if args.resume == "latest":
+        resume_dir = find_latest_batch(output_dir)
+        if resume_dir is None:
+            print_status(f"No previous batch found in {output_dir}", "ERROR")
+            return 1
+    elif args.resume:
+        resume_dir = Path(args.resume)
+        if not resume_dir.exists():
+            print_status(f"Batch directory not found: {resume_dir}", "ERROR")
+            return 1
     
-    if not images:
+    # Stream images from a background scanner
+    images = prefetch(iter_images(input_dir, args.recursive, args.pattern))
+    first = next(images, None)
+    if first is None:
         print_status("No images found!", "ERROR")
         return 1
     
-    print_status(f"Found {len(images)} images to process")
-    
     # Create batch structure
-    batch_info = create_batch_structure(output_dir, len(images))
+    batch_info = create_batch_structure(output_dir, 0, resume_dir)
     batch_dir = Path(batch_info["batch_dir"])
+    journal = BatchJournal(batch_dir)
+    
+    if resume_dir is not None:
+        restore_from_journal(batch_info, journal)
+        print_status(f"Resuming: {len(journal.completed)} images already done", "SUCCESS")
+    
+    pipeline = None
+    if args.run_models:
+        pipeline = WarmPipeline(micro_batch=args.micro_batch, visual_tier=args.visuals,
+                                quality_gate=not args.no_quality_gate, max_side=args.max_side)
+    shards = ShardWriter(batch_dir) if args.layout == "shards" else None
+    batch_info["layout"] = args.layout
     
     # Process images
     print_header("Processing Images", )
-    for i, image_path in enumerate(images, 1):
-        print(f"\n[{i}/{len(images)}] ", end="")
-        process_image(image_path, batch_dir, batch_info)
+    seen = 0
+    skipped = 0
+    # Bounded concurrency: a slot must be free before an image is submitted,
+    # so the scanner never runs far ahead of the workers
+    slots = threading.BoundedSemaphore(args.workers)
+    executor = None
+    if args.workers > 1:
+        executor = ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix="vton-worker")
+        print_status(f"Processing up to {args.workers} images at a time", "SUCCESS")
+    
+    def worker(image_path: Path):
+        try:
+            process_image(image_path, batch_dir, batch_info, journal, pipeline,
+                          args.input_mode, shards)
+        finally:
+            slots.release()
+    
+    try:
+        for image_path in itertools.chain([first], images):
+            seen += 1
+            if journal.is_done(image_path):
+                skipped += 1
+                continue
+            slots.acquire()
+            if executor is None:
+                print(f"\n[{seen}] ", end="")
+                worker(image_path)
+            else:
+                print_status(f"Queued [{seen}]: {image_path.name}")
+                executor.submit(worker, image_path)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True)
+        journal.close()
+        if pipeline is not None:
+            pipeline.close()
+        if shards is not None:
+            shards.close()
+    
+    batch_info["total_images"] = seen
+    batch_info["skipped"] = skipped
     
     # Cleanup
     cleanup_temp_files(batch_dir)
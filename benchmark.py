@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pipeline Benchmark Suite for Virtual Try-On AI
+مجموعة قياس أداء خط المعالجة
+
+Generates seeded synthetic people at several resolutions (512px to 6000px)
+and times every pipeline stage. Results are written as JSON so runs from
+different commits can be compared with --compare.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).parent.absolute()
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import run_parsing
+import run_pose
+from scripts.synthetic import DEFAULT_RESOLUTIONS, generate_person
+
+BENCHMARK_DIR = PROJECT_ROOT / "output" / "benchmarks"
+
+def print_header(msg):
+    """طباعة رأس / Print header"""
+    print(f"\n{'='*70}")
+    print(f"  {msg}")
+    print(f"{'='*70}\n")
+
+def print_status(msg, status="INFO"):
+    """طباعة الحالة / Print status"""
+    icons = {"SUCCESS": "✓", "ERROR": "✗", "WARNING": "⚠", "INFO": "→"}
+    print(f"[{icons.get(status, '→')}] {msg}")
+
+def git_commit() -> str:
+    """الحصول على رقم الإيداع / Current git commit, or "unknown" """
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        )
+        return result.stdout.strip()
+    except Exception:
+        return "unknown"
+
+def make_pose_results(landmarks: np.ndarray):
+    """نتائج موضع اصطناعية / Wrap ground-truth landmarks like MediaPipe results"""
+    points = [
+        SimpleNamespace(x=float(x), y=float(y), z=float(z), visibility=float(v))
+        for x, y, z, v in landmarks
+    ]
+    return SimpleNamespace(pose_landmarks=SimpleNamespace(landmark=points))
+
+def time_call(fn, repeat: int):
+    """قياس زمن استدعاء / Run fn repeat times, return (last result, times in ms)"""
+    times = []
+    result = None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = fn()
+            times.append((time.perf_counter() - start) * 1000.0)
+    return result, times
+
+def benchmark_image(image: np.ndarray, landmarks: np.ndarray, repeat: int) -> dict:
+    """قياس جميع المراحل لصورة / Time every stage on one image"""
+    h, w = image.shape[:2]
+    timings = {}
+
+    def run(stage, fn):
+        result, times = time_call(fn, repeat)
+        timings[stage] = times
+        return result
+
+    run("prepare_model_input", lambda: run_parsing.prepare_model_input(image))
+    labels = run("simple_parsing", lambda: run_parsing.simple_parsing(image))
+    # Masks are lazy; materialize every group so the stage stays comparable
+    masks = run("create_masks_from_labels", lambda: run_parsing.create_masks_from_labels(labels).masks())
+    visual = run("visualize_parsing", lambda: run_parsing.visualize_parsing(image, labels))
+
+    pose_results = make_pose_results(landmarks)
+    keypoints = run("extract_keypoints", lambda: run_pose.extract_keypoints(pose_results))
+    measurements = run(
+        "calculate_body_measurements",
+        lambda: run_pose.calculate_body_measurements(keypoints, w, h)
+    )
+    skeleton = run("draw_skeleton", lambda: run_pose.draw_skeleton(image, pose_results))
+
+    run("save_masks", lambda: run_parsing.save_masks(masks, image.shape))
+    run("save_parsing_results", lambda: run_parsing.save_parsing_results(labels, visual, image))
+    run("save_keypoints", lambda: run_pose.save_keypoints(keypoints))
+    run("save_measurements", lambda: run_pose.save_measurements(measurements))
+    run("save_skeleton_image", lambda: run_pose.save_skeleton_image(skeleton))
+
+    return timings
+
+def summarize(samples: list) -> dict:
+    """ملخص العينات / Summary statistics for a list of timings in ms"""
+    ordered = sorted(samples)
+    return {
+        "runs": len(ordered),
+        "min_ms": ordered[0],
+        "median_ms": statistics.median(ordered),
+        "p90_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))],
+        "max_ms": ordered[-1],
+    }
+
+def run_benchmark(resolutions: list, seeds: list, repeat: int, output_root: Path) -> dict:
+    """تشغيل مجموعة القياس / Run the full suite"""
+    # Redirect every save function into a scratch directory
+    run_parsing.PARSING_OUTPUT = output_root / "parsing"
+    run_parsing.MASKS_OUTPUT = output_root / "masks"
+    run_pose.POSE_OUTPUT = output_root / "pose"
+
+    results = []
+
+    for long_side in resolutions:
+        samples = {}
+        width = height = 0
+
+        for seed in seeds:
+            image, landmarks, _ = generate_person(seed, long_side)
+            height, width = image.shape[:2]
+            for stage, times in benchmark_image(image, landmarks, repeat).items():
+                samples.setdefault(stage, []).extend(times)
+
+        megapixels = width * height / 1e6
+        for stage, times in samples.items():
+            entry = {"stage": stage, "width": width, "height": height, "megapixels": megapixels}
+            entry.update(summarize(times))
+            entry["ms_per_megapixel"] = entry["median_ms"] / megapixels
+            results.append(entry)
+
+        total = sum(statistics.median(t) for t in samples.values())
+        print_status(f"{width}x{height}: {total:.1f} ms per image (median, all stages)", "SUCCESS")
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "opencv": cv2.__version__,
+            "resolutions": resolutions,
+            "seeds": seeds,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+def compare_results(current: dict, baseline: dict, threshold: float, min_delta_ms: float = 1.0) -> list:
+    """
+    مقارنة بنتائج سابقة / Compare medians against a baseline run
+    A stage regresses when it is slower by more than threshold (ratio) and
+    by more than min_delta_ms, so sub-millisecond noise is ignored.
+    """
+    base = {(r["stage"], r["height"]): r for r in baseline["results"]}
+    regressions = []
+
+    print(f"\n  {'stage':<30} {'size':>11} {'base ms':>10} {'now ms':>10} {'ratio':>7}")
+    print("  " + "-" * 72)
+
+    for entry in current["results"]:
+        key = (entry["stage"], entry["height"])
+        if key not in base:
+            continue
+        before = base[key]["median_ms"]
+        after = entry["median_ms"]
+        ratio = after / before if before > 0 else float("inf")
+        regressed = ratio > threshold and after - before > min_delta_ms
+        flag = " ⚠" if regressed else ""
+        size = f"{entry['width']}x{entry['height']}"
+        print(f"  {entry['stage']:<30} {size:>11} {before:>10.2f} {after:>10.2f} {ratio:>6.2f}x{flag}")
+        if regressed:
+            regressions.append({"stage": entry["stage"], "size": size, "ratio": ratio})
+
+    return regressions
+
+def main():
+    """الدالة الرئيسية / Main function"""
+    parser = argparse.ArgumentParser(
+        description="Benchmark pipeline stages on synthetic people"
+    )
+    parser.add_argument(
+        "--resolutions",
+        type=int,
+        nargs="+",
+        default=DEFAULT_RESOLUTIONS,
+        help="Image heights in pixels (default: 512 1024 2048 4000 6000)"
+    )
+    parser.add_argument(
+        "--images",
+        type=int,
+        default=3,
+        help="Synthetic people per resolution"
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="First random seed"
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Timed runs per stage and image"
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="Result file (default: output/benchmarks/bench_<commit>_<time>.json)"
+    )
+    parser.add_argument(
+        "--compare",
+        type=str,
+        default=None,
+        help="Baseline result file to compare against"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.10,
+        help="Slowdown ratio reported as a regression"
+    )
+    parser.add_argument(
+        "--min-delta-ms",
+        type=float,
+        default=1.0,
+        help="Ignore slowdowns smaller than this many milliseconds"
+    )
+
+    args = parser.parse_args()
+
+    print_header("Pipeline Benchmark - Virtual Try-On AI")
+
+    seeds = list(range(args.seed, args.seed + args.images))
+    with tempfile.TemporaryDirectory(prefix="vton_bench_") as scratch:
+        report = run_benchmark(args.resolutions, seeds, max(1, args.repeat), Path(scratch))
+
+    if args.output:
+        output_path = Path(args.output)
+    else:
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_path = BENCHMARK_DIR / f"bench_{report['meta']['commit']}_{stamp}.json"
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print_status(f"Results saved: {output_path}", "SUCCESS")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        print_header(f"Comparison with {baseline['meta'].get('commit', args.compare)}")
+        regressions = compare_results(report, baseline, args.threshold, args.min_delta_ms)
+        if regressions:
+            print_status(f"{len(regressions)} stage(s) slower than {args.threshold:.2f}x", "WARNING")
+            return 1
+        print_status("No regressions", "SUCCESS")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -15,6 +15,12 @@ from datetime import datetime
 PROJECT_ROOT = Path(__file__).parent.absolute()
 sys.path.insert(0, str(PROJECT_ROOT))
 
+from scripts import quality
+from scripts.config import MASK_ENCODING, QUALITY_ANALYSIS_SIZE, QUALITY_GATE_ENABLED, VISUAL_OUTPUT_TIER
+from scripts.image_io import decode_image, probe_size
+from scripts.mask_codec import PACKED_NAME, RLE_NAME
+from scripts.visuals import visual_name
+
 def print_header(msg, level=1):
     """Print formatted header"""
     if level == 1:
@@ -70,8 +76,8 @@ def check_environment():
     
     return all_good
 
-def check_input_image(image_path):
-    """Check if input image exists"""
+def check_input_image(image_path, quality_gate=QUALITY_GATE_ENABLED):
+    """Check if input image exists and passes the quality gate"""
     print_header("Checking Input Image", 2)
     
     if not Path(image_path).exists():
@@ -80,11 +86,31 @@ def check_input_image(image_path):
         return False
     
     print_status(f"Input image found: {image_path}", "SUCCESS")
+    if not quality_gate:
+        return True
+    
+    # فحص الجودة / Reject before the model stages (header first, no decode)
+    size = probe_size(image_path)
+    reason = None if size is None else quality.check_dimensions(*size)
+    if reason is None:
+        # The metrics only need a small copy: decode at reduced scale
+        image = decode_image(image_path, QUALITY_ANALYSIS_SIZE)
+        if image is None:
+            print_status(f"Cannot decode input image: {image_path}", "ERROR")
+            return False
+        reason, metrics = quality.check_image(image, size=size)
+        print_status(f"Quality: sharpness {metrics['sharpness']}, "
+                     f"brightness {metrics['brightness']}, contrast {metrics['contrast']}")
+    if reason is not None:
+        print_status(f"Input image rejected: {reason}", "ERROR")
+        return False
+    
+    print_status("Input image passed the quality gate", "SUCCESS")
     return True
 
 def run_parsing():
     """Run human parsing script"""
-    print_header("Step 1: Running Human Parsing", 2)
+    print_header("Step 2: Running Human Parsing", 2)
     
     try:
         import subprocess
@@ -115,7 +141,7 @@ def run_parsing():
 
 def run_pose_estimation():
     """Run pose estimation script"""
-    print_header("Step 2: Running Pose Estimation", 2)
+    print_header("Step 1: Running Pose Estimation", 2)
     
     try:
         import subprocess
@@ -169,15 +195,31 @@ def check_output_files():
     print_header("Verifying Output Files", 2)
     
     output_files = {
-        "parsing/test_visual.png": "تصور التحليل",
         "parsing/test_labels.npy": "تسميات التحليل",
-        "masks/body_mask.png": "قناع الجسم",
-        "masks/cloth_mask.png": "قناع الملابس",
-        "masks/skin_mask.png": "قناع الجلد",
+    }
+    
+    # Visual files depend on the configured visual tier (none: not written)
+    if VISUAL_OUTPUT_TIER != "none":
+        output_files[f"parsing/{visual_name('test_visual')}"] = "تصور التحليل"
+    
+    # Mask files depend on the configured mask encoding
+    if MASK_ENCODING == "rle":
+        output_files[f"masks/{RLE_NAME}"] = "الأقنعة"
+    elif MASK_ENCODING == "packed":
+        output_files[f"masks/{PACKED_NAME}"] = "الأقنعة"
+    else:
+        output_files.update({
+            "masks/body_mask.png": "قناع الجسم",
+            "masks/cloth_mask.png": "قناع الملابس",
+            "masks/skin_mask.png": "قناع الجلد",
+        })
+    
+    output_files.update({
         "pose/keypoints.json": "نقاط المفاصل",
         "pose/body_measure.json": "قياسات الجسم",
-        "pose/skeleton.png": "صورة الهيكل العظمي",
-    }
+    })
+    if VISUAL_OUTPUT_TIER != "none":
+        output_files[f"pose/{visual_name('skeleton')}"] = "صورة الهيكل العظمي"
     
     found_files = 0
     for file_path, description in output_files.items():
@@ -190,7 +232,23 @@ def check_output_files():
     
     return found_files
 
-def print_summary(measurements):
+def load_profiles():
+    """Load per-stage profiling reports written by the pipeline scripts"""
+    profiles = {}
+    
+    for step in ("parsing", "pose"):
+        profile_path = PROJECT_ROOT / step / "profile.json"
+        if not profile_path.exists():
+            continue
+        try:
+            with open(profile_path, "r", encoding="utf-8") as f:
+                profiles[step] = json.load(f).get("summary", {})
+        except Exception as e:
+            print_status(f"Error loading profile {profile_path}: {str(e)}", "WARNING")
+    
+    return profiles
+
+def print_summary(measurements, profiles=None):
     """Print results summary"""
     print_header("Pipeline Execution Summary / ملخص تنفيذ المسار", 1)
     
@@ -203,6 +261,8 @@ def print_summary(measurements):
             ar_name = value.get("ar_name", key)
             measure_value = value.get("value", 0)
             unit = value.get("unit", "")
+            if value.get("calibration", {}).get("estimated"):
+                unit += " (estimated)"
             
             # تنسيق الطباعة / Format printing
             print(f"  {ar_name:<35} {measure_value:>12.2f} {unit}")
@@ -217,6 +277,15 @@ def print_summary(measurements):
     print(f"  Pose Estimation:  {PROJECT_ROOT / 'pose'}")
     print("\n" + "="*70)
     
+    if profiles:
+        print("STAGE TIMINGS / توقيت المراحل")
+        print("="*70)
+        for step, stages in profiles.items():
+            for name, stage in stages.items():
+                print(f"  {step + '/' + name:<35} {stage['total_ms']:>10.1f} ms  x{stage['count']}")
+        print("\n" + "="*70)
+    
+    
     # طباعة التاريخ والوقت / Print timestamp
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     print(f"  Execution Time: {timestamp}")
@@ -243,10 +312,24 @@ def main():
         action="store_true",
         help="Skip pose estimation step"
     )
+    parser.add_argument(
+        "--no-quality-gate",
+        action="store_true",
+        help="Do not reject small, blurry or badly exposed images"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Record per-stage timings (profile.json / profile.trace.json)"
+    )
     
     args = parser.parse_args()
     input_image = PROJECT_ROOT / args.image
     
+    # Child scripts read this to enable their profiler
+    if args.profile:
+        os.environ["VTON_PROFILE"] = "1"
+    
     # Print start message
     print_header("Virtual Try-On AI - Complete Pipeline", 1)
     
@@ -256,24 +339,25 @@ def main():
         return 1
     
     # Check input image
-    if not check_input_image(input_image):
+    if not check_input_image(input_image, not args.no_quality_gate):
         return 1
     
     # تشغيل خطوات المسار / Run pipeline steps
+    # Pose first: an image without a usable pose is rejected before parsing
     steps_completed = 0
     
-    if not args.skip_parsing:
-        if run_parsing():
+    if not args.skip_pose:
+        if run_pose_estimation():
             steps_completed += 1
         else:
-            print_status("Pipeline aborted due to parsing failure", "ERROR")
+            print_status("Pipeline aborted due to pose estimation failure", "ERROR")
             return 1
     
-    if not args.skip_pose:
-        if run_pose_estimation():
+    if not args.skip_parsing:
+        if run_parsing():
             steps_completed += 1
         else:
-            print_status("Pipeline aborted due to pose estimation failure", "ERROR")
+            print_status("Pipeline aborted due to parsing failure", "ERROR")
             return 1
     
     # التحقق من ملفات الإخراج / Check output files
@@ -281,7 +365,8 @@ def main():
     
     # تحميل وطباعة النتائج / Load and print results
     measurements = load_measurements()
-    print_summary(measurements)
+    profiles = load_profiles() if args.profile else None
+    print_summary(measurements, profiles)
     
     print_status(f"Pipeline execution completed: {steps_completed}/{2-int(args.skip_parsing)-int(args.skip_pose)} steps", "SUCCESS")
     print_status(f"Output files created: {output_count}", "SUCCESS")
@@ -1,65 +1,283 @@
-import numpy as np
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Label Map Inspection for Virtual Try-On AI
+فحص خرائط التسميات لتطبيق الملابس الافتراضية
+
+Prints per-class statistics for one label file, a directory of label
+files, or a batch directory (folder layout or sharded layout). Label maps
+are memory-mapped and counted with np.bincount; when a fresh sidecar
+index exists the label map is not read at all. Directories are processed
+in parallel and aggregated into dataset-level class statistics.
+
+Usage:
+    python read_test_labels.py                       # parsing/test_labels.npy
+    python read_test_labels.py output/batch_X --json stats.json
+    python read_test_labels.py labels/ --recursive --workers 8
+"""
+
+import io
 import os
+import sys
+import json
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).parent.absolute()
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from scripts.config import PARSING_DIR, MAX_THREADS
+from scripts.classes import class_name
+from scripts.label_index import (
+    INDEX_SUFFIX,
+    ClassAggregate,
+    class_pixels,
+    histogram_index,
+    load_label_index,
+    open_labels,
+)
+from scripts.shards import MANIFEST_NAME, SHARDS_DIR, ShardReader
+
+LABELS_GLOB = "*labels.npy"
 
-# مسار الملف
-file_path = r"D:\virtual-tryon\parsing\test_labels.npy"
-
-# التحقق من وجود الملف
-if not os.path.exists(file_path):
-    print("❌ الملف غير موجود!")
-    exit()
-
-# قراءة الملف
-print("⏳ جاري تحميل الملف...")
-labels = np.load(file_path)
-
-# طباعة المعلومات
-print("\n" + "="*60)
-print("📊 معلومات الملف:")
-print("="*60)
-print(f"✓ حجم المصفوفة (الصورة): {labels.shape}")
-print(f"✓ عدد البكسلات الكلي: {labels.size:,}")
-print(f"✓ نوع البيانات: {labels.dtype}")
-print(f"✓ الفئات الموجودة: {np.unique(labels)}")
-
-# إحصائيات لكل فئة
-print("\n" + "="*60)
-print("📈 إحصائيات الفئات:")
-print("="*60)
-
-class_names = {
-    0: "خلفية (Background)",
-    1: "قبعة (Hat)",
-    2: "شعر (Hair)",
-    3: "نظارة (Sunglasses)",
-    4: "ملابس علوية (Upper-clothes)",
-    5: "تنورة (Skirt)",
-    6: "بنطلون (Pants)",
-    7: "فستان (Dress)",
-    8: "حزام (Belt)",
-    9: "حذاء يسار (Left-shoe)",
-    10: "حذاء يمين (Right-shoe)",
-    11: "وجه (Face)",
-    12: "ساق يسرى (Left-leg)",
-    13: "ساق يمنى (Right-leg)",
-    14: "ذراع يسرى (Left-arm)",
-    15: "ذراع يمنى (Right-arm)",
-    16: "حقيبة (Bag)",
-    17: "وشاح (Scarf)",
-    18: "جلد - جذع (Skin-torso)",
-    19: "جلد - رقبة (Skin-neck)"
+# أسماء الفئات بالعربية / Arabic class names for display
+CLASS_NAMES_AR = {
+    0: "خلفية",
+    1: "قبعة",
+    2: "شعر",
+    3: "نظارة",
+    4: "ملابس علوية",
+    5: "تنورة",
+    6: "بنطلون",
+    7: "فستان",
+    8: "حزام",
+    9: "حذاء يسار",
+    10: "حذاء يمين",
+    11: "وجه",
+    12: "ساق يسرى",
+    13: "ساق يمنى",
+    14: "ذراع يسرى",
+    15: "ذراع يمنى",
+    16: "حقيبة",
+    17: "وشاح",
+    18: "جلد - جذع",
+    19: "جلد - رقبة",
 }
 
-for class_id in np.unique(labels):
-    count = np.sum(labels == class_id)
-    percentage = (count / labels.size) * 100
-    class_name = class_names.get(class_id, f"فئة {class_id}")
-    print(f"[{class_id:2d}] {class_name:<30} {count:>7} بكسل ({percentage:>5.2f}%)")
+def print_header(msg):
+    """طباعة رأس / Print header"""
+    print(f"\n{'='*60}")
+    print(f"  {msg}")
+    print(f"{'='*60}")
+
+def print_status(msg, status="INFO"):
+    """طباعة الحالة / Print status"""
+    icons = {"SUCCESS": "✓", "ERROR": "✗", "WARNING": "⚠", "INFO": "→"}
+    print(f"[{icons.get(status, '→')}] {msg}")
+
+def display_name(class_id: int) -> str:
+    """اسم العرض / Bilingual class name"""
+    arabic = CLASS_NAMES_AR.get(class_id)
+    return f"{arabic} ({class_name(class_id)})" if arabic else class_name(class_id)
+
+# ============================================
+# SOURCES / المصادر
+# ============================================
+
+def shard_sources(batch_dir: Path):
+    """مصادر الأجزاء / Label sources of a sharded batch"""
+    sources = []
+    reader = ShardReader(batch_dir)
+    for image in reader.images():
+        entry = reader.entries[image]
+        npy = index = None
+        for artifact, (start, length) in entry["artifacts"].items():
+            if artifact.endswith("labels.npy"):
+                npy = (entry["offset"] + start, length)
+            elif artifact.endswith(INDEX_SUFFIX):
+                index = (entry["offset"] + start, length)
+        if npy is not None:
+            shard_path = str(batch_dir / SHARDS_DIR / entry["shard"])
+            sources.append(("shard", f"{batch_dir.name}/{image}", shard_path, npy, index))
+    return sources
+
+def collect_sources(paths, recursive: bool):
+    """
+    جمع المصادر / Turn CLI paths into label sources
+    A source is ("file", name, path) or ("shard", name, shard path,
+    npy (offset, length), index (offset, length) or None).
+    """
+    sources = []
+    for path in map(Path, paths):
+        if path.is_file():
+            sources.append(("file", str(path), str(path)))
+            continue
+        if not path.is_dir():
+            print_status(f"Not found: {path}", "WARNING")
+            continue
+
+        if (path / MANIFEST_NAME).exists():
+            sources.extend(shard_sources(path))
+            continue
+
+        if recursive:
+            found = sorted(path.glob(f"**/{LABELS_GLOB}"))
+            for manifest in sorted(path.glob(f"**/{MANIFEST_NAME}")):
+                sources.extend(shard_sources(manifest.parent))
+        else:
+            # A batch in the folder layout is one level deep
+            found = sorted(path.glob(LABELS_GLOB)) or sorted(path.glob(f"*/{LABELS_GLOB}"))
+        sources.extend(("file", str(p), str(p)) for p in found)
+
+    return sources
+
+def _read_range(path: str, byte_range) -> bytes:
+    offset, length = byte_range
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return f.read(length)
+
+def inspect_source(source, use_index: bool = True):
+    """
+    فحص مصدر / (name, index, from_index) for one label source
+    Runs in worker processes, so it only takes and returns plain data.
+    """
+    kind, name = source[0], source[1]
+
+    if kind == "file":
+        path = source[2]
+        if use_index:
+            index = load_label_index(path)
+            if index is not None:
+                return name, index, True
+        return name, histogram_index(open_labels(path)), False
+
+    shard_path, npy_range, index_range = source[2:]
+    if use_index and index_range is not None:
+        return name, json.loads(_read_range(shard_path, index_range)), True
+    labels = np.load(io.BytesIO(_read_range(shard_path, npy_range)))
+    return name, histogram_index(labels), False
+
+def _inspect_indexed(args):
+    return inspect_source(*args)
+
+def inspect_all(sources, workers: int, use_index: bool = True):
+    """فحص الكل / Yield inspect_source results, in parallel for many sources"""
+    if workers <= 1 or len(sources) <= 1:
+        for source in sources:
+            yield inspect_source(source, use_index)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunksize = max(1, len(sources) // (workers * 8))
+        args = ((source, use_index) for source in sources)
+        yield from executor.map(_inspect_indexed, args, chunksize=chunksize)
+
+# ============================================
+# OUTPUT / الإخراج
+# ============================================
+
+def print_classes(classes: dict):
+    """طباعة الفئات / Per-class table"""
+    for class_key, entry in sorted(classes.items(), key=lambda item: int(item[0])):
+        class_id = int(class_key)
+        extra = f"  {entry['images']:>6} صورة" if "images" in entry else ""
+        print(f"[{class_id:2d}] {display_name(class_id):<34} "
+              f"{entry['pixels']:>12,} بكسل ({entry['percentage']:>6.2f}%){extra}")
+
+def print_single(name: str, index: dict, from_index: bool, sample: bool):
+    """طباعة ملف واحد / Detailed report for one label map"""
+    print_header("📊 معلومات الملف / File info")
+    print(f"✓ الملف: {name}")
+    print(f"✓ حجم المصفوفة (الصورة): {tuple(index['shape'])}")
+    print(f"✓ عدد البكسلات الكلي: {index['total_pixels']:,}")
+    print(f"✓ نوع البيانات: {index['dtype']}")
+    print(f"✓ المصدر: {'فهرس الفئات (index)' if from_index else 'np.bincount'}")
+    print(f"✓ الفئات الموجودة: {sorted(int(c) for c in index['classes'])}")
+
+    print_header("📈 إحصائيات الفئات / Class statistics")
+    print_classes(index["classes"])
+
+    if sample and os.path.isfile(name):
+        print_header("🔍 عينة من البيانات (أول 10×10 بكسل)")
+        print(np.asarray(open_labels(name)[:10, :10]))
+
+def main():
+    """الدالة الرئيسية / Main function"""
+    parser = argparse.ArgumentParser(
+        description="Inspect parsing label maps and aggregate class statistics"
+    )
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        default=[str(PARSING_DIR / "test_labels.npy")],
+        help="Label .npy files, directories or batch directories (default: parsing/test_labels.npy)"
+    )
+    parser.add_argument(
+        "--recursive",
+        action="store_true",
+        help="Search directories recursively"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=MAX_THREADS,
+        help="Worker processes for many files"
+    )
+    parser.add_argument(
+        "--no-index",
+        action="store_true",
+        help="Ignore sidecar indexes and count every label map"
+    )
+    parser.add_argument(
+        "--sample",
+        action="store_true",
+        help="Print the top-left 10x10 labels of a single file"
+    )
+    parser.add_argument(
+        "--json",
+        type=str,
+        default=None,
+        help="Write per-file and aggregated statistics to this JSON file"
+    )
+
+    args = parser.parse_args()
+
+    sources = collect_sources(args.paths, args.recursive)
+    if not sources:
+        print_status("❌ لا توجد ملفات تسميات! / No label files found", "ERROR")
+        return 1
+
+    print_status(f"⏳ {len(sources)} ملف / label maps")
+
+    aggregate = ClassAggregate()
+    per_file = {}
+    from_index_count = 0
+    for name, index, from_index in inspect_all(sources, args.workers, not args.no_index):
+        aggregate.add(index["total_pixels"], class_pixels(index))
+        from_index_count += from_index
+        if args.json:
+            per_file[name] = {"total_pixels": index["total_pixels"], "classes": class_pixels(index)}
+        if len(sources) == 1:
+            print_single(name, index, from_index, args.sample)
+
+    stats = aggregate.to_dict()
+    if len(sources) > 1:
+        print_header("📈 إحصائيات مجمعة / Dataset class statistics")
+        print(f"✓ عدد الملفات: {stats['images']:,} ({from_index_count:,} من الفهارس)")
+        print(f"✓ عدد البكسلات الكلي: {stats['total_pixels']:,}")
+        print_classes(stats["classes"])
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"aggregate": stats, "files": per_file}, f, indent=2, ensure_ascii=False)
+        print_status(f"Saved statistics: {args.json}", "SUCCESS")
 
-# عرض جزء صغير من المصفوفة
-print("\n" + "="*60)
-print("🔍 عينة من البيانات (أول 10×10 بكسل):")
-print("="*60)
-print(labels[:10, :10])
+    print("\n✅ تم القراءة بنجاح!")
+    return 0
 
-print("\n✅ تم القراءة بنجاح!")
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,6 +6,7 @@ Human Parsing Script using SCHP Model
 
 import os
 import sys
+import threading
 import cv2
 import numpy as np
 import torch
@@ -13,6 +14,19 @@ import torchvision.transforms as transforms
 from PIL import Image
 from pathlib import Path
 
+from scripts.arena import thread_arena
+from scripts.blending import blend
+from scripts.classes import colorize
+from scripts.config import DECODE_MAX_SIDE, MASK_ENCODING, MASK_REFINE_ENABLED, VISUAL_OUTPUT_TIER
+from scripts.image_io import decode_image
+from scripts.label_index import save_label_index
+from scripts.mask_codec import encode_masks
+from scripts.mask_refine import refine_masks
+from scripts.parsing_result import ParsingResult
+from scripts.preprocess import Preprocessor
+from scripts.profiling import profiler, span
+from scripts.visuals import shrink_image, shrink_labels, target_size, visual_name, write_visual
+
 # إعدادات المشروع / Project Configuration
 PROJECT_ROOT = Path(__file__).parent.absolute()
 SCHP_PATH = PROJECT_ROOT / "models" / "schp" / "Self-Correction-Human-Parsing"
@@ -20,56 +34,10 @@ INPUT_PATH = PROJECT_ROOT / "input" / "test.jpg"
 PARSING_OUTPUT = PROJECT_ROOT / "parsing"
 MASKS_OUTPUT = PROJECT_ROOT / "masks"
 
-# Color palette for visualization (SCHP uses 20 classes)
-PALETTE = [
-    0, 0, 0,           # 0: Background
-    128, 0, 0,         # 1: Hat
-    255, 0, 0,         # 2: Hair
-    0, 85, 0,          # 3: Sunglasses
-    170, 0, 51,        # 4: Upper-clothes
-    255, 85, 0,        # 5: Skirt
-    0, 0, 85,          # 6: Pants
-    0, 119, 221,       # 7: Dress
-    85, 85, 0,         # 8: Belt
-    0, 85, 85,         # 9: Left-shoe
-    85, 51, 0,         # 10: Right-shoe
-    52, 86, 128,       # 11: Face
-    0, 128, 0,         # 12: Left-leg
-    128, 0, 128,       # 13: Right-leg
-    0, 128, 128,       # 14: Left-arm
-    128, 128, 0,       # 15: Right-arm
-    128, 128, 128,     # 16: Bag
-    64, 0, 0,          # 17: Scarf
-    192, 0, 0,         # 18: Torso-skin
-    64, 128, 0,        # 19: Neck-skin
-]
+# One preprocessor (and its buffers) per thread, kept across images
+_local = threading.local()
 
-# SCHP Class Definitions
-# 0: Background (خلفية)
-# 1-10: Clothes (الملابس)
-# 11-19: Skin/Face (الجلد والوجه)
-BODY_PARTS = {
-    "background": 0,
-    "hat": 1,
-    "hair": 2,
-    "sunglasses": 3,
-    "upper_clothes": 4,
-    "skirt": 5,
-    "pants": 6,
-    "dress": 7,
-    "belt": 8,
-    "left_shoe": 9,
-    "right_shoe": 10,
-    "face": 11,
-    "left_leg": 12,
-    "right_leg": 13,
-    "left_arm": 14,
-    "right_arm": 15,
-    "bag": 16,
-    "scarf": 17,
-    "torso_skin": 18,
-    "neck_skin": 19,
-}
+# Class ids, names, colours and mask groups: scripts/classes.py
 
 def print_status(msg, status="INFO"):
     """طباعة رسالة الحالة / Print status message"""
@@ -134,7 +102,8 @@ def load_image(image_path):
             print_status(f"Image not found: {image_path}", "ERROR")
             return None
         
-        image = cv2.imread(str(image_path))
+        with span("decode", nbytes=Path(image_path).stat().st_size):
+            image = decode_image(image_path, DECODE_MAX_SIDE)
         if image is None:
             print_status(f"Failed to load image: {image_path}", "ERROR")
             return None
@@ -145,56 +114,51 @@ def load_image(image_path):
         print_status(f"Error loading image: {str(e)}", "ERROR")
         return None
 
+def prepare_model_input(image, orientation=1):
+    """
+    مدخلات النموذج / (1, 3, H, W) float32 SCHP input tensor for a BGR image
+    Resize, orientation, colour order and normalization run as one stage
+    into buffers reused across images (scripts/preprocess.py). The tensor
+    shares the thread's buffer: run the model before the next call.
+    """
+    preprocessor = getattr(_local, "preprocessor", None)
+    if preprocessor is None:
+        preprocessor = _local.preprocessor = Preprocessor()
+    
+    with span("preprocess", nbytes=image.nbytes):
+        chw = preprocessor(image, orientation)
+    return torch.from_numpy(chw).unsqueeze(0)
+
 def create_masks_from_labels(labels):
-    """إنشاء أقنعة من تسميات التحليل / Create masks from parsing labels"""
+    """
+    إنشاء أقنعة من تسميات التحليل / Create masks from parsing labels
+    Returns a ParsingResult: a mapping of config.BODY_PARTS group -> mask
+    whose masks are only built when they are first accessed.
+    """
     print_status("Creating segmentation masks...")
     
     try:
-        masks = {}
-        
-        # Body mask: all parts except background (classes 1-19)
-        body_mask = (labels > 0).astype(np.uint8) * 255
-        masks["body"] = body_mask
-        print_status("Body mask created", "SUCCESS")
-        
-        # Cloth mask: upper clothes (class 4), skirt (5), pants (6), dress (7)
-        cloth_mask = np.zeros_like(labels, dtype=np.uint8)
-        cloth_mask[(labels == 4) | (labels == 5) | (labels == 6) | (labels == 7)] = 255
-        masks["cloth"] = cloth_mask
-        print_status("Cloth mask created", "SUCCESS")
-        
-        # Skin mask: face (11), left/right leg (12-13), left/right arm (14-15), skin (18-19)
-        skin_mask = np.zeros_like(labels, dtype=np.uint8)
-        skin_mask[(labels == 11) | (labels == 12) | (labels == 13) | 
-                  (labels == 14) | (labels == 15) | (labels == 18) | (labels == 19)] = 255
-        masks["skin"] = skin_mask
-        print_status("Skin mask created", "SUCCESS")
-        
-        # Background mask: background only (class 0)
-        background_mask = (labels == 0).astype(np.uint8) * 255
-        masks["background"] = background_mask
-        print_status("Background mask created", "SUCCESS")
-        
+        masks = ParsingResult(labels)
+        print_status(f"Mask groups ready: {', '.join(masks)}", "SUCCESS")
         return masks
     except Exception as e:
         print_status(f"Error creating masks: {str(e)}", "ERROR")
         return {}
 
-def visualize_parsing(image, labels):
-    """إنشاء صورة ملونة للتصنيفات / Create colored visualization"""
+def visualize_parsing(image, labels, tier=VISUAL_OUTPUT_TIER):
+    """
+    إنشاء صورة ملونة للتصنيفات / Create colored visualization
+    Rendered at the size of the visual tier (see scripts/visuals.py):
+    thumbnails colorize a downsampled label map; "none" returns None.
+    """
+    size = target_size(labels.shape, tier)
+    if size is None:
+        return None
     print_status("Creating visualization...")
     
     try:
         # تحويل التسميات إلى صورة ملونة / Convert labels to colored image
-        h, w = labels.shape
-        visual = np.zeros((h, w, 3), dtype=np.uint8)
-        
-        for i in range(20):
-            mask = (labels == i)
-            r = PALETTE[i * 3]
-            g = PALETTE[i * 3 + 1]
-            b = PALETTE[i * 3 + 2]
-            visual[mask] = [b, g, r]  # BGR format for OpenCV
+        visual = colorize(shrink_labels(labels, size), out=thread_arena().take((size[1], size[0], 3)))
         
         print_status("Visualization created", "SUCCESS")
         return visual
@@ -210,26 +174,35 @@ def simple_parsing(image):
     print_status("Running parsing analysis...")
     
     try:
-        # تحويل إلى HSV للحصول على الألوان الجلدية / Convert to HSV for skin detection
-        hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
-        
-        # نطاق لون الجلد تقريبي / Approximate skin color range
-        lower_skin = np.array([0, 20, 70], dtype=np.uint8)
-        upper_skin = np.array([20, 255, 255], dtype=np.uint8)
-        
-        skin_mask = cv2.inRange(hsv, lower_skin, upper_skin)
-        
-        # إنشاء تسميات بسيطة / Create simple labels
+        # Temporaries come from the worker's arena; the label map is taken
+        # from it too and may be given back by the caller (scripts/arena.py)
+        arena = thread_arena()
         h, w = image.shape[:2]
-        labels = np.zeros((h, w), dtype=np.int32)
-        
-        # تصنيف الجلد / Classify skin
-        labels[skin_mask > 0] = 11
-        
-        # تصنيف الملابس باستخدام تحليل اللون / Classify clothes by color
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        dark_pixels = gray < 100
-        labels[dark_pixels & (skin_mask == 0)] = 4  # Dark clothes as upper_clothes
+        with arena.borrow((h, w, 3)) as hsv, arena.borrow((h, w)) as gray, \
+                arena.borrow((h, w)) as skin_mask, arena.borrow((h, w)) as dark_mask:
+            # تحويل إلى HSV للحصول على الألوان الجلدية / Convert to HSV for skin detection
+            with span("color_conversion", nbytes=image.nbytes):
+                cv2.cvtColor(image, cv2.COLOR_BGR2HSV, dst=hsv)
+                cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=gray)
+            
+            # نطاق لون الجلد تقريبي / Approximate skin color range
+            lower_skin = np.array([0, 20, 70], dtype=np.uint8)
+            upper_skin = np.array([20, 255, 255], dtype=np.uint8)
+            
+            with span("inference", nbytes=image.nbytes):
+                cv2.inRange(hsv, lower_skin, upper_skin, dst=skin_mask)
+                
+                # تصنيف الجلد / Classify skin: 255 & 11 = 11
+                labels = arena.take((h, w))
+                cv2.bitwise_and(skin_mask, 11, dst=labels)
+                
+                # تصنيف الملابس باستخدام تحليل اللون / Classify clothes by color:
+                # dark (gray < 100), non-skin pixels as upper_clothes (4)
+                cv2.threshold(gray, 99, 255, cv2.THRESH_BINARY_INV, dst=dark_mask)
+                cv2.bitwise_not(skin_mask, dst=skin_mask)
+                cv2.bitwise_and(dark_mask, skin_mask, dst=dark_mask)
+                cv2.bitwise_and(dark_mask, 4, dst=dark_mask)
+                cv2.bitwise_or(labels, dark_mask, dst=labels)
         
         print_status("Parsing analysis completed", "SUCCESS")
         return labels
@@ -237,47 +210,95 @@ def simple_parsing(image):
         print_status(f"Error in parsing: {str(e)}", "ERROR")
         return None
 
-def save_masks(masks, image_shape):
-    """حفظ الأقنعة / Save masks to disk"""
+def simple_parsing_batch(batch):
+    """
+    تحليل دفعة من الصور / Run simple_parsing over an (N, H, W, 3) batch
+    The batch is stacked vertically so the colour conversions run once.
+    Used as the parsing forward function of scripts.batching.InferenceScheduler.
+    The stacked label map is copied out and handed back to the batcher's
+    arena: the per-image views scattered to callers could not return it.
+    """
+    n, h, w = batch.shape[:3]
+    labels = simple_parsing(np.ascontiguousarray(batch).reshape(n * h, w, 3))
+    if labels is None:
+        raise RuntimeError("Batch parsing failed")
+    result = labels.reshape(n, h, w).copy()
+    thread_arena().give(labels)
+    return result
+
+def save_masks(masks, image_shape, output_dir=None, encoding=MASK_ENCODING,
+               refine=MASK_REFINE_ENABLED):
+    """
+    حفظ الأقنعة / Save masks to disk (default: masks/)
+    encoding is one of scripts.mask_codec.ENCODINGS; derived masks such as
+    background are not stored except with png8. With refine, each stored
+    mask is cleaned up (close + open) first (scripts.mask_refine).
+    """
     print_status("Saving masks...")
     
     try:
-        MASKS_OUTPUT.mkdir(parents=True, exist_ok=True)
+        output_dir = Path(output_dir) if output_dir is not None else MASKS_OUTPUT
+        output_dir.mkdir(parents=True, exist_ok=True)
+        
+        if refine:
+            with span("refine_masks", nbytes=image_shape[0] * image_shape[1] * len(masks)):
+                masks = refine_masks(masks)
         
-        for mask_name, mask_data in masks.items():
-            output_path = MASKS_OUTPUT / f"{mask_name}_mask.png"
-            cv2.imwrite(str(output_path), mask_data)
-            print_status(f"Saved {mask_name}_mask.png", "SUCCESS")
+        with span("encode_masks", encoding=encoding) as encode_span:
+            files = encode_masks(masks, encoding)
+            encode_span.add_bytes(sum(len(data) for data in files.values()))
+        
+        for file_name, data in files.items():
+            with span("save_mask", nbytes=len(data), file=file_name):
+                (output_dir / file_name).write_bytes(data)
+            print_status(f"Saved {file_name}", "SUCCESS")
         
         return True
     except Exception as e:
         print_status(f"Error saving masks: {str(e)}", "ERROR")
         return False
 
-def save_parsing_results(labels, visual, image):
-    """حفظ نتائج التحليل / Save parsing results"""
+def save_parsing_results(labels, visual, image, output_dir=None, tier=VISUAL_OUTPUT_TIER):
+    """
+    حفظ نتائج التحليل / Save parsing results (default: parsing/)
+    The visual and overlay are written at the visual's size, in the format
+    of the visual tier; with "none" (or no visual) only labels are saved.
+    """
     print_status("Saving parsing results...")
     
     try:
-        PARSING_OUTPUT.mkdir(parents=True, exist_ok=True)
+        output_dir = Path(output_dir) if output_dir is not None else PARSING_OUTPUT
+        output_dir.mkdir(parents=True, exist_ok=True)
         
         # حفظ التسميات / Save labels
-        labels_path = PARSING_OUTPUT / "test_labels.npy"
-        np.save(str(labels_path), labels)
+        labels_path = output_dir / "test_labels.npy"
+        with span("save_labels", nbytes=labels.nbytes):
+            np.save(str(labels_path), labels)
         print_status(f"Saved labels: {labels_path}", "SUCCESS")
         
+        # حفظ فهرس الفئات / Save per-class statistics sidecar
+        with span("save_label_index", nbytes=labels.nbytes):
+            index_path = save_label_index(labels_path, labels)
+        print_status(f"Saved label index: {index_path}", "SUCCESS")
+        
+        if visual is None or tier == "none":
+            return True
+        
         # حفظ التصور / Save visualization
-        if visual is not None:
-            visual_path = PARSING_OUTPUT / "test_visual.png"
-            cv2.imwrite(str(visual_path), visual)
-            print_status(f"Saved visualization: {visual_path}", "SUCCESS")
+        visual_path = output_dir / visual_name("test_visual", tier)
+        with span("save_visual") as sp:
+            sp.nbytes = write_visual(visual_path, visual)
+        print_status(f"Saved visualization: {visual_path}", "SUCCESS")
         
-        # حفظ صورة مع الشفافية / Save overlay image
-        overlay_path = PARSING_OUTPUT / "test_overlay.png"
-        if visual is not None:
-            overlay = cv2.addWeighted(image, 0.5, visual, 0.5, 0)
-            cv2.imwrite(str(overlay_path), overlay)
-            print_status(f"Saved overlay: {overlay_path}", "SUCCESS")
+        # حفظ صورة مع الشفافية / Save overlay image (at the visual's size)
+        overlay_path = output_dir / visual_name("test_overlay", tier)
+        with thread_arena().borrow(visual.shape) as overlay:
+            with span("overlay", nbytes=image.nbytes):
+                base = shrink_image(image, (visual.shape[1], visual.shape[0]))
+                blend(base, visual, 0.5, out=overlay)
+            with span("save_overlay") as sp:
+                sp.nbytes = write_visual(overlay_path, overlay)
+        print_status(f"Saved overlay: {overlay_path}", "SUCCESS")
         
         return True
     except Exception as e:
@@ -307,10 +328,12 @@ def main():
         return 1
     
     # إنشاء التصور / Create visualization
-    visual = visualize_parsing(image, labels)
+    with span("visualization", nbytes=labels.nbytes):
+        visual = visualize_parsing(image, labels)
     
     # إنشاء الأقنعة / Create masks
-    masks = create_masks_from_labels(labels)
+    with span("mask_building", nbytes=labels.nbytes):
+        masks = create_masks_from_labels(labels)
     
     # حفظ النتائج / Save results
     if not save_masks(masks, image.shape):
@@ -319,6 +342,11 @@ def main():
     if not save_parsing_results(labels, visual, image):
         return 1
     
+    # حفظ تقارير الأداء / Write profiling reports
+    if profiler.enabled:
+        for report_path in profiler.write_reports(PARSING_OUTPUT):
+            print_status(f"Saved profile: {report_path}", "SUCCESS")
+    
     print("\n" + "="*60)
     print("  Parsing Completed Successfully! ✓")
     print("  تم إكمال التحليل بنجاح!")
@@ -11,7 +11,16 @@ import json
 import numpy as np
 import mediapipe as mp
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple
+
+from scripts.arena import thread_arena
+from scripts.calibration import calibrate
+from scripts.config import DECODE_MAX_SIDE, VISUAL_OUTPUT_TIER, VISUAL_THUMBNAIL_SIZE
+from scripts.image_io import decode_image
+from scripts.measurements import MEASUREMENT_SPECS, measure, validate_pose as check_pose
+from scripts.profiling import profiler, span
+from scripts import skeleton
+from scripts.visuals import visual_name, write_visual
 
 # Project Configuration
 PROJECT_ROOT = Path(__file__).parent.absolute()
@@ -20,8 +29,6 @@ POSE_OUTPUT = PROJECT_ROOT / "pose"
 
 # MediaPipe Pose Configuration
 mp_pose = mp.solutions.pose
-mp_drawing = mp.solutions.drawing_utils
-mp_drawing_styles = mp.solutions.drawing_styles
 
 # Landmark indices for measurements (33 landmarks)
 LANDMARKS_MAP = {
@@ -74,7 +81,8 @@ def load_image(image_path):
             print_status(f"Image not found: {image_path}", "ERROR")
             return None
         
-        image = cv2.imread(str(image_path))
+        with span("decode", nbytes=Path(image_path).stat().st_size):
+            image = decode_image(image_path, DECODE_MAX_SIDE)
         if image is None:
             print_status(f"Failed to load image: {image_path}", "ERROR")
             return None
@@ -85,31 +93,41 @@ def load_image(image_path):
         print_status(f"Error loading image: {str(e)}", "ERROR")
         return None
 
-def detect_pose(image):
-    """Detect pose in image"""
+def create_pose_estimator(model_complexity=2, min_detection_confidence=0.5):
+    """
+    Create a MediaPipe pose estimator that can be reused across images.
+    Estimators are not thread-safe: use one per worker thread and close() it.
+    """
+    return mp_pose.Pose(
+        static_image_mode=True,
+        model_complexity=model_complexity,
+        enable_segmentation=False,
+        min_detection_confidence=min_detection_confidence
+    )
+
+def detect_pose(image, estimator=None):
+    """Detect pose in image (optionally with a warm estimator)"""
     print_status("Detecting pose using MediaPipe...")
     
     try:
         # Convert BGR to RGB
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        with span("color_conversion", nbytes=image.nbytes):
+            image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
         h, w, c = image.shape
         
         # Detect pose
-        with mp_pose.Pose(
-            static_image_mode=True,
-            model_complexity=2,
-            enable_segmentation=False,
-            min_detection_confidence=0.5
-        ) as pose:
-            results = pose.process(image_rgb)
+        with span("inference", nbytes=image.nbytes):
+            if estimator is not None:
+                results = estimator.process(image_rgb)
+            else:
+                with create_pose_estimator() as pose:
+                    results = pose.process(image_rgb)
         
         if results.pose_landmarks is None:
             print_status("No person detected in image - trying with lower confidence", "ERROR")
             # Try again with lower confidence threshold
-            with mp_pose.Pose(
-                static_image_mode=True,
+            with span("inference", nbytes=image.nbytes, retry=True), create_pose_estimator(
                 model_complexity=1,
-                enable_segmentation=False,
                 min_detection_confidence=0.1
             ) as pose:
                 results = pose.process(image_rgb)
@@ -176,7 +194,8 @@ def calculate_distance(point1: Dict, point2: Dict, image_width: int, image_heigh
     distance = np.sqrt((p2_x - p1_x)**2 + (p2_y - p1_y)**2)
     return distance
 
-def calculate_body_measurements(keypoints: Dict, image_width: int, image_height: int) -> Dict:
+def calculate_body_measurements(keypoints: Dict, image_width: int, image_height: int,
+                                calibration=None) -> Dict:
     """
     حساب قياسات الجسم / Calculate body measurements
     
@@ -184,86 +203,36 @@ def calculate_body_measurements(keypoints: Dict, image_width: int, image_height:
     - Shoulder width: المسافة بين المنكبين (11 و 12)
     - Chest width: عرض الصدر (بين المنكبين)
     - Hip width: عرض الورك (بين الوركين 23 و 24)
+    
+    Only landmarks with visibility >= MIN_MEASUREMENT_CONFIDENCE are used;
+    one-sided measurements fall back to the other side (scripts/measurements.py).
+    Each entry has a "confidence". Values are converted to MEASUREMENT_UNIT
+    with calibration (a scripts.calibration.Calibration, e.g. computed once
+    for a stream) or, by default, one computed for this image. Each entry
+    keeps "pixels" and records the calibration used; with neither a
+    reference object nor the user's height, the scale assumes an average
+    stature and the values are marked "estimated".
     """
     print_status("Calculating body measurements...")
     
     try:
-        measurements = {}
-        
-        # الحصول على النقاط المطلوبة / Get required landmarks
-        left_shoulder = keypoints.get("left_shoulder")
-        right_shoulder = keypoints.get("right_shoulder")
-        left_hip = keypoints.get("left_hip")
-        right_hip = keypoints.get("right_hip")
-        left_ankle = keypoints.get("left_ankle")
-        right_ankle = keypoints.get("right_ankle")
-        
-        # عرض المنكبين / Shoulder width
-        if left_shoulder and right_shoulder:
-            shoulder_width = calculate_distance(
-                left_shoulder, right_shoulder, image_width, image_height
-            )
-            measurements["shoulder_width"] = {
-                "value": float(shoulder_width),
-                "unit": "pixels",
-                "ar_name": "عرض المنكبين"
-            }
+        landmarks = skeleton.landmarks_array(keypoints)
+        measurements = measure(landmarks, (image_height, image_width))
         
-        # عرض الورك / Hip width
-        if left_hip and right_hip:
-            hip_width = calculate_distance(
-                left_hip, right_hip, image_width, image_height
-            )
-            measurements["hip_width"] = {
-                "value": float(hip_width),
-                "unit": "pixels",
-                "ar_name": "عرض الورك"
-            }
+        skipped = [name for name in MEASUREMENT_SPECS if name not in measurements]
+        if skipped:
+            print_status(f"Skipped (landmarks not visible): {', '.join(skipped)}")
         
-        # الارتفاع التقريبي (من المنكب إلى الكاحل) / Approximate height
-        if right_shoulder and right_ankle:
-            height = calculate_distance(
-                right_shoulder, right_ankle, image_width, image_height
-            )
-            measurements["body_height"] = {
-                "value": float(height),
-                "unit": "pixels",
-                "ar_name": "ارتفاع الجسم"
-            }
-        
-        # عرض الصدر (تقريبي: مساحة بين المنكبين) / Chest width (approximate)
-        if left_shoulder and right_shoulder:
-            chest_width = calculate_distance(
-                left_shoulder, right_shoulder, image_width, image_height
-            ) * 0.95  # تقريب بسيط / Simple approximation
-            measurements["chest_width"] = {
-                "value": float(chest_width),
-                "unit": "pixels",
-                "ar_name": "عرض الصدر"
-            }
-        
-        # طول الذراع / Arm length
-        left_wrist = keypoints.get("left_wrist")
-        if left_shoulder and left_wrist:
-            left_arm_length = calculate_distance(
-                left_shoulder, left_wrist, image_width, image_height
-            )
-            measurements["left_arm_length"] = {
-                "value": float(left_arm_length),
-                "unit": "pixels",
-                "ar_name": "طول الذراع اليسرى"
-            }
-        
-        # طول الساق / Leg length
-        if left_hip and left_ankle:
-            left_leg_length = calculate_distance(
-                left_hip, left_ankle, image_width, image_height
-            )
-            measurements["left_leg_length"] = {
-                "value": float(left_leg_length),
-                "unit": "pixels",
-                "ar_name": "طول الساق اليسرى"
-            }
+        # معايرة الوحدات / Convert every measurement in one vector operation
+        with span("calibration"):
+            if calibration is None:
+                calibration = calibrate(landmarks, (image_height, image_width))
+            calibration.apply(measurements)
+        if calibration.px_per_cm is None:
+            print_status(f"Calibration ({calibration.method}) not possible - keeping pixels")
+        elif calibration.estimated:
+            print_status(f"Calibration ({calibration.method}) assumes an average stature - "
+                         f"values are estimates")
         
         print_status("Body measurements calculated", "SUCCESS")
         return measurements
@@ -271,27 +240,41 @@ def calculate_body_measurements(keypoints: Dict, image_width: int, image_height:
         print_status(f"Error calculating measurements: {str(e)}", "ERROR")
         return {}
 
-def draw_skeleton(image, pose_results) -> np.ndarray:
-    """Draw skeleton on image"""
+def validate_pose(pose_results, image_shape) -> Optional[str]:
+    """
+    التحقق من الموضع / Reason to reject the image, or None if the pose is usable
+    Cheap enough to run before parsing (see scripts/measurements.validate_pose).
+    """
+    if pose_results is None:
+        return "no person detected"
+    reason = check_pose(skeleton.landmarks_array(pose_results), image_shape)
+    if reason is not None:
+        print_status(f"Pose rejected: {reason}", "ERROR")
+    return reason
+
+def draw_skeleton(image, pose_results, out=None, tier=VISUAL_OUTPUT_TIER) -> np.ndarray:
+    """
+    Draw skeleton on image (BGR, see scripts/skeleton.py)
+    At the "full" tier draws on a copy, or in place on out (which may be
+    image itself). Thumbnails are drawn on a downscaled copy; "none"
+    returns None.
+    """
+    if tier == "none":
+        return None
     print_status("Drawing skeleton...")
     
     try:
-        # نسخ الصورة الأصلية / Copy original image
-        annotated_image = image.copy()
-        
-        # تحويل إلى RGB للرسم / Convert to RGB for drawing
-        annotated_image = cv2.cvtColor(annotated_image, cv2.COLOR_BGR2RGB)
-        
-        # رسم الهيكل العظمي / Draw pose landmarks and connections
-        mp_drawing.draw_landmarks(
-            annotated_image,
-            pose_results.pose_landmarks,
-            mp_pose.POSE_CONNECTIONS,
-            landmark_drawing_spec=mp_drawing_styles.get_default_pose_landmarks_style()
-        )
-        
-        # تحويل مرة أخرى إلى BGR / Convert back to BGR
-        annotated_image = cv2.cvtColor(annotated_image, cv2.COLOR_RGB2BGR)
+        landmarks = skeleton.landmarks_array(pose_results)
+        if tier == "thumbnail":
+            annotated_image = skeleton.render_preview(image, landmarks, VISUAL_THUMBNAIL_SIZE)
+        else:
+            # The copy comes from the worker's arena (scripts/arena.py)
+            annotated_image = thread_arena().take(image.shape) if out is None else out
+            if annotated_image is not image:
+                np.copyto(annotated_image, image)
+            
+            # رسم الهيكل العظمي / Draw pose landmarks and connections
+            skeleton.draw_skeleton(annotated_image, landmarks)
         
         print_status("Skeleton drawn", "SUCCESS")
         return annotated_image
@@ -299,16 +282,18 @@ def draw_skeleton(image, pose_results) -> np.ndarray:
         print_status(f"Error drawing skeleton: {str(e)}", "ERROR")
         return image
 
-def save_keypoints(keypoints: Dict):
-    """Save keypoints to JSON"""
+def save_keypoints(keypoints: Dict, output_dir=None):
+    """Save keypoints to JSON (default: pose/)"""
     print_status("Saving keypoints...")
     
     try:
-        POSE_OUTPUT.mkdir(parents=True, exist_ok=True)
+        output_dir = Path(output_dir) if output_dir is not None else POSE_OUTPUT
+        output_dir.mkdir(parents=True, exist_ok=True)
         
-        keypoints_path = POSE_OUTPUT / "keypoints.json"
-        with open(keypoints_path, "w", encoding="utf-8") as f:
+        keypoints_path = output_dir / "keypoints.json"
+        with span("save_keypoints") as sp, open(keypoints_path, "w", encoding="utf-8") as f:
             json.dump(keypoints, f, indent=2)
+            sp.nbytes = f.tell()
         
         print_status(f"Saved keypoints: {keypoints_path}", "SUCCESS")
         return True
@@ -316,16 +301,18 @@ def save_keypoints(keypoints: Dict):
         print_status(f"Error saving keypoints: {str(e)}", "ERROR")
         return False
 
-def save_measurements(measurements: Dict):
-    """حفظ قياسات الجسم / Save body measurements to JSON"""
+def save_measurements(measurements: Dict, output_dir=None):
+    """حفظ قياسات الجسم / Save body measurements to JSON (default: pose/)"""
     print_status("Saving body measurements...")
     
     try:
-        POSE_OUTPUT.mkdir(parents=True, exist_ok=True)
+        output_dir = Path(output_dir) if output_dir is not None else POSE_OUTPUT
+        output_dir.mkdir(parents=True, exist_ok=True)
         
-        measurements_path = POSE_OUTPUT / "body_measure.json"
-        with open(measurements_path, "w", encoding="utf-8") as f:
+        measurements_path = output_dir / "body_measure.json"
+        with span("save_measurements") as sp, open(measurements_path, "w", encoding="utf-8") as f:
             json.dump(measurements, f, indent=2, ensure_ascii=False)
+            sp.nbytes = f.tell()
         
         print_status(f"Saved measurements: {measurements_path}", "SUCCESS")
         return True
@@ -333,15 +320,22 @@ def save_measurements(measurements: Dict):
         print_status(f"Error saving measurements: {str(e)}", "ERROR")
         return False
 
-def save_skeleton_image(skeleton_image: np.ndarray):
-    """حفظ صورة الهيكل العظمي / Save skeleton image"""
+def save_skeleton_image(skeleton_image: np.ndarray, output_dir=None, tier=VISUAL_OUTPUT_TIER):
+    """
+    حفظ صورة الهيكل العظمي / Save skeleton image (default: pose/)
+    Written in the format of the visual tier; nothing is written for "none".
+    """
+    if skeleton_image is None or tier == "none":
+        return True
     print_status("Saving skeleton image...")
     
     try:
-        POSE_OUTPUT.mkdir(parents=True, exist_ok=True)
+        output_dir = Path(output_dir) if output_dir is not None else POSE_OUTPUT
+        output_dir.mkdir(parents=True, exist_ok=True)
         
-        skeleton_path = POSE_OUTPUT / "skeleton.png"
-        cv2.imwrite(str(skeleton_path), skeleton_image)
+        skeleton_path = output_dir / visual_name("skeleton", tier)
+        with span("save_skeleton") as sp:
+            sp.nbytes = write_visual(skeleton_path, skeleton_image)
         
         print_status(f"Saved skeleton: {skeleton_path}", "SUCCESS")
         return True
@@ -368,6 +362,10 @@ def main():
     if pose_results is None:
         return 1
     
+    # رفض الصور الضعيفة / Reject poses too poor to measure
+    if validate_pose(pose_results, image.shape) is not None:
+        return 1
+    
     # استخراج نقاط المفاصل / Extract keypoints
     keypoints = extract_keypoints(pose_results)
     if not keypoints:
@@ -377,7 +375,8 @@ def main():
     measurements = calculate_body_measurements(keypoints, w, h)
     
     # رسم الهيكل العظمي / Draw skeleton
-    skeleton_image = draw_skeleton(image, pose_results)
+    with span("visualization", nbytes=image.nbytes):
+        skeleton_image = draw_skeleton(image, pose_results)
     
     # حفظ النتائج / Save results
     if not save_keypoints(keypoints):
@@ -389,6 +388,11 @@ def main():
     if not save_skeleton_image(skeleton_image):
         return 1
     
+    # حفظ تقارير الأداء / Write profiling reports
+    if profiler.enabled:
+        for report_path in profiler.write_reports(POSE_OUTPUT):
+            print_status(f"Saved profile: {report_path}", "SUCCESS")
+    
     # طباعة الملخص / Print summary
     print("\n" + "="*60)
     print("  Pose Estimation Completed! ✓")
@@ -401,6 +405,8 @@ def main():
         ar_name = value.get("ar_name", key)
         measure_value = value.get("value", 0)
         unit = value.get("unit", "")
+        if value.get("calibration", {}).get("estimated"):
+            unit += " (estimated)"
         print(f"  {ar_name:<30} {measure_value:>10.2f} {unit}")
     
     print("="*60)
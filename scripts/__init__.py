@@ -12,8 +12,52 @@ __description__ = "Scripts and utilities for Virtual Try-On AI"
 # Import utilities
 from .config import *
 from .utils import *
+from . import arena
+from . import batching
+from . import blending
+from . import calibration
+from . import classes
+from . import fileops
+from . import image_io
+from . import label_index
+from . import mask_analytics
+from . import mask_codec
+from . import mask_refine
+from . import measurements
+from . import parsing_result
+from . import preprocess
+from . import profiling
+from . import quality
+from . import reporting
+from . import shards
+from . import skeleton
+from . import synthetic
+from . import visuals
+from . import watcher
 
 __all__ = [
     "config",
     "utils",
+    "arena",
+    "batching",
+    "blending",
+    "calibration",
+    "classes",
+    "fileops",
+    "image_io",
+    "label_index",
+    "mask_analytics",
+    "mask_codec",
+    "mask_refine",
+    "measurements",
+    "parsing_result",
+    "preprocess",
+    "profiling",
+    "quality",
+    "reporting",
+    "shards",
+    "skeleton",
+    "synthetic",
+    "visuals",
+    "watcher",
 ]
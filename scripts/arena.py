@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Buffer Arena for Virtual Try-On AI
+مخزن المصفوفات المؤقتة لتطبيق الملابس الافتراضية
+
+Per-image temporaries (HSV and gray copies, label maps, masks, visuals,
+overlays, annotated skeletons) are borrowed from a pool keyed by shape
+and dtype, and returned once written. A batch of same-size images then
+reaches a steady state with no large allocations:
+
+    arena = thread_arena()
+    with arena.borrow((h, w), np.uint8) as gray:   # returned on exit
+        cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=gray)
+
+    labels = arena.take((h, w))                    # escapes the stage...
+    arena.give(labels)                             # ...returned by the caller
+
+Each worker thread has its own arena (thread_arena), so no buffer is
+shared between threads. give() only accepts arrays the arena handed out
+and still tracks; anything else is left alone, and a buffer that is
+never returned is simply garbage collected. At most ARENA_MAX_POOLED_MB
+of free buffers is kept per worker. When a return would exceed it, the
+free buffers of the least recently used shapes are evicted first, so a
+batch of mixed photo sizes keeps pooling its current shapes instead of
+pinning stale ones.
+"""
+
+import threading
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .config import ARENA_ENABLED, ARENA_MAX_POOLED_MB
+
+Shape = Tuple[int, ...]
+
+class BufferArena:
+    """
+    مخزن / Pool of free numpy buffers keyed by (shape, dtype)
+
+    Args:
+        max_pooled_bytes: Free buffers kept for reuse; least recently used
+                          shapes are evicted beyond it, and a buffer larger
+                          than all of it is dropped
+    """
+
+    def __init__(self, max_pooled_bytes: int = ARENA_MAX_POOLED_MB << 20):
+        self.max_pooled_bytes = max_pooled_bytes
+        # Least recently used (shape, dtype) first; each list oldest first
+        self._free: Dict[Tuple[Shape, str], List[np.ndarray]] = OrderedDict()
+        self._lent: Dict[int, weakref.ref] = {}
+        # Reentrant: a garbage collection inside take() may run _forget
+        self._lock = threading.RLock()
+
+        self.allocations = 0
+        self.reuses = 0
+        self.returns = 0
+        self.dropped = 0
+        self.evicted = 0
+        self.allocated_bytes = 0
+        self.pooled_bytes = 0
+        self.lent_bytes = 0
+        self.peak_bytes = 0
+
+    def _forget(self, key: int, nbytes: int):
+        """Weakref callback: a lent buffer was garbage collected"""
+        with self._lock:
+            if self._lent.pop(key, None) is not None:
+                self.lent_bytes -= nbytes
+
+    def take(self, shape: Shape, dtype=np.uint8) -> np.ndarray:
+        """
+        استعارة / An uninitialized C-contiguous buffer of shape and dtype
+        Reuses a returned buffer when one matches, else allocates.
+        """
+        shape = tuple(int(n) for n in shape)
+        dtype = np.dtype(dtype)
+        key = (shape, dtype.str)
+        with self._lock:
+            free = self._free.get(key)
+            if free:
+                buffer = free.pop()
+                if not free:
+                    del self._free[key]
+                else:
+                    self._free.move_to_end(key)
+                self.pooled_bytes -= buffer.nbytes
+                self.reuses += 1
+            else:
+                buffer = np.empty(shape, dtype=dtype)
+                self.allocations += 1
+                self.allocated_bytes += buffer.nbytes
+
+            key = id(buffer)
+            self._lent[key] = weakref.ref(buffer, lambda _, key=key, n=buffer.nbytes: self._forget(key, n))
+            self.lent_bytes += buffer.nbytes
+            self.peak_bytes = max(self.peak_bytes, self.lent_bytes + self.pooled_bytes)
+        return buffer
+
+    def give(self, *buffers: np.ndarray):
+        """
+        إرجاع / Return buffers from take() for reuse
+        None and arrays the arena did not hand out are ignored. A returned
+        buffer must not be used again by the caller.
+        """
+        with self._lock:
+            for buffer in buffers:
+                if buffer is None:
+                    continue
+                ref = self._lent.get(id(buffer))
+                if ref is None or ref() is not buffer:
+                    continue
+                del self._lent[id(buffer)]
+                self.lent_bytes -= buffer.nbytes
+                self.returns += 1
+                if buffer.nbytes > self.max_pooled_bytes:
+                    self.dropped += 1
+                    continue
+                self._evict(self.max_pooled_bytes - buffer.nbytes)
+                key = (buffer.shape, buffer.dtype.str)
+                self._free.setdefault(key, []).append(buffer)
+                self._free.move_to_end(key)
+                self.pooled_bytes += buffer.nbytes
+
+    def _evict(self, limit: int):
+        """إخلاء / Drop the oldest free buffers of the least recently used shapes down to limit bytes"""
+        while self.pooled_bytes > limit:
+            key, free = next(iter(self._free.items()))
+            self.pooled_bytes -= free.pop(0).nbytes
+            self.evicted += 1
+            if not free:
+                del self._free[key]
+
+    @contextmanager
+    def borrow(self, shape: Shape, dtype=np.uint8):
+        """استعارة مؤقتة / take() for the duration of a with block"""
+        buffer = self.take(shape, dtype)
+        try:
+            yield buffer
+        finally:
+            self.give(buffer)
+
+    def clear(self):
+        """تفريغ / Drop every free buffer"""
+        with self._lock:
+            self._free.clear()
+            self.pooled_bytes = 0
+
+    def stats(self) -> Dict:
+        """إحصائيات / Allocation counts and bytes"""
+        with self._lock:
+            return {
+                "allocations": self.allocations,
+                "reuses": self.reuses,
+                "returns": self.returns,
+                "dropped": self.dropped,
+                "evicted": self.evicted,
+                "allocated_bytes": self.allocated_bytes,
+                "pooled_bytes": self.pooled_bytes,
+                "lent_bytes": self.lent_bytes,
+                "peak_bytes": self.peak_bytes,
+            }
+
+# ============================================
+# PER-WORKER ARENAS / مخزن لكل عامل
+# ============================================
+
+_local = threading.local()
+_arenas: List[BufferArena] = []
+_arenas_lock = threading.Lock()
+
+def thread_arena() -> BufferArena:
+    """مخزن الخيط / The calling thread's arena (pools nothing if ARENA_ENABLED is off)"""
+    arena = getattr(_local, "arena", None)
+    if arena is None:
+        arena = BufferArena() if ARENA_ENABLED else BufferArena(max_pooled_bytes=0)
+        _local.arena = arena
+        with _arenas_lock:
+            _arenas.append(arena)
+    return arena
+
+def arena_stats() -> Dict:
+    """
+    إحصائيات جميع العمال / Totals over every worker's arena
+    peak_bytes is the sum of the per-worker peaks (an upper bound on the
+    combined peak).
+    """
+    with _arenas_lock:
+        arenas = list(_arenas)
+    totals = {"workers": len(arenas)}
+    for arena in arenas:
+        for name, value in arena.stats().items():
+            totals[name] = totals.get(name, 0) + value
+    return totals
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Micro-Batching Scheduler for Virtual Try-On AI
+جدولة الدفعات الصغيرة لتطبيق الملابس الافتراضية
+
+Frames submitted one at a time (by batch jobs or a service) are collected
+for up to N items or T milliseconds, collated into a single (N, H, W, C)
+batch, run through one forward pass and scattered back to the callers.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .config import (
+    PARSING_BATCH_SIZE,
+    PARSING_BATCH_LATENCY_MS,
+    PARSING_BATCH_MODE,
+    BATCH_PAD_MULTIPLE,
+    BATCH_RESIZE_TARGET,
+)
+
+BATCH_MODES = ("pad", "resize")
+
+def _round_up(value: int, multiple: int) -> int:
+    """التقريب لأعلى / Round value up to a multiple"""
+    if multiple <= 1:
+        return value
+    return ((value + multiple - 1) // multiple) * multiple
+
+def collate_frames(frames: List[np.ndarray], mode: str = "pad",
+                   pad_multiple: int = BATCH_PAD_MULTIPLE,
+                   target_size: Tuple[int, int] = BATCH_RESIZE_TARGET) -> Tuple[np.ndarray, List[Tuple[int, int]]]:
+    """
+    تجميع الإطارات في دفعة / Collate frames into one batch array
+
+    Args:
+        frames: List of HxW or HxWxC images with the same dtype and channels
+        mode: "pad" pads every frame to the largest size in the batch
+              (rounded up to pad_multiple), "resize" resizes every frame
+              to target_size
+        pad_multiple: Spatial alignment used by "pad" mode
+        target_size: (width, height) used by "resize" mode
+
+    Returns:
+        (batch, original_shapes) where original_shapes holds (h, w) per frame
+    """
+    if mode not in BATCH_MODES:
+        raise ValueError(f"Unknown batch mode: {mode}")
+
+    shapes = [frame.shape[:2] for frame in frames]
+    first = frames[0]
+
+    if mode == "pad":
+        batch_h = _round_up(max(h for h, _ in shapes), pad_multiple)
+        batch_w = _round_up(max(w for _, w in shapes), pad_multiple)
+    else:
+        batch_w, batch_h = target_size
+
+    batch = np.zeros((len(frames), batch_h, batch_w) + first.shape[2:], dtype=first.dtype)
+
+    for i, frame in enumerate(frames):
+        h, w = shapes[i]
+        if mode == "pad":
+            batch[i, :h, :w] = frame
+        elif (h, w) == (batch_h, batch_w):
+            batch[i] = frame
+        else:
+            cv2.resize(frame, (batch_w, batch_h), dst=batch[i], interpolation=cv2.INTER_AREA)
+
+    return batch, shapes
+
+def scatter_outputs(outputs, shapes: List[Tuple[int, int]], batch_hw: Tuple[int, int],
+                    mode: str = "pad") -> list:
+    """
+    توزيع النتائج / Split batched outputs back to per-frame results
+
+    Outputs whose leading spatial dims match the batch (label maps, masks)
+    are cropped ("pad") or resized with nearest-neighbour ("resize") back to
+    each frame's original size. Anything else (keypoints, scores) is passed
+    through unchanged.
+    """
+    results = []
+
+    for i, (h, w) in enumerate(shapes):
+        out = outputs[i]
+        if isinstance(out, np.ndarray) and out.ndim >= 2 and out.shape[:2] == batch_hw:
+            if mode == "pad":
+                out = out[:h, :w]
+            elif (h, w) != batch_hw:
+                out = cv2.resize(out, (w, h), interpolation=cv2.INTER_NEAREST)
+        results.append(out)
+
+    return results
+
+class MicroBatcher:
+    """
+    مجمع الدفعات الصغيرة / Collect frames into batched forward passes
+
+    forward_fn receives an (N, H, W, C) array and must return a sequence
+    (or array) with N entries in the same order.
+    """
+
+    def __init__(self, forward_fn: Callable, max_batch_size: int = 8,
+                 max_latency_ms: float = 25, mode: str = "pad",
+                 pad_multiple: int = BATCH_PAD_MULTIPLE,
+                 target_size: Tuple[int, int] = BATCH_RESIZE_TARGET,
+                 name: str = "batcher"):
+        """تهيئة المجمع / Initialize batcher"""
+        if mode not in BATCH_MODES:
+            raise ValueError(f"Unknown batch mode: {mode}")
+
+        self.forward_fn = forward_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_latency = max(0.0, max_latency_ms) / 1000.0
+        self.mode = mode
+        self.pad_multiple = pad_multiple
+        self.target_size = target_size
+        self.name = name
+
+        self.stats = {"batches": 0, "frames": 0, "max_batch": 0}
+
+        self._queue = queue.Queue()
+        self._closed = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        """بدء العامل / Start the background worker"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+        return self
+
+    def submit(self, frame: np.ndarray) -> Future:
+        """إرسال إطار / Submit one frame, returns a Future for its result"""
+        future = Future()
+        # Checked and queued under the lock, so close() cannot slip in between
+        # and let the worker exit with this frame still queued
+        with self._lock:
+            if self._closed.is_set():
+                raise RuntimeError(f"{self.name} is closed")
+            self.start()
+            self._queue.put((frame, future))
+        return future
+
+    def close(self, wait: bool = True):
+        """إيقاف المجمع / Flush pending frames and stop the worker"""
+        with self._lock:
+            self._closed.set()
+        if wait and self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @staticmethod
+    def _claim(items: list, item: Tuple[np.ndarray, Future]):
+        """حجز إطار / Keep a queued frame unless its caller cancelled the future"""
+        if item[1].set_running_or_notify_cancel():
+            items.append(item)
+
+    def _collect(self) -> list:
+        """جمع دفعة / Block for the first frame, then fill until size or deadline"""
+        items = []
+        try:
+            self._claim(items, self._queue.get(timeout=0.05))
+        except queue.Empty:
+            return items
+
+        deadline = time.monotonic() + self.max_latency
+        while len(items) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    self._claim(items, self._queue.get_nowait())
+                else:
+                    self._claim(items, self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return items
+
+    def _run(self):
+        """حلقة العامل / Worker loop"""
+        while not (self._closed.is_set() and self._queue.empty()):
+            items = self._collect()
+            if items:
+                self._process(items)
+
+    def _process(self, items: list):
+        """تنفيذ دفعة واحدة / Run one forward pass and resolve futures"""
+        frames = [frame for frame, _ in items]
+        futures = [future for _, future in items]
+
+        try:
+            batch, shapes = collate_frames(
+                frames, self.mode, self.pad_multiple, self.target_size
+            )
+            outputs = self.forward_fn(batch)
+            results = scatter_outputs(outputs, shapes, batch.shape[1:3], self.mode)
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+
+        self.stats["batches"] += 1
+        self.stats["frames"] += len(items)
+        self.stats["max_batch"] = max(self.stats["max_batch"], len(items))
+
+        for future, result in zip(futures, results):
+            future.set_result(result)
+
+class InferenceScheduler:
+    """
+    جدولة الاستدلال / One micro-batching queue per batchable stage
+
+    Only parsing has a batched forward pass. Pose is not queued: MediaPipe
+    Pose takes one image per call and keeps tracking state, so it runs on a
+    warm estimator per worker thread instead (see WarmPipeline). Submitting
+    to a stage without a queue raises KeyError.
+    """
+
+    def __init__(self, parsing_fn: Optional[Callable] = None,
+                 parsing_batch_size: int = PARSING_BATCH_SIZE,
+                 parsing_latency_ms: float = PARSING_BATCH_LATENCY_MS):
+        """تهيئة الجدولة / Initialize scheduler"""
+        self.queues: Dict[str, MicroBatcher] = {}
+
+        if parsing_fn is not None:
+            self.queues["parsing"] = MicroBatcher(
+                parsing_fn, parsing_batch_size, parsing_latency_ms,
+                mode=PARSING_BATCH_MODE, name="parsing-batcher"
+            )
+
+    def submit(self, stage: str, frame: np.ndarray) -> Future:
+        """إرسال إطار لمرحلة / Submit a frame to a stage queue"""
+        return self.queues[stage].submit(frame)
+
+    def parse(self, frame: np.ndarray) -> Future:
+        """تحليل إطار / Queue a frame for parsing"""
+        return self.submit("parsing", frame)
+
+    def stats(self) -> Dict[str, dict]:
+        """إحصائيات الدفعات / Per-queue batching statistics"""
+        return {name: dict(batcher.stats) for name, batcher in self.queues.items()}
+
+    def close(self):
+        """إيقاف جميع الطوابير / Flush and stop all queues"""
+        for batcher in self.queues.values():
+            batcher.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Image Blending for Virtual Try-On AI
+دمج الصور لتطبيق الملابس الافتراضية
+
+Overlay blending in integer arithmetic, written into `out` when a buffer
+is given (it may be the background itself):
+
+    blend(image, visual, 0.5)               # same-shape images
+    blend(image, mask, 0.3)                 # (H, W) mask over every channel
+    blend(image, (0, 0, 255), alpha_map)    # per-pixel (H, W) uint8 alpha
+    blend_layers(image, [(m1, 0.3), (m2, 0.2)])  # several masks, one pass
+
+With a constant alpha, two same-shape images go through cv2.addWeighted
+(saturating SIMD kernel, written straight into `out`). For masks and
+colours the alpha is quantized to 1/256 and applied through two 256-entry
+tables, one per operand. The background table rounds down and the
+foreground table rounds to nearest, so their sum never exceeds 255: the
+full-size work is one cv2.LUT and one saturating add, and only the
+single-channel term is computed per pixel. A per-pixel alpha map is
+computed in uint16 with exact rounding division by 255.
+"""
+
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple, Union
+
+import cv2
+import numpy as np
+
+WEIGHT_ONE = 256  # Fixed-point 1.0 for constant alphas
+
+Foreground = Union[np.ndarray, int, Sequence[int]]
+
+def alpha_weight(alpha: float) -> int:
+    """وزن ثابت الفاصلة / alpha in [0, 1] -> integer weight in [0, 256]"""
+    return int(round(min(max(float(alpha), 0.0), 1.0) * WEIGHT_ONE))
+
+@lru_cache(maxsize=None)
+def scale_lut(weight: int, round_nearest: bool = False) -> np.ndarray:
+    """جدول تحجيم / uint8 table v -> v * weight / 256 (floor or nearest)"""
+    values = np.arange(256, dtype=np.uint32) * weight
+    if round_nearest:
+        values += WEIGHT_ONE // 2
+    lut = (values >> 8).astype(np.uint8)
+    lut.setflags(write=False)
+    return lut
+
+def _check_out(background: np.ndarray, out: Optional[np.ndarray]) -> np.ndarray:
+    if out is None:
+        return np.empty_like(background)
+    if out.shape != background.shape or out.dtype != np.uint8:
+        raise ValueError(f"out must be uint8 with shape {background.shape}, got {out.dtype} {out.shape}")
+    return out
+
+def _add_broadcast(out: np.ndarray, term: np.ndarray):
+    """جمع / out += term, a (H, W) term is added to every channel"""
+    if term.ndim == 2 and out.ndim == 3:
+        # cv2.merge + cv2.add is ~10x faster than a broadcasting np.add
+        term = cv2.merge([term] * out.shape[2])
+    elif term.ndim == 1:
+        term = tuple(int(v) for v in term) + (0,) * (4 - term.size)
+    elif term.ndim == 0:
+        term = int(term)
+    cv2.add(out, term, dst=out)
+
+def blend(background: np.ndarray, foreground: Foreground, alpha: Union[float, np.ndarray],
+          out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    دمج / background * (1 - alpha) + foreground * alpha
+
+    Args:
+        background: (H, W) or (H, W, C) uint8 image
+        foreground: Image of the same shape, an (H, W) single-channel image
+                    (broadcast over channels) or a constant value / colour
+        alpha: Constant in [0, 1], or an (H, W) uint8 alpha map (255 = foreground)
+        out: uint8 buffer shaped like background (may be background)
+
+    Returns:
+        out (allocated if not given)
+    """
+    out = _check_out(background, out)
+    constant = not isinstance(foreground, np.ndarray)
+    if constant:
+        foreground = np.asarray(foreground, dtype=np.uint8)
+
+    if not isinstance(alpha, np.ndarray):
+        if not constant and foreground.shape == background.shape:
+            alpha = min(max(float(alpha), 0.0), 1.0)
+            return cv2.addWeighted(background, 1.0 - alpha, foreground, alpha, 0, dst=out)
+        weight = alpha_weight(alpha)
+        # Foreground term first, so out may alias background
+        fg_lut = scale_lut(weight, round_nearest=True)
+        fg_term = fg_lut[foreground] if constant else cv2.LUT(foreground, fg_lut)
+        cv2.LUT(background, scale_lut(WEIGHT_ONE - weight), dst=out)
+        _add_broadcast(out, fg_term)
+        return out
+
+    if alpha.shape != background.shape[:2] or alpha.dtype != np.uint8:
+        raise ValueError(f"alpha map must be uint8 with shape {background.shape[:2]}")
+    a = alpha[..., None] if background.ndim == 3 else alpha
+    inv = cv2.bitwise_not(alpha)
+    inv = inv[..., None] if background.ndim == 3 else inv
+    if not constant and foreground.ndim == 2 and background.ndim == 3:
+        foreground = foreground[..., None]
+
+    # acc = bg * (255 - a) + fg * a + 128, at most 65153
+    acc = np.multiply(background, inv, dtype=np.uint16)
+    acc += np.multiply(foreground, a, dtype=np.uint16)
+    acc += 128
+    # Exact round(x / 255) for x < 65536: (x + (x >> 8)) >> 8
+    acc += acc >> 8
+    acc >>= 8
+    np.copyto(out, acc, casting="unsafe")
+    return out
+
+def blend_layers(background: np.ndarray, layers: List[Tuple[np.ndarray, float]],
+                 out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    دمج طبقات / Several single-channel blends, applied in order, in one pass
+
+    ((bg * (1 - a1) + m1 * a1) * (1 - a2) + m2 * a2 ...) is collapsed to
+    bg * keep + sum(w_i * m_i). The mask sum is accumulated on one uint16
+    channel and the integer weights add up to exactly 256, so the result
+    cannot overflow. Masks must match the background's height and width.
+    """
+    out = _check_out(background, out)
+    if not layers:
+        np.copyto(out, background)
+        return out
+    if len(layers) == 1:
+        mask, alpha = layers[0]
+        return blend(background, mask, alpha, out=out)
+
+    keep = 1.0
+    weights = []
+    for _, alpha in reversed(layers):
+        weights.append(keep * alpha)
+        keep *= 1.0 - alpha
+    weights.reverse()
+    int_weights = [alpha_weight(w) for w in weights]
+    while sum(int_weights) > WEIGHT_ONE:  # Rounding overshoot, at most a few units
+        int_weights[int_weights.index(max(int_weights))] -= 1
+    keep_weight = WEIGHT_ONE - sum(int_weights)
+
+    acc = np.full(background.shape[:2], WEIGHT_ONE // 2, dtype=np.uint16)
+    for (mask, _), weight in zip(layers, int_weights):
+        if weight:
+            acc += np.multiply(mask, np.uint16(weight), dtype=np.uint16)
+    acc >>= 8
+
+    cv2.LUT(background, scale_lut(keep_weight), dst=out)
+    _add_broadcast(out, acc.astype(np.uint8))
+    return out
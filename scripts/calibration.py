@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Measurement Calibration for Virtual Try-On AI
+معايرة القياسات لتطبيق الملابس الافتراضية
+
+Turns pixel measurements into MEASUREMENT_UNIT (cm or inches). A
+Calibration is computed once per image (or once for a stream from the
+same camera) and converts every measurement with one vector operation.
+
+Methods (CALIBRATION_METHOD):
+    reference   - an object of known size: pixel length / real length
+    height      - the user's height against the person's stature in pixels
+    proportions - the person's own proportions: stature in pixels from limb
+                  segments, assuming CALIBRATION_AVERAGE_HEIGHT_CM
+    fixed       - config.PIXELS_PER_CM
+    auto        - reference if given, else height if known, else proportions
+
+Only reference, height and fixed are measured scales. proportions assumes
+an average stature, so its values are marked as estimates. Every converted
+entry records the calibration it came from (Calibration.to_dict), so a
+stored body_measure.json tells calibrated values from assumed ones.
+
+Stature in pixels is estimated from every visible limb segment divided by
+its average fraction of body height (Winter, Biomechanics and Motor
+Control of Human Movement); the median of those estimates is used, so
+one foreshortened or misdetected limb does not skew the scale.
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .config import (
+    CALIBRATION_AVERAGE_HEIGHT_CM,
+    CALIBRATION_METHOD,
+    CALIBRATION_USER_HEIGHT_CM,
+    LANDMARK_INDICES,
+    MEASUREMENT_UNIT,
+    MIN_MEASUREMENT_CONFIDENCE,
+    PIXELS_PER_CM,
+)
+
+UNITS = ("pixels", "cm", "inches")
+METHODS = ("auto", "reference", "height", "proportions", "fixed")
+# Methods whose scale rests on an assumed stature, not on the image or user
+ESTIMATED_METHODS = ("proportions",)
+CM_PER_INCH = 2.54
+
+# Limb segment (landmark, landmark) -> length as a fraction of stature
+SEGMENT_RATIOS = {
+    ("left_shoulder", "right_shoulder"): 0.259,
+    ("left_hip", "right_hip"): 0.191,
+    ("left_shoulder", "left_elbow"): 0.186,
+    ("right_shoulder", "right_elbow"): 0.186,
+    ("left_elbow", "left_wrist"): 0.146,
+    ("right_elbow", "right_wrist"): 0.146,
+    ("left_hip", "left_knee"): 0.245,
+    ("right_hip", "right_knee"): 0.245,
+    ("left_knee", "left_ankle"): 0.246,
+    ("right_knee", "right_ankle"): 0.246,
+}
+
+_SEGMENT_A = np.array([LANDMARK_INDICES[a] for a, _ in SEGMENT_RATIOS], dtype=np.intp)
+_SEGMENT_B = np.array([LANDMARK_INDICES[b] for _, b in SEGMENT_RATIOS], dtype=np.intp)
+_SEGMENT_RATIO = np.array(list(SEGMENT_RATIOS.values()), dtype=np.float64)
+
+def stature_pixels(landmarks: np.ndarray, image_shape: Tuple[int, ...],
+                   min_visibility: float = MIN_MEASUREMENT_CONFIDENCE) -> Optional[float]:
+    """
+    الطول بالبكسل / Estimated body height in pixels from limb segments
+
+    Args:
+        landmarks: (33, 4) normalized landmarks (x, y, z, visibility)
+        image_shape: (height, width, ...) of the image they refer to
+
+    Returns:
+        Median stature estimate, or None when no segment is visible
+    """
+    h, w = image_shape[:2]
+    points = landmarks[:, :2].astype(np.float64) * (w, h)
+    visible = landmarks[:, 3] >= min_visibility
+
+    valid = visible[_SEGMENT_A] & visible[_SEGMENT_B]
+    if not valid.any():
+        return None
+    lengths = np.hypot(*(points[_SEGMENT_A[valid]] - points[_SEGMENT_B[valid]]).T)
+    return float(np.median(lengths / _SEGMENT_RATIO[valid]))
+
+def unit_factor(px_per_cm: Union[float, np.ndarray, None], unit: str) -> Union[float, np.ndarray, None]:
+    """معامل الوحدة / Units per pixel (None when the scale is unknown)"""
+    if unit not in UNITS:
+        raise ValueError(f"Unknown unit: {unit} (expected one of {UNITS})")
+    if unit == "pixels":
+        return 1.0
+    if px_per_cm is None:
+        return None
+    cm_per_px = 1.0 / np.asarray(px_per_cm, dtype=np.float64)
+    return cm_per_px / CM_PER_INCH if unit == "inches" else cm_per_px
+
+class Calibration:
+    """
+    معايرة / Pixel -> real-world scale for one image or stream
+
+    Args:
+        px_per_cm: Pixels per centimetre, or None when it could not be
+                   determined (measurements then stay in pixels)
+        method: How the scale was obtained
+        stature_px: Stature estimate used, if any
+    """
+
+    def __init__(self, px_per_cm: Optional[float], method: str,
+                 stature_px: Optional[float] = None):
+        self.px_per_cm = None if px_per_cm is None else float(px_per_cm)
+        self.method = method
+        self.stature_px = stature_px
+
+    @property
+    def estimated(self) -> bool:
+        """تقديري / True when the scale assumes an average stature"""
+        return self.px_per_cm is not None and self.method in ESTIMATED_METHODS
+
+    def unit(self, unit: str = MEASUREMENT_UNIT) -> str:
+        """الوحدة الفعلية / unit, or "pixels" when uncalibrated"""
+        return unit if self.px_per_cm is not None else "pixels"
+
+    def convert(self, values_px, unit: str = MEASUREMENT_UNIT) -> np.ndarray:
+        """تحويل / Convert pixel values (any shape) in one operation"""
+        factor = unit_factor(self.px_per_cm, self.unit(unit))
+        return np.asarray(values_px, dtype=np.float64) * factor
+
+    def apply(self, measurements: Dict[str, Dict], unit: str = MEASUREMENT_UNIT) -> Dict[str, Dict]:
+        """
+        تطبيق / Convert a measurements dict in place
+        Each entry keeps its pixel value under "pixels" so it can be
+        recalibrated later (see convert_table), and the calibration it was
+        converted with under "calibration" (see to_dict).
+        """
+        names = list(measurements)
+        pixels = np.fromiter(
+            (measurement_pixels(measurements[name]) for name in names),
+            dtype=np.float64, count=len(names),
+        )
+        values = self.convert(pixels, unit)
+        unit = self.unit(unit)
+        for name, px, value in zip(names, pixels, values):
+            entry = measurements[name]
+            entry["value"] = float(value)
+            entry["unit"] = unit
+            entry["pixels"] = float(px)
+            entry["calibration"] = self.to_dict()
+        return measurements
+
+    def to_dict(self) -> Dict:
+        """وصف المعايرة / Method, scale and whether the values are estimates"""
+        return {
+            "method": self.method,
+            "px_per_cm": self.px_per_cm,
+            "stature_px": self.stature_px,
+            "estimated": self.estimated,
+        }
+
+    def __repr__(self):
+        return f"Calibration(px_per_cm={self.px_per_cm}, method={self.method!r})"
+
+def calibrate(landmarks: Optional[np.ndarray], image_shape: Tuple[int, ...],
+              method: str = CALIBRATION_METHOD,
+              user_height_cm: Optional[float] = CALIBRATION_USER_HEIGHT_CM,
+              reference: Optional[Tuple[float, float]] = None) -> Calibration:
+    """
+    معايرة صورة / Calibration for one image
+
+    Args:
+        landmarks: (33, 4) normalized landmarks (may be None for reference/fixed)
+        image_shape: (height, width, ...) of the image
+        method: One of METHODS
+        user_height_cm: Known height of the person
+        reference: (pixel length, real length in cm) of a reference object
+
+    Returns:
+        Calibration (px_per_cm None if the method has nothing to work with)
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown calibration method: {method} (expected one of {METHODS})")
+
+    if method == "auto":
+        if reference is not None:
+            method = "reference"
+        elif user_height_cm:
+            method = "height"
+        else:
+            method = "proportions"
+
+    if method == "fixed":
+        return Calibration(PIXELS_PER_CM, method)
+
+    if method == "reference":
+        if reference is None:
+            raise ValueError("The reference method needs (pixel length, real length in cm)")
+        pixels, real_cm = reference
+        if pixels <= 0 or real_cm <= 0:
+            raise ValueError(f"Invalid reference: {reference}")
+        return Calibration(pixels / real_cm, method)
+
+    if method == "height" and not user_height_cm:
+        raise ValueError("The height method needs user_height_cm")
+    height_cm = user_height_cm if method == "height" else CALIBRATION_AVERAGE_HEIGHT_CM
+
+    stature = stature_pixels(landmarks, image_shape) if landmarks is not None else None
+    if stature is None:
+        return Calibration(None, method)
+    return Calibration(stature / height_cm, method, stature)
+
+# ============================================
+# STORED MEASUREMENTS / القياسات المخزنة
+# ============================================
+
+def measurement_pixels(entry: Dict) -> float:
+    """قيمة البكسل / Pixel value of a stored entry (NaN if unknown)"""
+    if "pixels" in entry:
+        return float(entry["pixels"])
+    if entry.get("unit", "pixels") == "pixels":
+        return float(entry["value"])
+    return float("nan")
+
+def stored_calibration(measurements: Dict[str, Dict]) -> Optional[Dict]:
+    """المعايرة المخزنة / Calibration recorded in a measurements dict, if any"""
+    for entry in measurements.values():
+        if "calibration" in entry:
+            return entry["calibration"]
+    return None
+
+def measurement_table(measurement_sets: Iterable[Dict[str, Dict]],
+                      names: Optional[Sequence[str]] = None) -> Tuple[List[str], np.ndarray]:
+    """
+    جدول القياسات / Stack measurement dicts into an (N, M) pixel table
+    Columns are names (default: every name seen, in first-seen order);
+    missing measurements are NaN.
+    """
+    sets = list(measurement_sets)
+    if names is None:
+        names = list(dict.fromkeys(name for measurements in sets for name in measurements))
+    column = {name: j for j, name in enumerate(names)}
+
+    table = np.full((len(sets), len(names)), np.nan, dtype=np.float64)
+    for i, measurements in enumerate(sets):
+        for name, entry in measurements.items():
+            j = column.get(name)
+            if j is not None:
+                table[i, j] = measurement_pixels(entry)
+    return list(names), table
+
+def load_measurement_table(paths: Iterable[Union[str, Path]],
+                           names: Optional[Sequence[str]] = None) -> Tuple[List[str], np.ndarray]:
+    """تحميل الجدول / measurement_table over body_measure.json files"""
+    sets = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            sets.append(json.load(f))
+    return measurement_table(sets, names)
+
+def convert_table(table_px: np.ndarray, px_per_cm: Union[float, Sequence[float]],
+                  unit: str = MEASUREMENT_UNIT) -> np.ndarray:
+    """
+    تحويل الجدول / Convert an (N, M) pixel table in one operation
+    px_per_cm is one scale for every row, or one per row (N,).
+    """
+    factor = unit_factor(np.asarray(px_per_cm, dtype=np.float64), unit)
+    if np.ndim(factor) == 1:
+        factor = factor[:, None]
+    return np.asarray(table_px, dtype=np.float64) * factor
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Parsing Class Registry for Virtual Try-On AI
+سجل فئات التحليل لتطبيق الملابس الافتراضية
+
+Single source for class ids, names, colours and mask groups, built once
+at import time from scripts/config (PARSING_CLASSES, PARSING_PALETTE,
+BODY_PARTS). Colorizing and masking a label map are table lookups:
+
+    colorize(labels)          -> BGR image through COLOR_LUT_BGR
+    group_mask(labels, "skin") -> 0/255 mask through a 256-entry LUT
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .arena import thread_arena
+from .config import BODY_PARTS, PARSING_CLASSES, PARSING_PALETTE
+
+NUM_CLASSES = len(PARSING_CLASSES)
+
+# Class id -> display name ("Upper-clothes")
+CLASS_NAMES: Tuple[str, ...] = tuple(PARSING_CLASSES[i] for i in range(NUM_CLASSES))
+
+def normalize_name(name: str) -> str:
+    """توحيد الاسم / "Upper-clothes", "upper clothes" -> "upper_clothes" """
+    return re.sub(r"[^a-z0-9]+", "_", name.strip().lower()).strip("_")
+
+# Normalized name -> class id ("upper_clothes" -> 4)
+CLASS_IDS: Dict[str, int] = {normalize_name(name): i for i, name in enumerate(CLASS_NAMES)}
+
+# (NUM_CLASSES, 3) colour tables
+PALETTE_BGR = np.array(PARSING_PALETTE, dtype=np.uint8)
+PALETTE_RGB = np.ascontiguousarray(PALETTE_BGR[:, ::-1])
+
+# 256-entry colour lookup (ids without a colour render black), shaped for
+# cv2.LUT on a 3-channel image
+COLOR_LUT_BGR = np.zeros((256, 3), dtype=np.uint8)
+COLOR_LUT_BGR[:NUM_CLASSES] = PALETTE_BGR
+_COLOR_LUT_CV = COLOR_LUT_BGR.reshape(256, 1, 3)
+
+# Mask groups (config.BODY_PARTS) -> class ids
+GROUPS: Dict[str, Tuple[int, ...]] = {
+    name: tuple(sorted(set(ids))) for name, ids in BODY_PARTS.items()
+}
+
+def lut_for(class_ids: Iterable[int]) -> np.ndarray:
+    """جدول قناع / 256-entry uint8 LUT: 255 for class_ids, 0 elsewhere (cached)"""
+    return _lut_for(tuple(sorted(set(int(i) for i in class_ids))))
+
+@lru_cache(maxsize=None)
+def _lut_for(class_ids: Tuple[int, ...]) -> np.ndarray:
+    lut = np.zeros(256, dtype=np.uint8)
+    lut[list(class_ids)] = 255
+    lut.setflags(write=False)
+    return lut
+
+# Precomputed LUTs for every configured group
+MASK_LUTS: Dict[str, np.ndarray] = {name: lut_for(ids) for name, ids in GROUPS.items()}
+
+def class_name(class_id: int) -> str:
+    """اسم الفئة / Display name of a class id"""
+    class_id = int(class_id)
+    return CLASS_NAMES[class_id] if 0 <= class_id < NUM_CLASSES else f"class_{class_id}"
+
+def class_id(name: str) -> Optional[int]:
+    """معرف الفئة / Class id for a class name in any spelling, or None"""
+    return CLASS_IDS.get(normalize_name(name))
+
+def colorize(labels: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    تلوين التسميات / BGR visualization of a uint8 label map
+    One cv2.LUT pass; ids are looked up in COLOR_LUT_BGR.
+    """
+    if labels.dtype != np.uint8:
+        labels = labels.astype(np.uint8)
+    with thread_arena().borrow(labels.shape + (3,)) as labels3:
+        cv2.merge((labels, labels, labels), dst=labels3)
+        return cv2.LUT(labels3, _COLOR_LUT_CV, dst=out)
+
+def group_mask(labels: np.ndarray, group: str) -> np.ndarray:
+    """قناع مجموعة / 0/255 mask of a configured group"""
+    if labels.dtype != np.uint8:
+        labels = labels.astype(np.uint8)
+    return cv2.LUT(labels, MASK_LUTS[group])
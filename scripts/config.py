@@ -36,6 +36,11 @@ IMAGE_MAX_WIDTH = 1024
 IMAGE_MAX_HEIGHT = 1024
 IMAGE_QUALITY = 95
 
+# Working resolution (long side) the model stages decode at: larger JPEGs
+# are decoded at 1/2, 1/4 or 1/8 scale (scripts/image_io.py), never below
+# it. None decodes at full resolution.
+DECODE_MAX_SIDE = None
+
 # ============================================
 # PARSING SETTINGS / إعدادات التحليل
 # ============================================
@@ -45,6 +50,14 @@ SCHP_MODEL_NAME = "lip_final.pth"
 SCHP_REPO_URL = "https://github.com/PeikeLi/Self-Correction-Human-Parsing.git"
 SCHP_GOOGLE_DRIVE_ID = "1LBvbjRgGc0wJdvO65_ZVgnj0iB3pHMKqN"
 
+# Parsing model input (scripts/preprocess.py): resized to this long side,
+# then normalized float32 CHW. SCHP takes BGR input normalized with the
+# ImageNet statistics in BGR order.
+PARSING_INPUT_SIZE = 473
+PARSING_INPUT_RGB = False
+PARSING_INPUT_MEAN = (0.406, 0.456, 0.485)
+PARSING_INPUT_STD = (0.225, 0.224, 0.229)
+
 # Parsing classes / فئات التحليل
 PARSING_CLASSES = {
     0: "Background",
@@ -70,6 +83,7 @@ PARSING_CLASSES = {
 }
 
 # Color palette for visualization (BGR format)
+# Single source for all stages; see scripts/classes.py for the lookup tables
 PARSING_PALETTE = [
     [0, 0, 0],           # 0: Background
     [0, 0, 128],         # 1: Hat
@@ -80,16 +94,16 @@ PARSING_PALETTE = [
     [85, 0, 0],          # 6: Pants
     [221, 119, 0],       # 7: Dress
     [0, 85, 85],         # 8: Belt
-    [85, 0, 0],          # 9: Left-shoe
+    [85, 85, 0],         # 9: Left-shoe
     [0, 51, 85],         # 10: Right-shoe
     [128, 86, 52],       # 11: Face
     [0, 128, 0],         # 12: Left-leg
     [128, 0, 128],       # 13: Right-leg
-    [128, 0, 0],         # 14: Left-arm
+    [128, 128, 0],       # 14: Left-arm
     [0, 128, 128],       # 15: Right-arm
-    [0, 0, 128],         # 16: Bag
-    [0, 64, 192],        # 17: Scarf
-    [128, 128, 0],       # 18: Torso-skin
+    [128, 128, 128],     # 16: Bag
+    [0, 0, 64],          # 17: Scarf
+    [0, 0, 192],         # 18: Torso-skin
     [0, 128, 64],        # 19: Neck-skin
 ]
 
@@ -101,6 +115,19 @@ BODY_PARTS = {
     "background": [0],
 }
 
+# Mask storage: png8 (8-bit PNG per mask), png1 (1-bit PNG per mask),
+# rle (COCO RLE in masks.rle.json) or packed (one bit-packed masks.packed).
+# Except for png8, background is derived from body on read, not stored.
+MASK_ENCODING = "png1"
+
+# Mask refinement (close + open on each stored mask) before saving
+MASK_REFINE_ENABLED = True
+MASK_REFINE_KERNEL = 5          # Structuring element size at full resolution
+# Opt-in: masks with a larger long side (e.g. 1024) are refined at reduced
+# scale and scaled back. Faster, but thin parts such as straps can change.
+MASK_REFINE_MAX_SIDE = None
+MASK_REFINE_BLUR = False        # Soft edges (only kept by the png8 encoding)
+
 # ============================================
 # POSE ESTIMATION SETTINGS / إعدادات تقدير الموضع
 # ============================================
@@ -162,6 +189,17 @@ CUDA_DEVICE_ID = 0
 BATCH_SIZE = 1
 NUM_WORKERS = 0
 
+# Micro-batching scheduler / جدولة الدفعات الصغيرة
+# A batch is flushed when it holds BATCH_SIZE items or when the oldest
+# item has waited BATCH_LATENCY_MS, whichever comes first.
+PARSING_BATCH_SIZE = 8
+PARSING_BATCH_LATENCY_MS = 25
+
+# How frames of different sizes are collated: "pad" or "resize"
+PARSING_BATCH_MODE = "pad"
+BATCH_PAD_MULTIPLE = 32
+BATCH_RESIZE_TARGET = (512, 512)  # (width, height)
+
 # ============================================
 # LOGGING & DEBUG / تسجيل والتصحيح
 # ============================================
@@ -175,6 +213,15 @@ DEBUG_MODE = False
 # Save intermediate results
 SAVE_INTERMEDIATE = True
 
+# Per-stage timing spans (also enabled by the VTON_PROFILE=1 env variable)
+PROFILING_ENABLED = False
+PROFILE_ALLOCATIONS = True  # Track allocation deltas with tracemalloc
+
+# Batch report aggregates: per-stage latency histogram bucket bounds (ms)
+# and the interval used for throughput over time
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, 60000]
+THROUGHPUT_INTERVAL_SECONDS = 10
+
 # ============================================
 # DISPLAY & VISUALIZATION / العرض والتصور
 # ============================================
@@ -187,6 +234,25 @@ KEYPOINT_COLOR = (0, 0, 255)  # Red in BGR
 KEYPOINT_RADIUS = 3
 CONNECTION_THICKNESS = 2
 
+# Skeleton topology (MediaPipe pose, landmark index pairs) for
+# scripts/skeleton.py; landmarks below the visibility threshold are not drawn
+POSE_CONNECTIONS = (
+    (0, 1), (1, 2), (2, 3), (3, 7), (0, 4), (4, 5), (5, 6), (6, 8), (9, 10),
+    (11, 12), (11, 13), (13, 15), (15, 17), (15, 19), (15, 21), (17, 19),
+    (12, 14), (14, 16), (16, 18), (16, 20), (16, 22), (18, 20),
+    (11, 23), (12, 24), (23, 24), (23, 25), (24, 26), (25, 27), (26, 28),
+    (27, 29), (28, 30), (29, 31), (30, 32), (27, 31), (28, 32),
+)
+SKELETON_MIN_VISIBILITY = 0.5
+
+# Visual artifacts (parsing visual/overlay, skeleton), see scripts/visuals.py:
+# "none", "thumbnail" (VISUAL_THUMBNAIL_SIZE long side, VISUAL_FORMAT) or
+# "full" (full-resolution PNG)
+VISUAL_OUTPUT_TIER = "thumbnail"
+VISUAL_THUMBNAIL_SIZE = 512
+VISUAL_FORMAT = "jpg"  # "jpg" or "webp"
+VISUAL_QUALITY = 85
+
 # ============================================
 # DATA FORMATS / تنسيقات البيانات
 # ============================================
@@ -202,16 +268,34 @@ OUTPUT_FORMATS = {
     "csv": ".csv",
 }
 
+# How batch processing places the original image in each output folder:
+# auto (reflink, then hardlink, then copy), hardlink, reflink, copy, or
+# reference (store only the source path). The image is never re-encoded.
+BATCH_INPUT_MODE = "auto"
+
+# Batch output layout: "dirs" (one folder per image) or "shards" (artifacts
+# packed into append-only shard files with a manifest)
+BATCH_OUTPUT_LAYOUT = "dirs"
+SHARD_MAX_BYTES = 1 << 30  # Start a new shard file after 1 GiB
+
 # ============================================
 # MEASUREMENT SETTINGS / إعدادات القياسات
 # ============================================
 
 # Unit system
-MEASUREMENT_UNIT = "pixels"  # pixels, cm, inches
+MEASUREMENT_UNIT = "cm"  # pixels, cm, inches
 
-# Pixel to real-world conversion (example - adjust based on camera)
+# Pixel to real-world conversion (example - adjust based on camera),
+# used by the "fixed" calibration method
 PIXELS_PER_CM = 0.5  # Approximate
 
+# Calibration (scripts/calibration.py): "auto" uses a reference object when
+# one is given, then the user height if known, then the person's own
+# proportions; or one of "reference", "height", "proportions", "fixed"
+CALIBRATION_METHOD = "auto"
+CALIBRATION_USER_HEIGHT_CM = None      # Known height of the person (cm)
+CALIBRATION_AVERAGE_HEIGHT_CM = 170.0  # Assumed stature for "proportions"
+
 # Minimum confidence for measurement
 MIN_MEASUREMENT_CONFIDENCE = 0.5
 
@@ -226,6 +310,10 @@ MODEL_PRECISION = "float32"  # float32, float16
 USE_THREADING = True
 MAX_THREADS = 4
 
+# Buffer arena (scripts/arena.py): per-worker pool of per-image temporaries
+ARENA_ENABLED = True
+ARENA_MAX_POOLED_MB = 256  # Free buffers kept per worker
+
 # ============================================
 # VALIDATION / التحقق
 # ============================================
@@ -238,6 +326,33 @@ MIN_IMAGE_AREA = 10000
 MIN_PERSON_HEIGHT = 50  # pixels
 MIN_VISIBLE_LANDMARKS = 10
 
+# Quality gate (scripts/quality.py): images failing these are rejected
+# before the model stages. Metrics run on a grayscale copy downscaled to
+# QUALITY_ANALYSIS_SIZE (long side); sizes come from the file header.
+QUALITY_GATE_ENABLED = True
+QUALITY_ANALYSIS_SIZE = 256
+MIN_SHARPNESS = 15.0    # Variance of the Laplacian at the analysis size
+MIN_BRIGHTNESS = 40     # Mean gray level
+MAX_BRIGHTNESS = 245
+MIN_CONTRAST = 10.0     # Gray level standard deviation
+QUALITY_PERSON_CHECK = False  # OpenCV HOG people detector (slower)
+
+# ============================================
+# WATCH FOLDER / مراقبة المجلد
+# ============================================
+
+# Seconds a file's size and mtime must stay unchanged before it is processed
+WATCH_SETTLE_SECONDS = 2.0
+
+# Directory rescan interval when inotify is unavailable
+WATCH_POLL_INTERVAL = 1.0
+
+# Images processed concurrently by the daemon
+WATCH_MAX_CONCURRENCY = MAX_THREADS
+
+# Name fragments of files that are still being written
+WATCH_IGNORE_SUFFIXES = [".tmp", ".part", ".crdownload", ".swp"]
+
 # ============================================
 # PATHS CONFIGURATION / تكوين المسارات
 # ============================================
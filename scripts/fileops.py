@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File Operations for Virtual Try-On AI
+عمليات الملفات لتطبيق الملابس الافتراضية
+
+Places an input image into a batch output directory without decoding or
+re-encoding it. Supported modes:
+    hardlink  - os.link, no data copied (same filesystem only)
+    reflink   - copy-on-write clone via the FICLONE ioctl (btrfs, xfs, ...)
+    copy      - byte copy (shutil, uses sendfile/copy_file_range)
+    reference - no copy, a small JSON file pointing at the source
+    auto      - reflink, then hardlink, then copy
+
+Also repairs append-only JSON Lines files (journal, shard manifest) after
+a crash, before they are appended to again.
+"""
+
+import json
+import os
+import shutil
+import sys
+from pathlib import Path
+from typing import Optional, Tuple
+
+INPUT_MODES = ("auto", "hardlink", "reflink", "copy", "reference")
+INPUT_STEM = "input"
+REFERENCE_NAME = "input.ref.json"
+
+# _IOW(0x94, 9, int) from <linux/fs.h>
+_FICLONE = 0x40049409
+
+def reflink(src: Path, dst: Path) -> None:
+    """استنساخ عند الكتابة / Copy-on-write clone; raises OSError if unsupported"""
+    if not sys.platform.startswith("linux"):
+        raise OSError("reflink is only supported on Linux")
+
+    import fcntl
+
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+        except OSError:
+            fdst.close()
+            os.unlink(dst)
+            raise
+
+def _write_reference(src: Path, dest_dir: Path) -> Path:
+    """ملف مرجعي / Record the source path instead of copying"""
+    st = src.stat()
+    ref_path = dest_dir / REFERENCE_NAME
+    with open(ref_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "source": str(src.absolute()),
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+        }, f, indent=2)
+    return ref_path
+
+def place_input(src, dest_dir, mode: str = "auto") -> Tuple[Path, str]:
+    """
+    وضع ملف الإدخال / Put the original input file into dest_dir
+
+    The file keeps its original extension (input.png stays a PNG).
+
+    Args:
+        src: Source image path
+        dest_dir: Per-image output directory
+        mode: One of INPUT_MODES
+
+    Returns:
+        (path written, mode actually used)
+    """
+    if mode not in INPUT_MODES:
+        raise ValueError(f"Unknown input mode: {mode} (expected one of {INPUT_MODES})")
+
+    src = Path(src)
+    dest_dir = Path(dest_dir)
+
+    if mode == "reference":
+        return _write_reference(src, dest_dir), mode
+
+    dst = dest_dir / (INPUT_STEM + src.suffix.lower())
+    if dst.exists() or dst.is_symlink():
+        dst.unlink()
+
+    attempts = ("reflink", "hardlink", "copy") if mode == "auto" else (mode,)
+    for i, attempt in enumerate(attempts):
+        try:
+            if attempt == "reflink":
+                reflink(src, dst)
+            elif attempt == "hardlink":
+                os.link(src, dst)
+            else:
+                shutil.copyfile(src, dst)
+            return dst, attempt
+        except OSError:
+            if i == len(attempts) - 1:
+                raise
+
+def resolve_input(dest_dir) -> Optional[Path]:
+    """
+    إيجاد ملف الإدخال / Path of the input image placed in dest_dir
+    Follows a reference file to the source. Returns None if there is none
+    or the referenced source has changed since it was recorded.
+    """
+    dest_dir = Path(dest_dir)
+
+    ref_path = dest_dir / REFERENCE_NAME
+    if ref_path.exists():
+        try:
+            with open(ref_path, "r", encoding="utf-8") as f:
+                ref = json.load(f)
+            source = Path(ref["source"])
+            st = source.stat()
+        except (OSError, ValueError, KeyError):
+            return None
+        if (st.st_size, st.st_mtime_ns) != (ref.get("size"), ref.get("mtime_ns")):
+            return None
+        return source
+
+    for candidate in sorted(dest_dir.glob(INPUT_STEM + ".*")):
+        if candidate.name != REFERENCE_NAME:
+            return candidate
+    return None
+
+def truncate_partial_line(path, chunk_size: int = 1 << 16) -> int:
+    """
+    إصلاح السطر المقطوع / Cut a JSON Lines file back to its last newline
+    A crash can leave a last line without its newline; appending to it
+    would glue the next entry onto the fragment. Returns the bytes removed.
+    """
+    try:
+        f = open(path, "rb+")
+    except FileNotFoundError:
+        return 0
+    with f:
+        size = f.seek(0, os.SEEK_END)
+        end = size
+        while end > 0:
+            start = max(0, end - chunk_size)
+            f.seek(start)
+            newline = f.read(end - start).rfind(b"\n")
+            if newline >= 0:
+                end = start + newline + 1
+                break
+            end = start
+        if end < size:
+            f.truncate(end)
+        return size - end
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Image Loading for Virtual Try-On AI
+تحميل الصور لتطبيق الملابس الافتراضية
+
+Reads image dimensions and the EXIF orientation from the file header
+without decoding any pixels; a probe costs a few hundred bytes of I/O
+instead of a full decode. JPEG segments are skipped with seeks (only the
+first IFD of the EXIF block is read, never its thumbnail); PNG, BMP,
+TIFF and WebP keep their size at a fixed place near the start.
+
+decode_image() decodes a file, in-memory bytes or a binary file object.
+With max_side, a JPEG larger than the working resolution is decoded at
+1/2, 1/4 or 1/8 scale directly from the DCT coefficients
+(cv2.IMREAD_REDUCED_*), keeping the long side at least max_side: a 12 MP
+phone photo decodes about twice as fast into 1/4 to 1/64 of the memory.
+The EXIF orientation is applied from the probed header, the same way for
+every source.
+
+    probe("input/test.jpg")                 # ImageInfo or None
+    decode_image("input/test.jpg", max_side=1024)
+    decode_image(request.body)              # bytes from a service request
+"""
+
+import struct
+from io import BytesIO
+from pathlib import Path
+from typing import BinaryIO, NamedTuple, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+Source = Union[str, Path, bytes, bytearray, memoryview, BinaryIO]
+
+# JPEG start-of-frame markers (all except DHT, JPG and DAC)
+_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+# Markers without a length field
+_STANDALONE_MARKERS = frozenset(range(0xD0, 0xDA)) | {0x01}
+
+# TIFF / EXIF tags
+_TAG_WIDTH = 256
+_TAG_HEIGHT = 257
+_TAG_ORIENTATION = 274
+
+# DCT-domain reduction factors and their decode flags
+_REDUCED_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+class ImageInfo(NamedTuple):
+    """معلومات الصورة / What the header says about an image"""
+    format: str       # "jpeg", "png", "bmp", "tiff" or "webp"
+    width: int        # As stored, before orientation
+    height: int
+    orientation: int  # EXIF orientation, 1 (upright) to 8
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        """(width, height) once the orientation is applied"""
+        if self.orientation >= 5:
+            return self.height, self.width
+        return self.width, self.height
+
+def _tiff_tags(f: BinaryIO, base: int, wanted) -> dict:
+    """وسوم TIFF / SHORT or LONG values of wanted tags in the first IFD at base"""
+    f.seek(base)
+    order = {b"II": "<", b"MM": ">"}.get(f.read(2))
+    if order is None:
+        return {}
+    f.seek(base + 4)
+    f.seek(base + struct.unpack(order + "I", f.read(4))[0])
+    count = struct.unpack(order + "H", f.read(2))[0]
+    values = {}
+    for _ in range(count):
+        entry = f.read(12)
+        if len(entry) < 12:
+            break
+        tag, kind = struct.unpack(order + "HH", entry[:4])
+        if tag in wanted:
+            # SHORT or LONG, stored left-aligned in the value field
+            fmt = order + ("H" if kind == 3 else "I")
+            values[tag] = struct.unpack(fmt, entry[8:8 + struct.calcsize(fmt)])[0]
+            if len(values) == len(wanted):
+                break
+    return values
+
+def _jpeg_info(f: BinaryIO) -> Optional[ImageInfo]:
+    """معلومات JPEG / Walk the marker segments up to the first SOF"""
+    orientation = 1
+    f.seek(2)
+    while True:
+        byte = f.read(1)
+        while byte and byte != b"\xff":  # Garbage between segments
+            byte = f.read(1)
+        while byte == b"\xff":           # Fill bytes
+            byte = f.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker in _STANDALONE_MARKERS:
+            continue
+        if marker == 0xD9:               # EOI before any frame
+            return None
+        header = f.read(2)
+        if len(header) < 2:
+            return None
+        length = struct.unpack(">H", header)[0]
+        start = f.tell()
+        if marker in _SOF_MARKERS:
+            frame = f.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack(">xHH", frame)
+            return ImageInfo("jpeg", width, height, orientation)
+        if marker == 0xE1 and f.read(6) == b"Exif\x00\x00":
+            tags = _tiff_tags(f, start + 6, {_TAG_ORIENTATION})
+            orientation = tags.get(_TAG_ORIENTATION, 1)
+        f.seek(start + length - 2)
+
+def _read_info(f: BinaryIO) -> Optional[ImageInfo]:
+    head = f.read(32)
+    if head[:2] == b"\xff\xd8":
+        return _jpeg_info(f)
+    if head[:8] == b"\x89PNG\r\n\x1a\n" and head[12:16] == b"IHDR":
+        return ImageInfo("png", *struct.unpack(">II", head[16:24]), 1)
+    if head[:2] == b"BM" and len(head) >= 26:
+        width, height = struct.unpack("<ii", head[18:26])
+        return ImageInfo("bmp", width, abs(height), 1)  # Negative height: top-down rows
+    if head[:4] in (b"II*\x00", b"MM\x00*"):
+        tags = _tiff_tags(f, 0, {_TAG_WIDTH, _TAG_HEIGHT, _TAG_ORIENTATION})
+        if _TAG_WIDTH not in tags or _TAG_HEIGHT not in tags:
+            return None
+        return ImageInfo("tiff", tags[_TAG_WIDTH], tags[_TAG_HEIGHT],
+                         tags.get(_TAG_ORIENTATION, 1))
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP" and len(head) >= 30:
+        chunk = head[12:16]
+        if chunk == b"VP8 ":
+            width, height = struct.unpack("<HH", head[26:30])
+            return ImageInfo("webp", width & 0x3FFF, height & 0x3FFF, 1)
+        if chunk == b"VP8L":
+            bits = struct.unpack("<I", head[21:25])[0]
+            return ImageInfo("webp", (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1, 1)
+        if chunk == b"VP8X":
+            return ImageInfo("webp", int.from_bytes(head[24:27], "little") + 1,
+                             int.from_bytes(head[27:30], "little") + 1, 1)
+    return None
+
+def _as_buffer(source: Source):
+    """بايتات في الذاكرة / bytes-like sources as a buffer, else None"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return source
+    return None
+
+def probe(source: Source) -> Optional[ImageInfo]:
+    """
+    قراءة الرأس / Format, size and orientation from the image header
+
+    Args:
+        source: Path, bytes, or a seekable binary file object
+                (its position is restored)
+
+    Returns:
+        ImageInfo, or None for unknown formats and truncated headers
+    """
+    try:
+        buffer = _as_buffer(source)
+        if buffer is not None:
+            return _read_info(BytesIO(buffer))
+        if hasattr(source, "read"):
+            position = source.tell()
+            try:
+                return _read_info(source)
+            finally:
+                source.seek(position)
+        with open(source, "rb") as f:
+            return _read_info(f)
+    except (OSError, struct.error):
+        return None
+
+def probe_size(source: Source) -> Optional[Tuple[int, int]]:
+    """قراءة الأبعاد / (width, height) as displayed, or None (see probe)"""
+    info = probe(source)
+    return None if info is None else info.size
+
+def reduction_factor(size: Tuple[int, int], max_side: Optional[int]) -> int:
+    """
+    معامل التصغير / Largest DCT reduction (1, 2, 4 or 8) that keeps the
+    long side at least max_side
+    """
+    if not max_side:
+        return 1
+    long_side = max(size)
+    factor = 1
+    while factor < 8 and long_side // (factor * 2) >= max_side:
+        factor *= 2
+    return factor
+
+def oriented_shape(shape: Tuple[int, ...], orientation: int) -> Tuple[int, ...]:
+    """شكل بعد التدوير / Array shape once the orientation is applied"""
+    if orientation >= 5:
+        return (shape[1], shape[0]) + tuple(shape[2:])
+    return tuple(shape)
+
+def apply_orientation(image: np.ndarray, orientation: int,
+                      dst: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    تدوير / Turn a decoded image upright from its EXIF orientation
+    With dst (shaped oriented_shape(image.shape)), the result is written
+    there; an upright image is returned as is, without a copy.
+    """
+    if orientation == 2:
+        return cv2.flip(image, 1, dst=dst)
+    if orientation == 3:
+        return cv2.rotate(image, cv2.ROTATE_180, dst=dst)
+    if orientation == 4:
+        return cv2.flip(image, 0, dst=dst)
+    if orientation == 5:
+        return cv2.transpose(image, dst=dst)
+    if orientation == 6:
+        return cv2.rotate(image, cv2.ROTATE_90_CLOCKWISE, dst=dst)
+    if orientation == 7:
+        image = cv2.transpose(image, dst=dst)
+        return cv2.flip(image, -1, dst=image)
+    if orientation == 8:
+        return cv2.rotate(image, cv2.ROTATE_90_COUNTERCLOCKWISE, dst=dst)
+    return image
+
+def decode_image(source: Source, max_side: Optional[int] = None,
+                 orient: bool = True) -> Optional[np.ndarray]:
+    """
+    تحميل الصورة / Decode an upright BGR image
+
+    Args:
+        source: Path, bytes, or a binary file object
+        max_side: Working resolution (long side). JPEGs at least twice as
+                  large are decoded at a reduced scale; the result is never
+                  smaller than max_side, so callers still resize to the
+                  exact size they need.
+        orient: Apply the EXIF orientation; callers that resize first can
+                pass False and orient the smaller image (see probe)
+
+    Returns:
+        (H, W, 3) uint8 image, or None if it cannot be decoded
+    """
+    info = probe(source)
+    factor = 1
+    if info is not None and info.format == "jpeg":
+        factor = reduction_factor((info.width, info.height), max_side)
+    flags = _REDUCED_FLAGS[factor] | cv2.IMREAD_IGNORE_ORIENTATION
+
+    buffer = _as_buffer(source)
+    if buffer is None and hasattr(source, "read"):
+        buffer = source.read()
+    if buffer is not None:
+        image = cv2.imdecode(np.frombuffer(buffer, dtype=np.uint8), flags)
+    else:
+        image = cv2.imread(str(source), flags)
+
+    if image is None or info is None or not orient:
+        return image
+    return apply_orientation(image, info.orientation)
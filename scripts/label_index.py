@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Label Map Index for Virtual Try-On AI
+فهرس خرائط التسميات لتطبيق الملابس الافتراضية
+
+A small JSON sidecar written next to every saved label map
+(test_labels.npy -> test_labels.index.json) holding per-class pixel count,
+percentage, bounding box and centroid. Tools read the index instead of
+loading and rescanning the full array.
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+from .classes import class_name
+from .mask_analytics import label_stats
+
+INDEX_SUFFIX = ".index.json"
+INDEX_VERSION = 1
+
+# Pixels per np.bincount call when histogramming memory-mapped label maps
+HISTOGRAM_CHUNK_PIXELS = 1 << 24
+
+def index_path_for(labels_path) -> Path:
+    """مسار الفهرس / Sidecar path for a label file"""
+    labels_path = Path(labels_path)
+    return labels_path.with_name(labels_path.stem + INDEX_SUFFIX)
+
+def build_label_index(labels: np.ndarray) -> Dict:
+    """
+    بناء الفهرس / Build the per-class index for a label map
+    Only classes present in the map are listed.
+    """
+    stats = label_stats(labels)
+    h, w = labels.shape
+
+    classes = {}
+    for class_id in np.flatnonzero(stats["area"]):
+        cx, cy = stats["centroid"][class_id]
+        classes[str(int(class_id))] = {
+            "name": class_name(class_id),
+            "pixels": int(stats["area"][class_id]),
+            "percentage": round(float(stats["percentage"][class_id]), 4),
+            "bbox": [int(v) for v in stats["bbox"][class_id]],
+            "centroid": [round(float(cx), 2), round(float(cy), 2)],
+        }
+
+    return {
+        "version": INDEX_VERSION,
+        "shape": [int(h), int(w)],
+        "dtype": str(labels.dtype),
+        "total_pixels": int(h * w),
+        "classes": classes,
+    }
+
+def save_label_index(labels_path, labels: np.ndarray, index: Optional[Dict] = None) -> Path:
+    """
+    حفظ الفهرس / Write the sidecar for an already-saved label file
+    The label file's mtime is recorded so stale indexes can be detected.
+    """
+    labels_path = Path(labels_path)
+    index = dict(index or build_label_index(labels))
+    index["labels_file"] = labels_path.name
+    index["labels_mtime_ns"] = labels_path.stat().st_mtime_ns
+
+    path = index_path_for(labels_path)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+    return path
+
+def load_label_index(labels_path) -> Optional[Dict]:
+    """
+    تحميل الفهرس / Load the sidecar for a label file
+    Returns None if it is missing, unreadable or older than the labels.
+    """
+    labels_path = Path(labels_path)
+    path = index_path_for(labels_path)
+    if not path.exists():
+        return None
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if labels_path.exists() and index.get("labels_mtime_ns") != labels_path.stat().st_mtime_ns:
+        return None
+
+    return index
+
+def open_labels(labels_path) -> np.ndarray:
+    """فتح التسميات / Memory-map a saved label map (nothing is read yet)"""
+    return np.load(str(labels_path), mmap_mode="r")
+
+def label_histogram(labels: np.ndarray, minlength: int = 0) -> np.ndarray:
+    """
+    مدرج الفئات / Pixel count per class id with np.bincount
+    Large (memory-mapped) maps are counted in row chunks so only one
+    chunk is paged in and widened at a time.
+    """
+    if labels.ndim != 2:
+        raise ValueError(f"Expected a (H, W) label map, got shape {labels.shape}")
+
+    rows = max(1, HISTOGRAM_CHUNK_PIXELS // max(labels.shape[1], 1))
+    counts = np.zeros(minlength, dtype=np.int64)
+    for start in range(0, labels.shape[0], rows):
+        chunk = np.bincount(np.asarray(labels[start:start + rows]).ravel(), minlength=minlength)
+        if chunk.size > counts.size:
+            chunk[:counts.size] += counts
+            counts = chunk
+        else:
+            counts[:chunk.size] += chunk
+    return counts
+
+def histogram_index(labels: np.ndarray) -> Dict:
+    """
+    فهرس مختصر / Index with pixel counts and percentages only
+    Cheaper than build_label_index (no bounding boxes or centroids).
+    """
+    counts = label_histogram(labels)
+    h, w = labels.shape
+    total = int(h * w)
+    return {
+        "version": INDEX_VERSION,
+        "shape": [int(h), int(w)],
+        "dtype": str(labels.dtype),
+        "total_pixels": total,
+        "classes": {
+            str(int(class_id)): {
+                "name": class_name(class_id),
+                "pixels": int(counts[class_id]),
+                "percentage": round(counts[class_id] * 100.0 / max(total, 1), 4),
+            }
+            for class_id in np.flatnonzero(counts)
+        },
+    }
+
+def class_coverage(index: Dict) -> Dict[str, float]:
+    """تغطية الفئات / Class name -> percentage of the image"""
+    return {entry["name"]: entry["percentage"] for entry in index["classes"].values()}
+
+def class_pixels(index: Dict) -> Dict[str, int]:
+    """بكسلات الفئات / Class id -> pixel count"""
+    return {class_id: entry["pixels"] for class_id, entry in index["classes"].items()}
+
+class ClassAggregate:
+    """تجميع تدريجي / Incremental dataset-level class totals"""
+
+    def __init__(self):
+        self.images = 0
+        self.total_pixels = 0
+        self.pixels: Dict[str, int] = {}
+        self.image_counts: Dict[str, int] = {}
+
+    def add(self, total_pixels: int, pixels: Dict[str, int]):
+        """إضافة صورة / Add one image's class pixel counts"""
+        self.images += 1
+        self.total_pixels += total_pixels
+        for class_id, count in pixels.items():
+            self.pixels[class_id] = self.pixels.get(class_id, 0) + count
+            self.image_counts[class_id] = self.image_counts.get(class_id, 0) + 1
+
+    def to_dict(self) -> Dict:
+        """
+        تحويل إلى قاموس / Image count, total pixels and per-class pixels,
+        images containing the class and percentage of all pixels
+        """
+        classes = {}
+        for class_id in sorted(self.pixels, key=int):
+            classes[class_id] = {
+                "name": class_name(class_id),
+                "pixels": self.pixels[class_id],
+                "images": self.image_counts[class_id],
+                "percentage": round(self.pixels[class_id] * 100.0 / max(self.total_pixels, 1), 4),
+            }
+        return {
+            "images": self.images,
+            "total_pixels": self.total_pixels,
+            "classes": classes,
+        }
+
+def aggregate_label_indexes(indexes: Iterable[Dict]) -> Dict:
+    """تجميع الفهارس / Dataset-level class totals from many indexes"""
+    aggregate = ClassAggregate()
+    for index in indexes:
+        aggregate.add(index["total_pixels"], class_pixels(index))
+    return aggregate.to_dict()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mask Analytics for Virtual Try-On AI
+تحليلات الأقنعة لتطبيق الملابس الافتراضية
+
+Area, centroid, bounding box and raw/central moments computed from
+row/column projections. label_stats() handles every class of a label map
+at once with np.bincount, one block of rows at a time; mask_stats()
+handles a stack of binary masks.
+Results are returned as dicts of NumPy arrays indexed by class or mask.
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+
+from .classes import NUM_CLASSES
+
+# Pixels per row block in label_stats (bounds its int64 temporaries)
+_BLOCK_PIXELS = 1 << 18
+
+def _bbox_from_projections(rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    """
+    صندوق محيط من الإسقاطات / Bounding boxes from (N, H) and (N, W) projections
+    Returns (N, 4) int array of x_min, y_min, x_max, y_max (max exclusive),
+    all zeros where a projection is empty.
+    """
+    h, w = rows.shape[1], cols.shape[1]
+    bbox = np.zeros((rows.shape[0], 4), dtype=np.int64)
+    if h == 0 or w == 0:
+        return bbox  # Empty image: nothing is present
+
+    rows_any = rows > 0
+    cols_any = cols > 0
+    present = cols_any.any(axis=1)
+    bbox[:, 0] = np.argmax(cols_any, axis=1)
+    bbox[:, 1] = np.argmax(rows_any, axis=1)
+    bbox[:, 2] = w - np.argmax(cols_any[:, ::-1], axis=1)
+    bbox[:, 3] = h - np.argmax(rows_any[:, ::-1], axis=1)
+    bbox[~present] = 0
+    return bbox
+
+def _moments_from_projections(rows: np.ndarray, cols: np.ndarray, m11: np.ndarray) -> Dict[str, np.ndarray]:
+    """العزوم من الإسقاطات / Area, centroid and moments from projections"""
+    h, w = rows.shape[1], cols.shape[1]
+    ys = np.arange(h, dtype=np.float64)
+    xs = np.arange(w, dtype=np.float64)
+
+    rows = rows.astype(np.float64, copy=False)
+    cols = cols.astype(np.float64, copy=False)
+
+    m00 = cols.sum(axis=1)
+    m10 = cols @ xs
+    m01 = rows @ ys
+    m20 = cols @ (xs * xs)
+    m02 = rows @ (ys * ys)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        safe = np.where(m00 > 0, m00, 1.0)
+        cx = np.where(m00 > 0, m10 / safe, np.nan)
+        cy = np.where(m00 > 0, m01 / safe, np.nan)
+        mu20 = np.where(m00 > 0, m20 / safe - cx * cx, 0.0)
+        mu02 = np.where(m00 > 0, m02 / safe - cy * cy, 0.0)
+        mu11 = np.where(m00 > 0, m11 / safe - cx * cy, 0.0)
+
+    return {
+        "area": m00.astype(np.int64),
+        "centroid": np.stack([cx, cy], axis=1),
+        "moments": np.stack([m00, m10, m01, m20, m11, m02], axis=1),
+        "central_moments": np.stack([mu20, mu11, mu02], axis=1),
+    }
+
+def label_stats(labels: np.ndarray, num_classes: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    إحصائيات جميع الفئات / Per-class statistics for a label map
+
+    Args:
+        labels: (H, W) integer label map with non-negative class ids
+        num_classes: Number of classes (default: classes.NUM_CLASSES or
+                     max label + 1, whichever is larger)
+
+    Returns:
+        Dict of arrays indexed by class id:
+            area (C,), percentage (C,), centroid (C, 2) as x, y (NaN if absent),
+            bbox (C, 4) as x_min, y_min, x_max, y_max (max exclusive),
+            moments (C, 6) as m00, m10, m01, m20, m11, m02,
+            central_moments (C, 3) as mu20, mu11, mu02 normalized by area
+    """
+    h, w = labels.shape
+    max_label = int(labels.max()) if labels.size else 0
+    if num_classes is None:
+        num_classes = max(NUM_CLASSES, max_label + 1)
+    elif max_label >= num_classes:
+        raise ValueError(f"Label {max_label} out of range for {num_classes} classes")
+
+    cols = np.zeros((num_classes, w), dtype=np.int64)
+    rows = np.zeros((num_classes, h), dtype=np.int64)
+    m11 = np.zeros(num_classes, dtype=np.float64)
+    xs = np.arange(w, dtype=np.int64)
+
+    # Class-by-column and class-by-row histograms: projections for every
+    # class, accumulated over blocks of rows so the int64 temporaries stay
+    # at _BLOCK_PIXELS whatever the image size
+    step = max(1, _BLOCK_PIXELS // max(w, 1))
+    for y0 in range(0, h, step):
+        lab = labels[y0:y0 + step].astype(np.int64)
+        bh = lab.shape[0]
+        cols += np.bincount((lab * w + xs).ravel(), minlength=num_classes * w).reshape(num_classes, w)
+        row_keys = (lab * bh + np.arange(bh, dtype=np.int64)[:, None]).ravel()
+        rows[:, y0:y0 + bh] = np.bincount(row_keys, minlength=num_classes * bh).reshape(num_classes, bh)
+        # Per class and row, the sum of x; weighted by y it gives m11
+        x_sums = np.bincount(row_keys, weights=np.broadcast_to(xs, lab.shape).ravel(),
+                             minlength=num_classes * bh).reshape(num_classes, bh)
+        m11 += x_sums @ np.arange(y0, y0 + bh, dtype=np.float64)
+
+    stats = _moments_from_projections(rows, cols, m11)
+    stats["bbox"] = _bbox_from_projections(rows, cols)
+    stats["percentage"] = stats["area"] * (100.0 / max(h * w, 1))
+    return stats
+
+def mask_stats(masks: np.ndarray, threshold: int = 0) -> Dict[str, np.ndarray]:
+    """
+    إحصائيات دفعة أقنعة / Statistics for one mask or a stack of masks
+
+    Args:
+        masks: (H, W) or (N, H, W) masks; pixels > threshold are foreground
+        threshold: Foreground threshold
+
+    Returns:
+        Same keys as label_stats, with a leading N axis (N = 1 for one mask)
+    """
+    if masks.ndim == 2:
+        masks = masks[None]
+
+    h, w = masks.shape[1:]
+    fg = masks > threshold
+
+    rows = np.count_nonzero(fg, axis=2)
+    cols = np.count_nonzero(fg, axis=1)
+    m11 = np.einsum("nhw,h,w->n", fg, np.arange(h, dtype=np.float64), np.arange(w, dtype=np.float64))
+
+    stats = _moments_from_projections(rows, cols, m11)
+    stats["bbox"] = _bbox_from_projections(rows, cols)
+    stats["percentage"] = stats["area"] * (100.0 / max(h * w, 1))
+    return stats
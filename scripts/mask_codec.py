@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mask Encoding for Virtual Try-On AI
+ترميز الأقنعة لتطبيق الملابس الافتراضية
+
+Compact storage for the binary body/cloth/skin/background masks:
+
+    png8   - one 8-bit PNG per mask (original format, every mask stored)
+    png1   - one 1-bit PNG per mask (IMWRITE_PNG_BILEVEL), still viewable
+    rle    - COCO-style run-length encoding, all masks in masks.rle.json
+    packed - all masks bit-packed and deflated into one masks.packed file
+
+Except for png8, masks that can be derived from others (background is the
+inverse of body) are not stored and are computed on read. Decoded masks
+are uint8 0/255 arrays, as produced by create_masks_from_labels.
+"""
+
+import json
+import struct
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import cv2
+import numpy as np
+
+ENCODINGS = ("png8", "png1", "rle", "packed")
+
+# Derived mask -> mask it is the inverse of
+DERIVED_MASKS = {"background": "body"}
+
+PNG_SUFFIX = "_mask.png"
+RLE_NAME = "masks.rle.json"
+PACKED_NAME = "masks.packed"
+_PACKED_MAGIC = b"VTMASK1\0"
+_PACKED_HEADER = struct.Struct("<8sI")
+_PACKED_ZLIB_LEVEL = 1  # Bit planes of smooth masks deflate well even at level 1
+
+# ============================================
+# COCO RLE / ترميز طول التشغيل
+# ============================================
+
+def rle_counts(mask: np.ndarray) -> np.ndarray:
+    """
+    أطوال التشغيل / Column-major run lengths, starting with a zero run
+    (COCO convention: the first count may be 0 when the mask starts at 1)
+    """
+    flat = mask.ravel(order="F") > 0
+    changes = np.flatnonzero(flat[1:] != flat[:-1]) + 1
+    bounds = np.concatenate(([0], changes, [flat.size]))
+    counts = np.diff(bounds)
+    if flat.size and flat[0]:
+        counts = np.concatenate(([0], counts))
+    return counts
+
+def _compress_counts(counts: Iterable[int]) -> str:
+    """ضغط الأطوال / COCO compressed counts string (LEB128-like, ASCII)"""
+    counts = [int(c) for c in counts]
+    out = []
+    for i, value in enumerate(counts):
+        if i > 2:
+            value -= counts[i - 2]
+        more = True
+        while more:
+            chunk = value & 0x1F
+            value >>= 5
+            more = (value != -1) if chunk & 0x10 else (value != 0)
+            if more:
+                chunk |= 0x20
+            out.append(chr(chunk + 48))
+    return "".join(out)
+
+def _decompress_counts(text: str) -> np.ndarray:
+    """فك ضغط الأطوال / Inverse of _compress_counts"""
+    counts = []
+    p = 0
+    data = text.encode("ascii")
+    while p < len(data):
+        value = 0
+        k = 0
+        more = True
+        while more:
+            chunk = data[p] - 48
+            value |= (chunk & 0x1F) << (5 * k)
+            more = bool(chunk & 0x20)
+            p += 1
+            k += 1
+            if not more and chunk & 0x10:
+                value |= -1 << (5 * k)
+        if len(counts) > 2:
+            value += counts[-2]
+        counts.append(value)
+    return np.asarray(counts, dtype=np.int64)
+
+def rle_encode(mask: np.ndarray, compress: bool = True) -> Dict:
+    """ترميز RLE / Encode a binary mask as COCO RLE {"size", "counts"}"""
+    counts = rle_counts(mask)
+    h, w = mask.shape
+    return {
+        "size": [int(h), int(w)],
+        "counts": _compress_counts(counts) if compress else counts.tolist(),
+    }
+
+def rle_decode(rle: Dict) -> np.ndarray:
+    """
+    فك RLE / Decode COCO RLE to a uint8 0/255 mask
+    The result is a transposed view of the column-major decode buffer.
+    """
+    h, w = rle["size"]
+    counts = rle["counts"]
+    counts = _decompress_counts(counts) if isinstance(counts, str) else np.asarray(counts)
+    values = np.zeros(len(counts), dtype=np.uint8)
+    values[1::2] = 255
+    return np.repeat(values, counts).reshape(w, h).T
+
+# ============================================
+# BIT PACKING / الضغط البتّي
+# ============================================
+
+def pack_masks(masks: Dict[str, np.ndarray]) -> bytes:
+    """
+    ضغط الأقنعة / Pack masks of equal shape into one buffer
+    Layout: magic, header length, JSON header, then the (N, H, ceil(W/8))
+    packbits planes, deflated.
+    """
+    names = list(masks)
+    h, w = next(iter(masks.values())).shape
+    planes = np.stack([masks[name] > 0 for name in names])
+    header = json.dumps({
+        "names": names,
+        "shape": [int(h), int(w)],
+        "compression": "zlib",
+    }).encode("utf-8")
+    payload = zlib.compress(np.packbits(planes, axis=-1), _PACKED_ZLIB_LEVEL)
+    return _PACKED_HEADER.pack(_PACKED_MAGIC, len(header)) + header + payload
+
+def unpack_masks(data: bytes) -> Dict[str, np.ndarray]:
+    """
+    فك ضغط الأقنعة / Inverse of pack_masks
+    All masks are views into one (N, H, W) uint8 array.
+    """
+    magic, header_len = _PACKED_HEADER.unpack_from(data, 0)
+    if magic != _PACKED_MAGIC:
+        raise ValueError("Not a packed mask file")
+    start = _PACKED_HEADER.size
+    header = json.loads(bytes(data[start:start + header_len]).decode("utf-8"))
+    names = header["names"]
+    h, w = header["shape"]
+
+    payload = memoryview(data)[start + header_len:]
+    if header.get("compression") == "zlib":
+        payload = zlib.decompress(payload)
+    packed = np.frombuffer(payload, dtype=np.uint8)
+    packed = packed.reshape(len(names), h, (w + 7) // 8)
+    planes = np.unpackbits(packed, axis=-1, count=w)
+    planes *= 255
+    return {name: planes[i] for i, name in enumerate(names)}
+
+# ============================================
+# MASK SETS / مجموعات الأقنعة
+# ============================================
+
+def _stored_masks(masks: Dict[str, np.ndarray], encoding: str) -> Dict[str, np.ndarray]:
+    """الأقنعة المخزنة / Drop masks that can be derived on read"""
+    if encoding == "png8":
+        return masks
+    # Keys are checked before values are touched, so lazy mappings such as
+    # ParsingResult never build the masks that are dropped
+    return {
+        name: masks[name] for name in masks
+        if DERIVED_MASKS.get(name) not in masks
+    }
+
+def encode_masks(masks: Dict[str, np.ndarray], encoding: str) -> Dict[str, bytes]:
+    """
+    ترميز الأقنعة / Encode a mask set to files
+
+    Args:
+        masks: Mask name -> (H, W) binary mask
+        encoding: One of ENCODINGS
+
+    Returns:
+        File name -> bytes
+    """
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown mask encoding: {encoding} (expected one of {ENCODINGS})")
+
+    stored = _stored_masks(masks, encoding)
+
+    if encoding == "rle":
+        payload = {name: rle_encode(mask) for name, mask in stored.items()}
+        return {RLE_NAME: json.dumps(payload).encode("utf-8")}
+
+    if encoding == "packed":
+        return {PACKED_NAME: pack_masks(stored)}
+
+    params = [cv2.IMWRITE_PNG_BILEVEL, 1] if encoding == "png1" else []
+    files = {}
+    for name, mask in stored.items():
+        ok, buf = cv2.imencode(".png", mask, params)
+        if not ok:
+            raise RuntimeError(f"PNG encoding failed for {name} mask")
+        files[f"{name}{PNG_SUFFIX}"] = buf.tobytes()
+    return files
+
+def _add_derived(masks: Dict[str, np.ndarray], names: Optional[Iterable[str]]) -> Dict[str, np.ndarray]:
+    """إضافة المشتقة / Compute derived masks that were not stored"""
+    for name, source in DERIVED_MASKS.items():
+        if name not in masks and source in masks and (names is None or name in names):
+            masks[name] = 255 - masks[source]
+    if names is not None:
+        masks = {name: masks[name] for name in names if name in masks}
+    return masks
+
+def decode_masks(files: Dict[str, bytes], names: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+    """
+    فك ترميز الأقنعة / Decode a mask set from file name -> bytes
+    Accepts any encoding (also from a shard reader). Derived masks are
+    computed on read.
+    """
+    names = list(names) if names is not None else None
+    masks = {}
+
+    if PACKED_NAME in files:
+        masks.update(unpack_masks(files[PACKED_NAME]))
+    elif RLE_NAME in files:
+        payload = json.loads(files[RLE_NAME].decode("utf-8"))
+        for name, rle in payload.items():
+            if names is None or name in names or name in DERIVED_MASKS.values():
+                masks[name] = rle_decode(rle)
+    else:
+        for file_name, data in files.items():
+            if not file_name.endswith(PNG_SUFFIX):
+                continue
+            name = file_name[:-len(PNG_SUFFIX)]
+            if names is None or name in names or name in DERIVED_MASKS.values():
+                buf = np.frombuffer(data, dtype=np.uint8)
+                masks[name] = cv2.imdecode(buf, cv2.IMREAD_GRAYSCALE)
+
+    return _add_derived(masks, names)
+
+def save_masks(masks: Dict[str, np.ndarray], output_dir, encoding: str) -> List[Path]:
+    """حفظ الأقنعة / Encode and write a mask set; returns written paths"""
+    output_dir = Path(output_dir)
+    paths = []
+    for file_name, data in encode_masks(masks, encoding).items():
+        path = output_dir / file_name
+        path.write_bytes(data)
+        paths.append(path)
+    return paths
+
+def load_masks(output_dir, names: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+    """تحميل الأقنعة / Load a mask set from a directory, whatever its encoding"""
+    output_dir = Path(output_dir)
+    files = {}
+    for candidate in (PACKED_NAME, RLE_NAME):
+        path = output_dir / candidate
+        if path.exists():
+            files[candidate] = path.read_bytes()
+            break
+    else:
+        for path in output_dir.glob(f"*{PNG_SUFFIX}"):
+            files[path.name] = path.read_bytes()
+    return decode_masks(files, names)
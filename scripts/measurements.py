@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Body Measurements for Virtual Try-On AI
+قياسات الجسم لتطبيق الملابس الافتراضية
+
+Measurements are distances between landmark pairs, computed for every
+candidate pair at once from the (33, 4) landmark array. A pair is only
+used when both landmarks reach MIN_MEASUREMENT_CONFIDENCE. One-sided
+measurements list the mirrored pair as a fallback, so an occluded left
+leg is measured on the right. Each entry reports its confidence (the
+lower visibility of the two landmarks) and the landmarks it came from.
+
+validate_pose() is the cheap early check used to reject an image before
+the parsing stage runs.
+"""
+
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from .config import (
+    LANDMARK_INDICES,
+    MIN_MEASUREMENT_CONFIDENCE,
+    MIN_PERSON_HEIGHT,
+    MIN_VISIBLE_LANDMARKS,
+)
+
+# name -> (Arabic name, scale, landmark pairs in order of preference)
+MEASUREMENT_SPECS = {
+    "shoulder_width": ("عرض المنكبين", 1.0, [("left_shoulder", "right_shoulder")]),
+    "hip_width": ("عرض الورك", 1.0, [("left_hip", "right_hip")]),
+    "body_height": ("ارتفاع الجسم", 1.0, [
+        ("right_shoulder", "right_ankle"), ("left_shoulder", "left_ankle"),
+    ]),
+    # تقريب بسيط / Simple approximation from the shoulders
+    "chest_width": ("عرض الصدر", 0.95, [("left_shoulder", "right_shoulder")]),
+    "left_arm_length": ("طول الذراع اليسرى", 1.0, [
+        ("left_shoulder", "left_wrist"), ("right_shoulder", "right_wrist"),
+    ]),
+    "left_leg_length": ("طول الساق اليسرى", 1.0, [
+        ("left_hip", "left_ankle"), ("right_hip", "right_ankle"),
+    ]),
+}
+
+_NAMES = list(MEASUREMENT_SPECS)
+_SCALES = np.array([spec[1] for spec in MEASUREMENT_SPECS.values()], dtype=np.float64)
+
+# Flattened candidates, ordered by measurement and then by preference
+_CANDIDATES = [
+    (m, a, b)
+    for m, (_, _, pairs) in enumerate(MEASUREMENT_SPECS.values())
+    for a, b in pairs
+]
+_CAND_MEASUREMENT = np.array([m for m, _, _ in _CANDIDATES], dtype=np.intp)
+_CAND_A = np.array([LANDMARK_INDICES[a] for _, a, _ in _CANDIDATES], dtype=np.intp)
+_CAND_B = np.array([LANDMARK_INDICES[b] for _, _, b in _CANDIDATES], dtype=np.intp)
+
+def measure(landmarks: np.ndarray, image_shape: Tuple[int, ...],
+            min_confidence: float = MIN_MEASUREMENT_CONFIDENCE) -> Dict[str, Dict]:
+    """
+    قياس / Pixel measurements from (33, 4) normalized landmarks
+
+    Returns:
+        name -> {"value", "unit": "pixels", "ar_name", "confidence",
+        "landmarks": [a, b]}. Measurements without a usable pair are left out.
+    """
+    h, w = image_shape[:2]
+    points = landmarks[:, :2].astype(np.float64) * (w, h)
+    visibility = landmarks[:, 3]
+
+    confidence = np.minimum(visibility[_CAND_A], visibility[_CAND_B])
+    usable = np.flatnonzero(confidence >= min_confidence)
+
+    # First usable candidate per measurement (candidates are in preference order)
+    measured, first = np.unique(_CAND_MEASUREMENT[usable], return_index=True)
+    chosen = usable[first]
+    lengths = np.hypot(*(points[_CAND_A[chosen]] - points[_CAND_B[chosen]]).T) * _SCALES[measured]
+
+    measurements = {}
+    for m, c, length in zip(measured, chosen, lengths):
+        name = _NAMES[m]
+        _, a, b = _CANDIDATES[c]
+        measurements[name] = {
+            "value": float(length),
+            "unit": "pixels",
+            "ar_name": MEASUREMENT_SPECS[name][0],
+            "confidence": round(float(confidence[c]), 4),
+            "landmarks": [a, b],
+        }
+    return measurements
+
+def validate_pose(landmarks: np.ndarray, image_shape: Tuple[int, ...],
+                  min_visible: int = MIN_VISIBLE_LANDMARKS,
+                  min_height: float = MIN_PERSON_HEIGHT,
+                  min_confidence: float = MIN_MEASUREMENT_CONFIDENCE) -> Optional[str]:
+    """
+    تحقق من الوضعية / Reason to reject a pose, or None if it is usable
+
+    Rejects poses with fewer than min_visible landmarks at min_confidence,
+    or whose visible landmarks span less than min_height pixels vertically.
+    """
+    visible = landmarks[:, 3] >= min_confidence
+    if np.count_nonzero(visible) < min_visible:
+        return "too few visible landmarks"
+    ys = landmarks[visible, 1] * image_shape[0]
+    if ys.max() - ys.min() < min_height:
+        return "person too small"
+    return None
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Parsing Result for Virtual Try-On AI
+نتيجة التحليل لتطبيق الملابس الافتراضية
+
+ParsingResult holds only the uint8 label map and builds masks on demand
+with a 256-entry lookup table (one cv2.LUT pass per mask). Masks are
+memoized per instance, so a stage pays only for the masks it requests.
+It behaves as a read-only mapping of group name -> mask, which keeps it
+a drop-in replacement for the old dict of eagerly built masks.
+
+Usage:
+    result = ParsingResult(labels)
+    body = result["body"]                  # group from BODY_PARTS
+    hair = result.mask("Hair")             # single class by name
+    arms = result.mask([14, 15])           # custom class group
+    small = result.downsample(4)["cloth"]  # quarter-resolution mask
+    face = result.crop((x, y, w, h))       # view into the label map
+"""
+
+from collections.abc import Mapping
+from typing import Dict, Iterable, Optional, Sequence, Tuple, Union
+
+import cv2
+import numpy as np
+
+from .arena import thread_arena
+from .classes import GROUPS, class_id, lut_for
+
+Selector = Union[str, int, Iterable[int]]
+
+class ParsingResult(Mapping):
+    """
+    نتيجة التحليل / Label map with lazily built, memoized masks
+
+    Args:
+        labels: (H, W) label map; stored as uint8
+        groups: Group name -> class ids (default: classes.GROUPS, i.e. config.BODY_PARTS)
+    """
+
+    def __init__(self, labels: np.ndarray, groups: Optional[Dict[str, Sequence[int]]] = None):
+        if labels.ndim != 2:
+            raise ValueError(f"Expected a (H, W) label map, got shape {labels.shape}")
+        if labels.dtype != np.uint8:
+            if labels.size and (labels.min() < 0 or labels.max() > 255):
+                raise ValueError("Label ids must fit in uint8")
+            labels = labels.astype(np.uint8)
+
+        self.labels = labels
+        self.groups = {name: tuple(ids) for name, ids in (groups or GROUPS).items()}
+        self._cache: Dict[Tuple[int, ...], np.ndarray] = {}
+        self._scaled: Dict[Tuple[int, int], "ParsingResult"] = {}
+
+    # Mapping interface: group name -> mask
+    def __getitem__(self, name: str) -> np.ndarray:
+        if name not in self.groups:
+            raise KeyError(name)
+        return self.mask(name)
+
+    def __iter__(self):
+        return iter(self.groups)
+
+    def __len__(self) -> int:
+        return len(self.groups)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.labels.shape
+
+    def class_ids(self, selector: Selector) -> Tuple[int, ...]:
+        """
+        معرفات الفئات / Resolve a selector to sorted class ids
+        A selector is a group name, a class name, a class id or ids.
+        """
+        if isinstance(selector, str):
+            if selector in self.groups:
+                return tuple(sorted(set(self.groups[selector])))
+            found = class_id(selector)
+            if found is None:
+                raise KeyError(f"Unknown mask group or class: {selector}")
+            return (found,)
+        if isinstance(selector, (int, np.integer)):
+            return (int(selector),)
+        return tuple(sorted(set(int(i) for i in selector)))
+
+    def mask(self, selector: Selector) -> np.ndarray:
+        """
+        قناع عند الطلب / uint8 0/255 mask for a selector (memoized)
+        The returned array is shared between calls; copy before modifying.
+        """
+        ids = self.class_ids(selector)
+        mask = self._cache.get(ids)
+        if mask is None:
+            mask = cv2.LUT(self.labels, lut_for(ids), dst=thread_arena().take(self.labels.shape))
+            self._cache[ids] = mask
+        return mask
+
+    def masks(self, names: Optional[Iterable[Selector]] = None) -> Dict:
+        """أقنعة متعددة / Dict of selector -> mask (default: all groups)"""
+        names = list(self.groups) if names is None else list(names)
+        return {name: self.mask(name) for name in names}
+
+    def release(self):
+        """
+        إرجاع الأقنعة / Give the memoized masks back to the worker's arena
+        Masks obtained earlier must not be used afterwards.
+        """
+        thread_arena().give(*self._cache.values())
+        self._cache.clear()
+        for result in self._scaled.values():
+            result.release()
+        self._scaled.clear()
+
+    def present_classes(self) -> np.ndarray:
+        """الفئات الموجودة / Class ids that occur in the label map"""
+        return np.flatnonzero(np.bincount(self.labels.ravel(), minlength=256))
+
+    def downsample(self, factor: Union[int, float, None] = None,
+                   size: Optional[Tuple[int, int]] = None) -> "ParsingResult":
+        """
+        تصغير / Result over a nearest-neighbour resized label map
+        Give a factor (2 = half size) or an explicit (width, height).
+        Resized results are memoized too.
+        """
+        h, w = self.labels.shape
+        if size is None:
+            if not factor or factor <= 0:
+                raise ValueError("Give a positive factor or a size")
+            size = (max(1, int(round(w / factor))), max(1, int(round(h / factor))))
+        size = (int(size[0]), int(size[1]))
+        if size == (w, h):
+            return self
+
+        result = self._scaled.get(size)
+        if result is None:
+            labels = cv2.resize(self.labels, size, interpolation=cv2.INTER_NEAREST)
+            result = ParsingResult(labels, self.groups)
+            self._scaled[size] = result
+        return result
+
+    def crop(self, bbox: Tuple[int, int, int, int]) -> "ParsingResult":
+        """
+        قص / Result over an (x, y, width, height) region
+        The label map of the crop is a view; nothing is copied.
+        """
+        x, y, w, h = (int(v) for v in bbox)
+        H, W = self.labels.shape
+        x0, y0 = max(0, x), max(0, y)
+        x1, y1 = min(W, x + w), min(H, y + h)
+        if x1 <= x0 or y1 <= y0:
+            raise ValueError(f"Crop {bbox} is outside the {W}x{H} label map")
+        return ParsingResult(self.labels[y0:y1, x0:x1], self.groups)
+
+    def bbox(self, selector: Selector) -> Optional[Tuple[int, int, int, int]]:
+        """صندوق محيط / (x, y, width, height) of a mask, or None if empty"""
+        mask = self.mask(selector)
+        cols = np.flatnonzero(mask.any(axis=0))
+        if cols.size == 0:
+            return None
+        rows = np.flatnonzero(mask.any(axis=1))
+        return (int(cols[0]), int(rows[0]),
+                int(cols[-1] - cols[0] + 1), int(rows[-1] - rows[0] + 1))
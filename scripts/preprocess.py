@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Model Input Preprocessing for Virtual Try-On AI
+المعالجة المسبقة لمدخلات النموذج لتطبيق الملابس الافتراضية
+
+One stage from an image to the parsing model input. It combines
+orientation, resize to the working resolution, colour order and
+normalization to float32 CHW. Every step writes into buffers the
+Preprocessor keeps between images:
+
+    resize       cv2.resize(dst=resized)             INTER_AREA, uint8
+    orientation  cv2.rotate/flip/transpose(dst=...)  on the small image
+    per channel  cv2.extractChannel(dst=plane)       picks BGR or RGB order
+                 cv2.LUT(plane, table, dst=chw[c])   (v / 255 - mean) / std
+
+Normalization is a 256-entry float32 table per channel. The uint8 to
+float32 scaling and the mean/std are one lookup per pixel, with no float
+temporaries. Buffers are reallocated only when the input size changes,
+so a batch of same-size photos allocates once.
+
+    preprocessor = Preprocessor()
+    chw = preprocessor.load("input/test.jpg")  # (3, H, W) float32
+    chw = preprocessor(image)                  # decoded BGR image
+
+The returned array is the Preprocessor's own buffer and is overwritten by
+the next call (copy it to keep it). Use one Preprocessor per thread.
+"""
+
+from typing import Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from .config import (
+    PARSING_INPUT_MEAN,
+    PARSING_INPUT_RGB,
+    PARSING_INPUT_SIZE,
+    PARSING_INPUT_STD,
+)
+from .image_io import Source, apply_orientation, decode_image, oriented_shape, probe
+
+def normalization_tables(mean: Sequence[float], std: Sequence[float]) -> np.ndarray:
+    """جداول التطبيع / (3, 256) float32 tables v -> (v / 255 - mean) / std"""
+    values = np.arange(256, dtype=np.float64) / 255.0
+    tables = (values[None, :] - np.asarray(mean, dtype=np.float64)[:, None]) \
+        / np.asarray(std, dtype=np.float64)[:, None]
+    return tables.astype(np.float32)
+
+class Preprocessor:
+    """
+    معالج مسبق / Image -> normalized float32 CHW model input
+
+    Args:
+        max_side: Working resolution (long side); smaller images are not upscaled
+        mean, std: Per-channel statistics, in output channel order
+        rgb: Output channels in RGB order (default: BGR, as decoded)
+    """
+
+    def __init__(self, max_side: int = PARSING_INPUT_SIZE,
+                 mean: Sequence[float] = PARSING_INPUT_MEAN,
+                 std: Sequence[float] = PARSING_INPUT_STD,
+                 rgb: bool = PARSING_INPUT_RGB):
+        self.max_side = max_side
+        self.rgb = rgb
+        self.tables = normalization_tables(mean, std)
+        self._buffers = {}
+        self.allocations = 0
+        self.image = None  # Upright uint8 BGR image behind the last output
+
+    def _buffer(self, name: str, shape: Tuple[int, ...], dtype) -> np.ndarray:
+        """مخزن مؤقت / The named buffer, reallocated only when its shape changes"""
+        buffer = self._buffers.get(name)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = np.empty(shape, dtype=dtype)
+            self._buffers[name] = buffer
+            self.allocations += 1
+        return buffer
+
+    def working_size(self, shape: Tuple[int, ...]) -> Tuple[int, int]:
+        """حجم العمل / (width, height) an image of shape is resized to"""
+        h, w = shape[:2]
+        scale = min(1.0, self.max_side / max(h, w))
+        return max(1, round(w * scale)), max(1, round(h * scale))
+
+    def __call__(self, image: np.ndarray, orientation: int = 1) -> np.ndarray:
+        """
+        معالجة / Preprocess a decoded (H, W, 3) uint8 BGR image
+
+        Args:
+            orientation: EXIF orientation still to apply (1 if already upright)
+
+        Returns:
+            (3, h, w) float32 buffer, valid until the next call
+        """
+        size = self.working_size(image.shape)
+        if size != (image.shape[1], image.shape[0]):
+            resized = self._buffer("resized", (size[1], size[0], 3), np.uint8)
+            image = cv2.resize(image, size, dst=resized, interpolation=cv2.INTER_AREA)
+        if orientation != 1:
+            upright = self._buffer("upright", oriented_shape(image.shape, orientation), np.uint8)
+            image = apply_orientation(image, orientation, dst=upright)
+        self.image = image
+
+        h, w = image.shape[:2]
+        chw = self._buffer("chw", (3, h, w), np.float32)
+        plane = self._buffer("plane", (h, w), np.uint8)
+        order = (2, 1, 0) if self.rgb else (0, 1, 2)
+        for c, channel in enumerate(order):
+            cv2.extractChannel(image, channel, dst=plane)
+            cv2.LUT(plane, self.tables[c], dst=chw[c])
+        return chw
+
+    def load(self, source: Source) -> Optional[np.ndarray]:
+        """
+        تحميل ومعالجة / Decode a source (see image_io) and preprocess it
+        JPEGs are decoded at reduced scale near the working resolution, and
+        the orientation is applied after the resize, on the small image.
+        """
+        info = probe(source)
+        image = decode_image(source, self.max_side, orient=False)
+        if image is None:
+            return None
+        return self(image, info.orientation if info is not None else 1)
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pipeline Profiling for Virtual Try-On AI
+قياس أداء مراحل تطبيق الملابس الافتراضية
+
+Context-manager spans around pipeline stages, with byte counts and
+allocation deltas. Reports are written as JSON and as Chrome trace-event
+files (open in chrome://tracing or https://ui.perfetto.dev).
+
+When profiling is disabled, span() returns a shared no-op object so the
+instrumentation costs one attribute lookup and a function call.
+"""
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .config import PROFILING_ENABLED, PROFILE_ALLOCATIONS
+
+PROFILE_ENV_VAR = "VTON_PROFILE"
+
+class _NullSpan:
+    """نطاق فارغ / Span used when profiling is disabled"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+    def add_bytes(self, nbytes: int):
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+class Span:
+    """نطاق زمني / One timed pipeline span"""
+
+    def __init__(self, profiler: "Profiler", name: str, nbytes: Optional[int] = None, **meta):
+        self.profiler = profiler
+        self.name = name
+        self.nbytes = nbytes
+        self.meta = meta
+        self.start = 0.0
+        self.duration = 0.0
+        self.alloc_delta = None
+        self.thread_id = threading.get_ident()
+
+    def add_bytes(self, nbytes: int):
+        """إضافة عدد البايتات / Add to the span's byte count"""
+        self.nbytes = (self.nbytes or 0) + int(nbytes)
+
+    def __enter__(self):
+        if self.profiler.track_allocations:
+            self._mem_start = tracemalloc.get_traced_memory()[0]
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.start
+        if self.profiler.track_allocations:
+            self.alloc_delta = tracemalloc.get_traced_memory()[0] - self._mem_start
+        if exc_type is not None:
+            self.meta["error"] = exc_type.__name__
+        self.profiler._record(self)
+        return False
+
+    def to_dict(self) -> Dict:
+        """تحويل إلى قاموس / Convert to a JSON-serialisable dict"""
+        data = {
+            "name": self.name,
+            "start_ms": (self.start - self.profiler.origin) * 1000.0,
+            "duration_ms": self.duration * 1000.0,
+        }
+        if self.nbytes is not None:
+            data["bytes"] = self.nbytes
+        if self.alloc_delta is not None:
+            data["alloc_delta"] = self.alloc_delta
+        if self.meta:
+            data["meta"] = self.meta
+        return data
+
+class Profiler:
+    """
+    مسجل الأداء / Collects spans and writes profiling reports
+
+    Usage:
+        with profiler.span("decode") as sp:
+            image = cv2.imread(path)
+            sp.nbytes = image.nbytes
+    """
+
+    def __init__(self, enabled: bool = False, track_allocations: bool = PROFILE_ALLOCATIONS):
+        """تهيئة المسجل / Initialize profiler"""
+        self.enabled = False
+        self.track_allocations = False
+        self._started_tracemalloc = False  # Only stop tracing this profiler started
+        self.spans: List[Span] = []
+        self.origin = time.perf_counter()
+        self._lock = threading.Lock()
+        if enabled:
+            self.enable(track_allocations)
+
+    def enable(self, track_allocations: bool = PROFILE_ALLOCATIONS):
+        """تفعيل القياس / Turn profiling on"""
+        self.enabled = True
+        self.track_allocations = track_allocations
+        if track_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        return self
+
+    def disable(self):
+        """
+        إيقاف القياس / Turn profiling off
+        tracemalloc is stopped only if enable() started it, not when it was
+        already tracing (python -X tracemalloc, or the caller's own tracing).
+        """
+        self.enabled = False
+        if self._started_tracemalloc and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._started_tracemalloc = False
+        self.track_allocations = False
+        return self
+
+    def reset(self):
+        """مسح النطاقات / Drop all recorded spans"""
+        with self._lock:
+            self.spans = []
+        self.origin = time.perf_counter()
+        return self
+
+    def span(self, name: str, nbytes: Optional[int] = None, **meta):
+        """إنشاء نطاق / Create a timing span (no-op when disabled)"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, nbytes, **meta)
+
+    def _record(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def summary(self) -> Dict[str, Dict]:
+        """ملخص لكل مرحلة / Aggregate count, time and bytes per span name"""
+        stages = {}
+        for span in self.spans:
+            stage = stages.setdefault(span.name, {
+                "count": 0, "total_ms": 0.0, "max_ms": 0.0, "bytes": 0,
+            })
+            duration_ms = span.duration * 1000.0
+            stage["count"] += 1
+            stage["total_ms"] += duration_ms
+            stage["max_ms"] = max(stage["max_ms"], duration_ms)
+            stage["bytes"] += span.nbytes or 0
+            if span.alloc_delta is not None:
+                stage["alloc_delta"] = stage.get("alloc_delta", 0) + span.alloc_delta
+
+        for stage in stages.values():
+            stage["mean_ms"] = stage["total_ms"] / stage["count"]
+
+        return stages
+
+    def report(self) -> Dict:
+        """تقرير كامل / Full report with summary and raw spans"""
+        return {
+            "pid": os.getpid(),
+            "allocations_tracked": self.track_allocations,
+            "summary": self.summary(),
+            "spans": [span.to_dict() for span in self.spans],
+        }
+
+    def chrome_trace(self) -> Dict:
+        """تنسيق Chrome / Spans as Chrome trace-event complete events"""
+        pid = os.getpid()
+        events = []
+        for span in self.spans:
+            args = dict(span.meta)
+            if span.nbytes is not None:
+                args["bytes"] = span.nbytes
+            if span.alloc_delta is not None:
+                args["alloc_delta"] = span.alloc_delta
+            events.append({
+                "name": span.name,
+                "ph": "X",
+                "ts": (span.start - self.origin) * 1e6,
+                "dur": span.duration * 1e6,
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": args,
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_json(self, path) -> Path:
+        """حفظ التقرير JSON / Write the JSON report"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+        return path
+
+    def write_chrome_trace(self, path) -> Path:
+        """حفظ ملف التتبع / Write the Chrome trace-event file"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f)
+        return path
+
+    def write_reports(self, output_dir, prefix: str = "profile") -> List[Path]:
+        """حفظ جميع التقارير / Write <prefix>.json and <prefix>.trace.json"""
+        output_dir = Path(output_dir)
+        return [
+            self.write_json(output_dir / f"{prefix}.json"),
+            self.write_chrome_trace(output_dir / f"{prefix}.trace.json"),
+        ]
+
+def profiling_requested() -> bool:
+    """هل القياس مطلوب / True if enabled in config or via VTON_PROFILE"""
+    return PROFILING_ENABLED or os.environ.get(PROFILE_ENV_VAR, "") not in ("", "0")
+
+# Shared process-wide profiler
+profiler = Profiler(enabled=profiling_requested())
+
+def span(name: str, nbytes: Optional[int] = None, **meta):
+    """نطاق على المسجل العام / Span on the shared profiler"""
+    return profiler.span(name, nbytes, **meta)
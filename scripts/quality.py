@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Image Quality Gate for Virtual Try-On AI
+بوابة جودة الصور لتطبيق الملابس الافتراضية
+
+Cheap checks that reject an image before any model runs:
+
+    check_header(path)   - size from the file header, no decode
+                           (MIN_IMAGE_SIZE, MIN_IMAGE_AREA)
+    check_image(image)   - size, blur (variance of the Laplacian),
+                           exposure and contrast on a grayscale copy
+                           downscaled to QUALITY_ANALYSIS_SIZE; optionally
+                           the OpenCV HOG people detector
+
+Each check returns the reason for rejecting the image, or None
+(check_image together with the metrics, for the batch report).
+"""
+
+import threading
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .config import (
+    MAX_BRIGHTNESS,
+    MIN_BRIGHTNESS,
+    MIN_CONTRAST,
+    MIN_IMAGE_AREA,
+    MIN_IMAGE_SIZE,
+    MIN_SHARPNESS,
+    QUALITY_ANALYSIS_SIZE,
+    QUALITY_PERSON_CHECK,
+)
+from .image_io import Source, probe_size
+from .visuals import shrink_image
+
+# HOG detection window height; smaller people are not found
+_HOG_WINDOW_HEIGHT = 128
+
+# The HOG people detector is not part of every OpenCV build (OpenCV 5
+# moved it out of the main modules); without it the person check is skipped
+HOG_AVAILABLE = hasattr(cv2, "HOGDescriptor")
+
+_local = threading.local()
+
+def _people_detector():
+    """كاشف الأشخاص / Per-thread HOG people detector"""
+    hog = getattr(_local, "hog", None)
+    if hog is None:
+        hog = cv2.HOGDescriptor()
+        hog.setSVMDetector(cv2.HOGDescriptor_getDefaultPeopleDetector())
+        _local.hog = hog
+    return hog
+
+def check_dimensions(width: int, height: int) -> Optional[str]:
+    """فحص الأبعاد / Reject images below MIN_IMAGE_SIZE or MIN_IMAGE_AREA"""
+    if min(width, height) < MIN_IMAGE_SIZE or width * height < MIN_IMAGE_AREA:
+        return f"image too small ({width}x{height})"
+    return None
+
+def check_header(source: Source) -> Optional[str]:
+    """
+    فحص الرأس / Size check from the file header alone
+    Formats whose header cannot be read pass; decoding decides for them.
+    """
+    size = probe_size(source)
+    return None if size is None else check_dimensions(*size)
+
+def analysis_copy(image: np.ndarray, max_side: int = QUALITY_ANALYSIS_SIZE) -> np.ndarray:
+    """نسخة التحليل / Grayscale copy with the long side at most max_side"""
+    h, w = image.shape[:2]
+    scale = min(1.0, max_side / max(h, w))
+    small = shrink_image(image, (max(1, round(w * scale)), max(1, round(h * scale))))
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    return small
+
+def sharpness(gray: np.ndarray) -> float:
+    """الحدة / Variance of the Laplacian (low = blurry)"""
+    return float(cv2.Laplacian(gray, cv2.CV_32F).var())
+
+def person_present(gray: np.ndarray) -> bool:
+    """وجود شخص / True if the HOG people detector finds anyone"""
+    if gray.shape[0] < _HOG_WINDOW_HEIGHT or gray.shape[1] < _HOG_WINDOW_HEIGHT // 2:
+        return False
+    boxes, _ = _people_detector().detectMultiScale(gray, winStride=(8, 8), scale=1.1)
+    return len(boxes) > 0
+
+def assess(image: np.ndarray, person_check: bool = QUALITY_PERSON_CHECK,
+           size: Optional[Tuple[int, int]] = None) -> Dict:
+    """
+    تقييم / Quality metrics of a decoded image
+
+    Args:
+        size: Full (width, height) when the image was decoded at reduced scale
+
+    Returns:
+        {"width", "height", "sharpness", "brightness", "contrast"} and,
+        with person_check (if HOG_AVAILABLE), "person"
+    """
+    w, h = size if size is not None else (image.shape[1], image.shape[0])
+    gray = analysis_copy(image)
+    mean, std = cv2.meanStdDev(gray)
+    metrics = {
+        "width": w,
+        "height": h,
+        "sharpness": round(sharpness(gray), 2),
+        "brightness": round(float(mean[0, 0]), 2),
+        "contrast": round(float(std[0, 0]), 2),
+    }
+    if person_check and HOG_AVAILABLE:
+        metrics["person"] = person_present(gray)
+    return metrics
+
+def check_metrics(metrics: Dict) -> Optional[str]:
+    """فحص المقاييس / Reason to reject an image from its assess() metrics"""
+    reason = check_dimensions(metrics["width"], metrics["height"])
+    if reason is not None:
+        return reason
+    if metrics["brightness"] < MIN_BRIGHTNESS:
+        return "underexposed"
+    if metrics["brightness"] > MAX_BRIGHTNESS:
+        return "overexposed"
+    if metrics["contrast"] < MIN_CONTRAST:
+        return "low contrast"
+    if metrics["sharpness"] < MIN_SHARPNESS:
+        return "too blurry"
+    if metrics.get("person") is False:
+        return "no person detected"
+    return None
+
+def check_image(image: np.ndarray, person_check: bool = QUALITY_PERSON_CHECK,
+                size: Optional[Tuple[int, int]] = None) -> Tuple[Optional[str], Dict]:
+    """فحص الصورة / (reason or None, metrics) for a decoded image (see assess)"""
+    metrics = assess(image, person_check, size)
+    return check_metrics(metrics), metrics
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Batch Reporting for Virtual Try-On AI
+تقارير المعالجة الجماعية لتطبيق الملابس الافتراضية
+
+Running aggregates for batch runs. Per-image results are streamed to the
+batch journal (JSON Lines) as they finish; BatchStats only keeps counters,
+fixed-bucket latency histograms per stage, throughput per time interval
+and class pixel totals, so memory stays flat however large the batch is.
+Failures are counted by class (failure_class), never by their full
+message, which only goes to the journal.
+"""
+
+import bisect
+import math
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Sequence
+
+from .config import LATENCY_BUCKETS_MS, THROUGHPUT_INTERVAL_SECONDS
+from .label_index import ClassAggregate
+
+REJECTED_PREFIX = "rejected:"
+
+def failure_class(result: Dict) -> str:
+    """
+    فئة الفشل / Bounded key a failed result is counted under
+    "rejected: <reason>" without its details (sizes in parentheses), the
+    exception type for errors raised while processing, else the fixed
+    message of a known failure ("decode failed", "unreadable image").
+    """
+    error = result.get("error") or "unknown"
+    if error.startswith(REJECTED_PREFIX):
+        return error.split(" (", 1)[0]
+    return result.get("error_type") or error
+
+@contextmanager
+def timed(timings: Dict[str, float], name: str):
+    """توقيت مرحلة / Add the block's wall time in ms to timings[name]"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + (time.perf_counter() - start) * 1000.0
+
+class LatencyHistogram:
+    """مدرج زمني / Fixed-bucket latency histogram (milliseconds)"""
+
+    def __init__(self, bounds: Sequence[float] = LATENCY_BUCKETS_MS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, ms: float):
+        """تسجيل قيمة / Add one observation"""
+        self.counts[bisect.bisect_left(self.bounds, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.min = min(self.min, ms)
+        self.max = max(self.max, ms)
+
+    def percentile(self, q: float) -> float:
+        """
+        نسبة مئوية / Approximate q-th percentile (0-100)
+        Returns the upper bound of the bucket holding it, capped at max.
+        """
+        if not self.count:
+            return 0.0
+        rank = q / 100.0 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                bound = self.bounds[i] if i < len(self.bounds) else self.max
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> Dict:
+        """تحويل إلى قاموس / JSON-ready summary"""
+        labels = [f"<={b:g}" for b in self.bounds] + [f">{self.bounds[-1]:g}"]
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 3) if self.count else 0.0,
+            "min_ms": round(self.min, 3) if self.count else 0.0,
+            "max_ms": round(self.max, 3),
+            "p50_ms": round(self.percentile(50), 3),
+            "p90_ms": round(self.percentile(90), 3),
+            "p99_ms": round(self.percentile(99), 3),
+            "buckets": {label: n for label, n in zip(labels, self.counts) if n},
+        }
+
+class ThroughputTracker:
+    """معدل الإنجاز / Completed images per fixed time interval"""
+
+    def __init__(self, interval_seconds: float = THROUGHPUT_INTERVAL_SECONDS):
+        self.interval = interval_seconds
+        self.start = time.monotonic()
+        self.intervals: Counter = Counter()
+        self.count = 0
+
+    def record(self):
+        """تسجيل صورة / Count one completed image now"""
+        self.intervals[int((time.monotonic() - self.start) // self.interval)] += 1
+        self.count += 1
+
+    def to_dict(self) -> Dict:
+        """تحويل إلى قاموس / JSON-ready summary"""
+        elapsed = time.monotonic() - self.start
+        return {
+            "elapsed_seconds": round(elapsed, 3),
+            "images_per_second": round(self.count / elapsed, 3) if elapsed > 0 else 0.0,
+            "interval_seconds": self.interval,
+            # Sparse: idle intervals are left out
+            "series": [
+                {
+                    "t": round(i * self.interval, 3),
+                    "images": n,
+                    "images_per_second": round(n / self.interval, 3),
+                }
+                for i, n in sorted(self.intervals.items())
+            ],
+        }
+
+class BatchStats:
+    """
+    إحصائيات الدفعة / Running aggregates of a batch
+
+    add() takes the same result dicts that go to the journal. Results
+    replayed from a journal on resume (restored=True) count towards the
+    totals and class statistics but not towards latency or throughput.
+    """
+
+    def __init__(self):
+        self.processed = 0
+        self.successful = 0
+        self.failed = 0
+        self.restored = 0
+        self.failures: Counter = Counter()
+        self.stages: Dict[str, LatencyHistogram] = {}
+        self.throughput = ThroughputTracker()
+        self.classes = ClassAggregate()
+
+    def add(self, result: Dict, restored: bool = False):
+        """إضافة نتيجة / Fold one per-image result into the aggregates"""
+        self.processed += 1
+        if result.get("status") == "processed":
+            self.successful += 1
+        else:
+            self.failed += 1
+            self.failures[failure_class(result)] += 1
+
+        if "class_pixels" in result:
+            self.classes.add(result["total_pixels"], result["class_pixels"])
+
+        if restored:
+            self.restored += 1
+            return
+
+        self.throughput.record()
+        for stage, ms in result.get("timings_ms", {}).items():
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = LatencyHistogram()
+            histogram.record(ms)
+
+    @property
+    def success_rate(self) -> float:
+        return self.successful / max(self.processed, 1) * 100
+
+    def summary(self) -> Dict:
+        """الملخص / JSON-ready summary of all aggregates"""
+        summary = {
+            "processed": self.processed,
+            "successful": self.successful,
+            "failed": self.failed,
+            "restored": self.restored,
+            "success_rate": self.success_rate,
+            "failures": dict(self.failures.most_common()),
+            "stage_latency": {name: h.to_dict() for name, h in self.stages.items()},
+            "throughput": self.throughput.to_dict(),
+        }
+        if self.classes.images:
+            summary["class_statistics"] = self.classes.to_dict()
+        return summary
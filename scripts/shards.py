@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sharded Batch Output for Virtual Try-On AI
+مخرجات الدفعات المجزأة لتطبيق الملابس الافتراضية
+
+Packs the artifacts of many images into a few large append-only files
+instead of one directory of small files per image:
+
+    batch_<timestamp>/
+        shards/shard_00000.bin     artifacts of consecutive images
+        shards/shard_00001.bin
+        manifest.jsonl             one line per image: shard, offset, length
+                                   and the offset of every artifact
+
+All artifacts of one image are stored back to back, so ShardReader fetches
+an image's outputs with one seek and one read.
+"""
+
+import io
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+
+from .config import SHARD_MAX_BYTES
+from .fileops import truncate_partial_line
+
+SHARDS_DIR = "shards"
+MANIFEST_NAME = "manifest.jsonl"
+LAYOUTS = ("dirs", "shards")
+
+def _shard_name(number: int) -> str:
+    return f"shard_{number:05d}.bin"
+
+def _shard_number(name: str) -> int:
+    return int(Path(name).stem.split("_")[1])
+
+def _read_manifest(path: Path) -> Iterator[Dict]:
+    """قراءة الفهرس / Yield manifest entries, skipping a torn last line"""
+    if not path.exists():
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+class ShardWriter:
+    """
+    كاتب الأجزاء / Append image artifacts to shard files
+
+    Thread-safe. Reopening a batch continues the last shard; a torn last
+    manifest line and bytes written after the last complete entry (an
+    interrupted image) are truncated.
+    """
+
+    def __init__(self, batch_dir, max_bytes: int = SHARD_MAX_BYTES):
+        """فتح الأجزاء / Open (or reopen) the shards of a batch"""
+        self.batch_dir = Path(batch_dir)
+        self.shards_dir = self.batch_dir / SHARDS_DIR
+        self.shards_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.batch_dir / MANIFEST_NAME
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        # Resume after the last complete image. The torn line goes first, or
+        # the next entry appended to it would not parse and its image's
+        # bytes would be truncated on the following reopen.
+        truncate_partial_line(self.manifest_path)
+        shard_number = 0
+        shard_end = 0
+        for entry in _read_manifest(self.manifest_path):
+            number = _shard_number(entry["shard"])
+            end = entry["offset"] + entry["length"]
+            if number > shard_number:
+                shard_number, shard_end = number, end
+            elif number == shard_number:
+                shard_end = max(shard_end, end)
+
+        self._shard_number = shard_number
+        self._shard = open(self.shards_dir / _shard_name(shard_number), "ab")
+        self._shard.truncate(shard_end)
+        self._shard.seek(shard_end)
+        self._manifest = open(self.manifest_path, "a", encoding="utf-8")
+
+    def _roll_over(self):
+        """جزء جديد / Start the next shard file"""
+        self._shard.flush()
+        os.fsync(self._shard.fileno())
+        self._shard.close()
+        self._shard_number += 1
+        self._shard = open(self.shards_dir / _shard_name(self._shard_number), "ab")
+
+    def add(self, image_name: str, artifacts: Dict[str, bytes], meta: Optional[Dict] = None) -> Dict:
+        """
+        إضافة صورة / Append all artifacts of one image
+
+        Args:
+            image_name: Key used by ShardReader (the image stem)
+            artifacts: Artifact name (e.g. "body_mask.png") -> raw bytes
+            meta: Extra fields stored in the manifest entry
+
+        Returns:
+            The manifest entry
+        """
+        layout = {}
+        position = 0
+        for name, data in artifacts.items():
+            layout[name] = [position, len(data)]
+            position += len(data)
+
+        with self._lock:
+            if self._shard.tell() and self._shard.tell() + position > self.max_bytes:
+                self._roll_over()
+
+            offset = self._shard.tell()
+            for data in artifacts.values():
+                self._shard.write(data)
+            self._shard.flush()
+
+            entry = {
+                "image": image_name,
+                "shard": _shard_name(self._shard_number),
+                "offset": offset,
+                "length": position,
+                "artifacts": layout,
+            }
+            if meta:
+                entry["meta"] = meta
+
+            # The manifest line is written only once the data is in the shard
+            self._manifest.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._manifest.flush()
+        return entry
+
+    def add_directory(self, image_name: str, directory, meta: Optional[Dict] = None) -> Dict:
+        """إضافة مجلد / Pack every file of a staging directory"""
+        artifacts = {}
+        for path in sorted(Path(directory).iterdir()):
+            if path.is_file():
+                artifacts[path.name] = path.read_bytes()
+        return self.add(image_name, artifacts, meta)
+
+    def close(self):
+        """إغلاق / Flush shards and manifest to disk"""
+        with self._lock:
+            for f in (self._shard, self._manifest):
+                if not f.closed:
+                    f.flush()
+                    os.fsync(f.fileno())
+                    f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class ShardReader:
+    """
+    قارئ الأجزاء / Fetch image outputs from a sharded batch
+
+    Usage:
+        reader = ShardReader(batch_dir)
+        outputs = reader.read("photo_001")           # name -> bytes
+        labels = reader.load_array("photo_001", "test_labels.npy")
+    """
+
+    def __init__(self, batch_dir):
+        """تحميل الفهرس / Load the manifest (later entries win)"""
+        self.batch_dir = Path(batch_dir)
+        self.shards_dir = self.batch_dir / SHARDS_DIR
+        self.entries: Dict[str, Dict] = {}
+        for entry in _read_manifest(self.batch_dir / MANIFEST_NAME):
+            self.entries[entry["image"]] = entry
+
+    def __contains__(self, image_name: str) -> bool:
+        return image_name in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def images(self):
+        """أسماء الصور / Image names in the batch"""
+        return list(self.entries)
+
+    def read(self, image_name: str) -> Dict[str, bytes]:
+        """قراءة صورة / All artifacts of one image with a single seek"""
+        entry = self.entries[image_name]
+        with open(self.shards_dir / entry["shard"], "rb") as f:
+            f.seek(entry["offset"])
+            blob = f.read(entry["length"])
+
+        view = memoryview(blob)
+        return {
+            name: bytes(view[start:start + length])
+            for name, (start, length) in entry["artifacts"].items()
+        }
+
+    def read_artifact(self, image_name: str, artifact: str) -> bytes:
+        """قراءة عنصر / One artifact of one image"""
+        entry = self.entries[image_name]
+        start, length = entry["artifacts"][artifact]
+        with open(self.shards_dir / entry["shard"], "rb") as f:
+            f.seek(entry["offset"] + start)
+            return f.read(length)
+
+    def load_array(self, image_name: str, artifact: str) -> np.ndarray:
+        """تحميل مصفوفة / Decode a .npy artifact"""
+        return np.load(io.BytesIO(self.read_artifact(image_name, artifact)))
+
+    def load_image(self, image_name: str, artifact: str, flags: Optional[int] = None) -> Optional[np.ndarray]:
+        """تحميل صورة / Decode an image artifact with OpenCV"""
+        import cv2
+
+        data = np.frombuffer(self.read_artifact(image_name, artifact), dtype=np.uint8)
+        return cv2.imdecode(data, cv2.IMREAD_UNCHANGED if flags is None else flags)
+
+    def load_json(self, image_name: str, artifact: str):
+        """تحميل JSON / Decode a JSON artifact"""
+        return json.loads(self.read_artifact(image_name, artifact).decode("utf-8"))
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Skeleton Rendering for Virtual Try-On AI
+رسم الهيكل العظمي لتطبيق الملابس الافتراضية
+
+Draws the pose skeleton straight onto a BGR buffer from the (33, 4)
+landmark array (normalized x, y, z, visibility), with POSE_CONNECTIONS
+and the colours from scripts/config. No colour conversion and no
+MediaPipe drawing utilities are involved. All connections go out in one
+cv2.polylines call at sub-pixel precision.
+
+Because landmarks are normalized, the same array draws on a full-size
+image, a downscaled preview or a thumbnail:
+
+    draw_skeleton(image.copy(), landmarks)          # full size
+    render_preview(image, landmarks, max_side=512)  # downscale, then draw
+    render_thumbnails(pairs)                        # many images
+"""
+
+from typing import Iterable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .config import (
+    CONNECTION_THICKNESS,
+    DRAW_LANDMARKS,
+    KEYPOINT_COLOR,
+    KEYPOINT_RADIUS,
+    LANDMARK_NAMES,
+    NUM_LANDMARKS,
+    POSE_CONNECTIONS,
+    SKELETON_COLOR,
+    SKELETON_MIN_VISIBILITY,
+    VISUAL_THUMBNAIL_SIZE,
+)
+from .visuals import shrink_image
+
+# Fixed-point bits for sub-pixel drawing (cv2 "shift" argument)
+_SHIFT = 4
+_ONE = 1 << _SHIFT
+
+_CONNECTIONS = np.array(sorted(POSE_CONNECTIONS), dtype=np.intp).reshape(-1, 2)
+
+def landmarks_array(source) -> np.ndarray:
+    """
+    مصفوفة النقاط / (33, 4) float32 landmarks from any pose representation
+    Accepts MediaPipe results, the keypoints dict of run_pose.extract_keypoints
+    (missing landmarks get visibility 0) or an array.
+    """
+    if isinstance(source, np.ndarray):
+        return source.astype(np.float32, copy=False).reshape(-1, 4)
+
+    if isinstance(source, dict):
+        landmarks = np.zeros((NUM_LANDMARKS, 4), dtype=np.float32)
+        for i, name in enumerate(LANDMARK_NAMES):
+            point = source.get(name)
+            if point is not None:
+                landmarks[i] = (point["x"], point["y"], point["z"], point["visibility"])
+        return landmarks
+
+    points = source.pose_landmarks
+    points = getattr(points, "landmark", points)
+    return np.array([(p.x, p.y, p.z, p.visibility) for p in points], dtype=np.float32)
+
+def draw_skeleton(canvas: np.ndarray, landmarks: np.ndarray,
+                  min_visibility: float = SKELETON_MIN_VISIBILITY,
+                  color: Tuple[int, int, int] = SKELETON_COLOR,
+                  keypoint_color: Tuple[int, int, int] = KEYPOINT_COLOR,
+                  thickness: int = CONNECTION_THICKNESS,
+                  radius: int = KEYPOINT_RADIUS,
+                  draw_keypoints: bool = DRAW_LANDMARKS) -> np.ndarray:
+    """
+    رسم الهيكل / Draw the skeleton in place on a BGR canvas
+
+    Args:
+        canvas: (H, W, 3) uint8 BGR image, modified in place
+        landmarks: (33, 4) normalized landmarks (see landmarks_array)
+        min_visibility: Landmarks below this are skipped with their connections
+
+    Returns:
+        canvas
+    """
+    h, w = canvas.shape[:2]
+    points = np.rint(landmarks[:, :2] * (w * _ONE, h * _ONE)).astype(np.int32)
+    visible = landmarks[:, 3] >= min_visibility
+
+    connections = _CONNECTIONS[visible[_CONNECTIONS].all(axis=1)]
+    if len(connections):
+        cv2.polylines(canvas, list(points[connections]), False, color,
+                      max(1, thickness), cv2.LINE_AA, _SHIFT)
+
+    if draw_keypoints:
+        r = max(1, radius) * _ONE
+        for x, y in points[visible]:
+            cv2.circle(canvas, (int(x), int(y)), r, keypoint_color, -1, cv2.LINE_AA, _SHIFT)
+    return canvas
+
+def _preview_scale(shape: Tuple[int, ...], max_side: int) -> float:
+    return min(1.0, max_side / max(shape[:2]))
+
+def render_preview(image: np.ndarray, landmarks: np.ndarray,
+                   max_side: int = VISUAL_THUMBNAIL_SIZE, **style) -> np.ndarray:
+    """
+    معاينة / Downscale the image, then draw the skeleton on the small copy
+    Line width and keypoint size shrink with the image (at least 1 px).
+    """
+    scale = _preview_scale(image.shape, max_side)
+    if scale < 1.0:
+        h, w = image.shape[:2]
+        size = (max(1, round(w * scale)), max(1, round(h * scale)))
+        canvas = shrink_image(image, size)
+    else:
+        canvas = image.copy()
+
+    style.setdefault("thickness", max(1, round(CONNECTION_THICKNESS * scale)))
+    style.setdefault("radius", max(1, round(KEYPOINT_RADIUS * scale)))
+    return draw_skeleton(canvas, landmarks, **style)
+
+def render_thumbnails(items: Iterable[Tuple[np.ndarray, np.ndarray]],
+                      max_side: int = VISUAL_THUMBNAIL_SIZE, **style) -> List[np.ndarray]:
+    """صور مصغرة / Skeleton thumbnails for (image, landmarks) pairs"""
+    return [render_preview(image, landmarks, max_side, **style) for image, landmarks in items]
+
+def contact_sheet(thumbnails: List[np.ndarray], columns: int = 8,
+                  background: int = 32) -> Optional[np.ndarray]:
+    """
+    لوحة مصغرات / Tile thumbnails into one BGR image
+    Cells are sized to the largest thumbnail; smaller ones are centred.
+    """
+    if not thumbnails:
+        return None
+    cell_h = max(t.shape[0] for t in thumbnails)
+    cell_w = max(t.shape[1] for t in thumbnails)
+    columns = max(1, min(columns, len(thumbnails)))
+    rows = -(-len(thumbnails) // columns)
+
+    sheet = np.full((rows * cell_h, columns * cell_w, 3), background, dtype=np.uint8)
+    for i, thumb in enumerate(thumbnails):
+        th, tw = thumb.shape[:2]
+        y = (i // columns) * cell_h + (cell_h - th) // 2
+        x = (i % columns) * cell_w + (cell_w - tw) // 2
+        sheet[y:y + th, x:x + tw] = thumb
+    return sheet
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Synthetic Person Generator for Virtual Try-On AI
+مولد صور أشخاص اصطناعية لتطبيق الملابس الافتراضية
+
+Seeded, resolution-independent figures with varied poses, clothing colours
+and skin tones. Every figure comes with its 33 ground-truth landmarks in
+MediaPipe layout (normalized x, y, z, visibility) so pose-dependent stages
+can be exercised without running the detector.
+"""
+
+from typing import Dict, Tuple
+
+import cv2
+import numpy as np
+
+from .config import LANDMARK_NAMES, NUM_LANDMARKS
+
+# Skin tones in BGR, light to dark
+SKIN_TONES = [
+    (180, 200, 235),
+    (150, 180, 225),
+    (120, 160, 210),
+    (90, 130, 180),
+    (60, 90, 140),
+    (40, 60, 100),
+]
+
+# Long-side resolutions used by the benchmark suite
+DEFAULT_RESOLUTIONS = [512, 1024, 2048, 4000, 6000]
+
+def _random_colour(rng: np.random.Generator) -> Tuple[int, int, int]:
+    """لون عشوائي / Random BGR colour"""
+    return tuple(int(c) for c in rng.integers(0, 256, size=3))
+
+def random_person_spec(rng: np.random.Generator) -> Dict:
+    """
+    مواصفات شخص عشوائي / Random pose, colours and framing for one figure
+    All geometry is expressed in normalized image coordinates.
+    """
+    return {
+        "center_x": float(rng.uniform(0.4, 0.6)),
+        "top_y": float(rng.uniform(0.05, 0.12)),
+        "height": float(rng.uniform(0.75, 0.85)),
+        "shoulder_half": float(rng.uniform(0.09, 0.13)),
+        "hip_half": float(rng.uniform(0.06, 0.09)),
+        # Arm angles from straight down, radians (positive = away from body)
+        "left_arm": float(rng.uniform(0.1, 1.4)),
+        "right_arm": float(rng.uniform(0.1, 1.4)),
+        "left_elbow_bend": float(rng.uniform(-0.6, 0.6)),
+        "right_elbow_bend": float(rng.uniform(-0.6, 0.6)),
+        "leg_spread": float(rng.uniform(0.0, 0.35)),
+        "skin": SKIN_TONES[int(rng.integers(len(SKIN_TONES)))],
+        "hair": tuple(int(c) for c in rng.integers(0, 80, size=3)),
+        "shirt": _random_colour(rng),
+        "pants": _random_colour(rng),
+        "shoes": tuple(int(c) for c in rng.integers(0, 60, size=3)),
+        "background": int(rng.integers(150, 250)),
+        "noise": float(rng.uniform(0.0, 6.0)),
+    }
+
+def person_landmarks(spec: Dict) -> np.ndarray:
+    """
+    نقاط الجسم للمواصفات / 33 landmarks (x, y, z, visibility) for a spec
+    Coordinates are normalized to [0, 1] like MediaPipe output.
+    """
+    cx, top, height = spec["center_x"], spec["top_y"], spec["height"]
+    unit = height / 8.0  # Classic eight-head figure proportions
+
+    head_y = top + unit * 0.5
+    shoulder_y = top + unit * 1.5
+    hip_y = top + unit * 4.0
+    knee_y = top + unit * 6.0
+    ankle_y = top + unit * 7.8
+
+    points = {
+        "nose": (cx, head_y),
+        "left_eye_inner": (cx + unit * 0.08, head_y - unit * 0.12),
+        "left_eye": (cx + unit * 0.15, head_y - unit * 0.12),
+        "left_eye_outer": (cx + unit * 0.22, head_y - unit * 0.12),
+        "right_eye_inner": (cx - unit * 0.08, head_y - unit * 0.12),
+        "right_eye": (cx - unit * 0.15, head_y - unit * 0.12),
+        "right_eye_outer": (cx - unit * 0.22, head_y - unit * 0.12),
+        "left_ear": (cx + unit * 0.35, head_y - unit * 0.05),
+        "right_ear": (cx - unit * 0.35, head_y - unit * 0.05),
+        "mouth_left": (cx + unit * 0.1, head_y + unit * 0.2),
+        "mouth_right": (cx - unit * 0.1, head_y + unit * 0.2),
+        "left_shoulder": (cx + spec["shoulder_half"], shoulder_y),
+        "right_shoulder": (cx - spec["shoulder_half"], shoulder_y),
+        "left_hip": (cx + spec["hip_half"], hip_y),
+        "right_hip": (cx - spec["hip_half"], hip_y),
+    }
+
+    # Arms: shoulder -> elbow -> wrist, mirrored for the right side
+    arm_len = unit * 1.4
+    for side, sign in (("left", 1.0), ("right", -1.0)):
+        sx, sy = points[f"{side}_shoulder"]
+        upper = spec[f"{side}_arm"]
+        lower = upper + spec[f"{side}_elbow_bend"]
+        ex = sx + sign * np.sin(upper) * arm_len
+        ey = sy + np.cos(upper) * arm_len
+        wx = ex + sign * np.sin(lower) * arm_len
+        wy = ey + np.cos(lower) * arm_len
+        points[f"{side}_elbow"] = (ex, ey)
+        points[f"{side}_wrist"] = (wx, wy)
+        points[f"{side}_pinky"] = (wx + sign * unit * 0.1, wy + unit * 0.15)
+        points[f"{side}_index"] = (wx, wy + unit * 0.2)
+        points[f"{side}_thumb"] = (wx - sign * unit * 0.08, wy + unit * 0.1)
+
+        hx, hy = points[f"{side}_hip"]
+        spread = sign * spec["leg_spread"] * unit
+        points[f"{side}_knee"] = (hx + spread * 0.5, knee_y)
+        points[f"{side}_ankle"] = (hx + spread, ankle_y)
+        points[f"{side}_heel"] = (hx + spread - sign * unit * 0.05, ankle_y + unit * 0.1)
+        points[f"{side}_foot_index"] = (hx + spread + sign * unit * 0.25, ankle_y + unit * 0.15)
+
+    landmarks = np.zeros((NUM_LANDMARKS, 4), dtype=np.float32)
+    for i, name in enumerate(LANDMARK_NAMES):
+        x, y = points[name]
+        landmarks[i] = (x, y, 0.0, 0.99)
+
+    return landmarks
+
+def render_person(spec: Dict, width: int, height: int,
+                  rng: np.random.Generator = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    رسم شخص / Render a figure at the requested resolution
+
+    Returns:
+        (BGR image, landmarks array of shape (33, 4))
+    """
+    landmarks = person_landmarks(spec)
+    scale = np.array([width, height], dtype=np.float32)
+
+    def pt(name):
+        x, y = landmarks[LANDMARK_NAMES.index(name), :2] * scale
+        return int(round(x)), int(round(y))
+
+    unit_px = spec["height"] * height / 8.0
+    limb = max(2, int(unit_px * 0.35))
+
+    # Vertical gradient background
+    bg = spec["background"]
+    gradient = np.linspace(bg, min(255, bg + 40), height, dtype=np.float32).astype(np.uint8)
+    image = np.empty((height, width, 3), dtype=np.uint8)
+    image[:] = gradient[:, None, None]
+
+    skin, shirt, pants = spec["skin"], spec["shirt"], spec["pants"]
+
+    # Legs (pants) and shoes
+    for side in ("left", "right"):
+        cv2.line(image, pt(f"{side}_hip"), pt(f"{side}_knee"), pants, limb, cv2.LINE_AA)
+        cv2.line(image, pt(f"{side}_knee"), pt(f"{side}_ankle"), pants, limb, cv2.LINE_AA)
+        cv2.line(image, pt(f"{side}_heel"), pt(f"{side}_foot_index"), spec["shoes"],
+                 max(2, limb // 2), cv2.LINE_AA)
+
+    # Torso (shirt)
+    torso = np.array([
+        pt("left_shoulder"), pt("right_shoulder"), pt("right_hip"), pt("left_hip"),
+    ], dtype=np.int32)
+    cv2.fillPoly(image, [torso], shirt, cv2.LINE_AA)
+
+    # Arms: sleeve on the upper arm, skin on the forearm
+    for side in ("left", "right"):
+        cv2.line(image, pt(f"{side}_shoulder"), pt(f"{side}_elbow"), shirt, limb, cv2.LINE_AA)
+        cv2.line(image, pt(f"{side}_elbow"), pt(f"{side}_wrist"), skin,
+                 max(2, int(limb * 0.8)), cv2.LINE_AA)
+        cv2.circle(image, pt(f"{side}_index"), max(2, limb // 2), skin, -1, cv2.LINE_AA)
+
+    # Neck, hair and face
+    head = pt("nose")
+    head_r = max(3, int(unit_px * 0.45))
+    cv2.line(image, head, ((pt("left_shoulder")[0] + pt("right_shoulder")[0]) // 2,
+                           pt("left_shoulder")[1]), skin, max(2, limb // 2), cv2.LINE_AA)
+    cv2.circle(image, (head[0], head[1] - head_r // 6), int(head_r * 1.08), spec["hair"], -1, cv2.LINE_AA)
+    cv2.circle(image, head, head_r, skin, -1, cv2.LINE_AA)
+
+    if spec["noise"] > 0:
+        rng = rng if rng is not None else np.random.default_rng(0)
+        noise = rng.normal(0.0, spec["noise"], size=(height, width, 1)).astype(np.int16)
+        image = np.clip(image.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+    return image, landmarks
+
+def generate_person(seed: int, long_side: int, aspect: float = 0.75) -> Tuple[np.ndarray, np.ndarray, Dict]:
+    """
+    توليد شخص من بذرة / Deterministically generate a portrait figure
+
+    Args:
+        seed: Random seed; the same seed always yields the same figure
+        long_side: Image height in pixels
+        aspect: Width / height ratio
+
+    Returns:
+        (image, landmarks, spec)
+    """
+    rng = np.random.default_rng(seed)
+    spec = random_person_spec(rng)
+    height = int(long_side)
+    width = max(1, int(round(long_side * aspect)))
+    image, landmarks = render_person(spec, width, height, rng)
+    return image, landmarks, spec
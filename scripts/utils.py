@@ -11,6 +11,11 @@ import numpy as np
 from pathlib import Path
 from typing import Tuple, List, Dict
 
+from .blending import blend, blend_layers
+from .image_io import decode_image, probe_size
+from .mask_analytics import mask_stats
+from .mask_refine import morph_kernel
+
 def resize_image(image: np.ndarray, max_width: int = 1024, max_height: int = 1024) -> np.ndarray:
     """
     إعادة تحجيم الصورة / Resize image while maintaining aspect ratio
@@ -42,34 +47,20 @@ def denormalize_image(image: np.ndarray) -> np.ndarray:
     """إلغاء تطبيع الصورة / Denormalize image from [0, 1] to [0, 255]"""
     return (image * 255.0).astype(np.uint8)
 
-def apply_mask(image: np.ndarray, mask: np.ndarray, alpha: float = 0.3) -> np.ndarray:
-    """تطبيق قناع على الصورة / Apply mask to image"""
-    mask_3ch = cv2.cvtColor(mask, cv2.COLOR_GRAY2BGR)
-    mask_normalized = mask_3ch.astype(np.float32) / 255.0
-    
-    result = (image.astype(np.float32) * (1 - alpha) + 
-              mask_3ch.astype(np.float32) * alpha).astype(np.uint8)
-    
-    return result
+def apply_mask(image: np.ndarray, mask: np.ndarray, alpha: float = 0.3,
+               out: np.ndarray = None) -> np.ndarray:
+    """تطبيق قناع على الصورة / Apply mask to image (integer blend, see blending.blend)"""
+    return blend(image, mask, alpha, out=out)
 
 def get_bounding_box(mask: np.ndarray) -> Tuple[int, int, int, int]:
-    """الحصول على صندوق محيط / Get bounding box from mask"""
-    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    """الحصول على صندوق محيط / Get bounding box from mask (whole image if empty)"""
+    rows = np.flatnonzero(mask.any(axis=1))
     
-    if not contours:
+    if rows.size == 0:
         return 0, 0, mask.shape[1], mask.shape[0]
     
-    x_min, y_min = mask.shape[1], mask.shape[0]
-    x_max, y_max = 0, 0
-    
-    for contour in contours:
-        x, y, w, h = cv2.boundingRect(contour)
-        x_min = min(x_min, x)
-        y_min = min(y_min, y)
-        x_max = max(x_max, x + w)
-        y_max = max(y_max, y + h)
-    
-    return x_min, y_min, x_max, y_max
+    cols = np.flatnonzero(mask.any(axis=0))
+    return int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1
 
 def crop_to_mask(image: np.ndarray, mask: np.ndarray) -> np.ndarray:
     """قص الصورة إلى حدود القناع / Crop image to mask bounds"""
@@ -92,8 +83,8 @@ def enhance_contrast(image: np.ndarray, clip_limit: float = 2.0) -> np.ndarray:
         return clahe.apply(image)
 
 def smooth_mask(mask: np.ndarray, kernel_size: int = 5) -> np.ndarray:
-    """تنعيم القناع / Smooth mask edges"""
-    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (kernel_size, kernel_size))
+    """تنعيم القناع / Smooth mask edges (see mask_refine for several masks at once)"""
+    kernel = morph_kernel(kernel_size)
     mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
     mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
     mask = cv2.GaussianBlur(mask, (kernel_size, kernel_size), 0)
@@ -101,25 +92,30 @@ def smooth_mask(mask: np.ndarray, kernel_size: int = 5) -> np.ndarray:
 
 def calculate_mask_area(mask: np.ndarray) -> float:
     """حساب مساحة القناع / Calculate mask area in pixels"""
-    return np.sum(mask > 127)
+    return np.count_nonzero(mask > 127)
 
 def get_mask_stats(mask: np.ndarray) -> Dict:
-    """الحصول على إحصائيات القناع / Get mask statistics"""
-    area = calculate_mask_area(mask)
-    total_pixels = mask.shape[0] * mask.shape[1]
-    percentage = (area / total_pixels) * 100
+    """الحصول على إحصائيات القناع / Get mask statistics (pixels > 127)"""
+    stats = mask_stats(mask, threshold=127)
     
-    x_min, y_min, x_max, y_max = get_bounding_box(mask)
-    bbox_width = x_max - x_min
-    bbox_height = y_max - y_min
+    area = int(stats["area"][0])
+    if area == 0:
+        x_min, y_min, x_max, y_max = 0, 0, mask.shape[1], mask.shape[0]
+    else:
+        x_min, y_min, x_max, y_max = (int(v) for v in stats["bbox"][0])
+    
+    # True centroid (center of mass), not the bounding box midpoint
+    centroid_x, centroid_y = stats["centroid"][0]
+    if area == 0:
+        centroid_x, centroid_y = (x_min + x_max) / 2, (y_min + y_max) / 2
     
     return {
         "area": area,
-        "percentage": percentage,
-        "bbox_width": bbox_width,
-        "bbox_height": bbox_height,
-        "centroid_x": (x_min + x_max) / 2,
-        "centroid_y": (y_min + y_max) / 2,
+        "percentage": float(stats["percentage"][0]),
+        "bbox_width": x_max - x_min,
+        "bbox_height": y_max - y_min,
+        "centroid_x": float(centroid_x),
+        "centroid_y": float(centroid_y),
     }
 
 def combine_masks(masks: List[np.ndarray], weights: List[float] = None) -> np.ndarray:
@@ -127,60 +123,78 @@ def combine_masks(masks: List[np.ndarray], weights: List[float] = None) -> np.nd
     if weights is None:
         weights = [1.0 / len(masks)] * len(masks)
     
-    result = np.zeros_like(masks[0], dtype=np.float32)
-    
-    for mask, weight in zip(masks, weights):
-        result += mask.astype(np.float32) * weight
+    # One weighted reduction over the stacked masks
+    stack = masks if isinstance(masks, np.ndarray) else np.stack(masks)
+    result = np.tensordot(np.asarray(weights, dtype=np.float32), stack, axes=1)
     
-    return (result).astype(np.uint8)
+    return result.astype(np.uint8)
 
 def dilate_mask(mask: np.ndarray, kernel_size: int = 5) -> np.ndarray:
     """توسيع القناع / Dilate mask"""
-    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (kernel_size, kernel_size))
-    return cv2.dilate(mask, kernel, iterations=1)
+    return cv2.dilate(mask, morph_kernel(kernel_size), iterations=1)
 
 def erode_mask(mask: np.ndarray, kernel_size: int = 5) -> np.ndarray:
     """تقليل القناع / Erode mask"""
-    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (kernel_size, kernel_size))
-    return cv2.erode(mask, kernel, iterations=1)
+    return cv2.erode(mask, morph_kernel(kernel_size), iterations=1)
 
 def distance_transform(mask: np.ndarray) -> np.ndarray:
     """حساب تحويل المسافة / Calculate distance transform"""
     return cv2.distanceTransform(mask, cv2.DIST_L2, cv2.DIST_MASK_PRECISE)
 
-def create_heatmap(image: np.ndarray, intensity: np.ndarray) -> np.ndarray:
-    """إنشاء خريطة حرارية / Create heatmap overlay"""
-    heatmap = cv2.applyColorMap((intensity * 255).astype(np.uint8), cv2.COLORMAP_JET)
-    result = cv2.addWeighted(image, 0.7, heatmap, 0.3, 0)
-    return result
+def create_heatmap(image: np.ndarray, intensity: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+    """إنشاء خريطة حرارية / Create heatmap overlay (intensity in [0, 1])"""
+    # Scale and saturate to uint8 in one pass, no float temporary
+    heatmap = cv2.applyColorMap(cv2.convertScaleAbs(intensity, alpha=255), cv2.COLORMAP_JET)
+    return blend(image, heatmap, 0.3, out=out)
 
 class ImageProcessor:
-    """فئة معالجة الصور / Image processor utility class"""
+    """
+    فئة معالجة الصور / Image processor utility class
+    
+    Operations are recorded and run only on compute() or save() (reading
+    .image computes too). Before running, the plan is fused:
+    
+    - all resizes merge into one INTER_AREA resize to the final size, run
+      first, so contrast enhancement and blends work on the small image
+    - consecutive apply_mask calls collapse into one blending.blend_layers pass
+    - when the image is not loaded yet, a JPEG is decoded at reduced scale
+      (image_io.decode_image), never below the size the plan resizes to
+    
+    Moving the resize ahead of CLAHE changes results slightly (the CLAHE
+    tiles see the downscaled image). Only one full-resolution image is
+    held: reset() drops pending work and reloads from image_path.
+    """
     
     def __init__(self, image_path: str):
-        """تهيئة معالج الصور / Initialize image processor"""
+        """تهيئة معالج الصور / Initialize image processor (nothing is decoded yet)"""
         self.image_path = Path(image_path)
-        self.image = None
-        self.original = None
         self.masks = {}
-        
-        if self.image_path.exists():
-            self.load_image()
+        self.ops = []
+        self._image = None
+    
+    @property
+    def image(self) -> np.ndarray:
+        """الصورة الحالية / Current image with all pending operations applied"""
+        return self.compute()._image
+    
+    @image.setter
+    def image(self, value: np.ndarray):
+        self._image = value
+        self.ops = []
     
-    def load_image(self):
-        """تحميل الصورة / Load image"""
-        self.image = cv2.imread(str(self.image_path))
-        self.original = self.image.copy()
+    def load_image(self, max_side: int = None):
+        """تحميل الصورة / Load image from image_path now (upright, see image_io.decode_image)"""
+        self._image = decode_image(self.image_path, max_side)
         return self
     
     def resize(self, max_width: int = 1024, max_height: int = 1024):
-        """إعادة تحجيم الصورة / Resize image"""
-        self.image = resize_image(self.image, max_width, max_height)
+        """إعادة تحجيم الصورة / Resize image (recorded)"""
+        self.ops.append(("resize", (max_width, max_height)))
         return self
     
     def enhance_contrast(self, clip_limit: float = 2.0):
-        """تحسين التباين / Enhance contrast"""
-        self.image = enhance_contrast(self.image, clip_limit)
+        """تحسين التباين / Enhance contrast (recorded)"""
+        self.ops.append(("clahe", clip_limit))
         return self
     
     def add_mask(self, name: str, mask: np.ndarray):
@@ -189,20 +203,76 @@ class ImageProcessor:
         return self
     
     def apply_mask(self, mask_name: str, alpha: float = 0.3):
-        """تطبيق القناع / Apply mask to image"""
+        """تطبيق القناع / Apply mask to image (recorded; masks are resized to fit)"""
         if mask_name in self.masks:
-            mask = self.masks[mask_name]
-            self.image = apply_mask(self.image, mask, alpha)
+            self.ops.append(("blend", [(self.masks[mask_name], alpha)]))
+        return self
+    
+    def plan(self, shape: Tuple[int, int]) -> List[Tuple[str, object]]:
+        """
+        خطة التنفيذ / Fused operation list for a source of (height, width)
+        e.g. [("resize", (w, h)), ("clahe", 2.0), ("blend", [(mask, alpha), ...])]
+        """
+        h, w = shape[:2]
+        size = (w, h)
+        steps = []
+        for op, arg in self.ops:
+            if op == "resize":
+                # Same size arithmetic as resize_image, so the merged resize
+                # lands on the size the eager chain would have produced
+                scale = min(arg[0] / size[0], arg[1] / size[1], 1.0)
+                if scale < 1.0:
+                    size = (int(size[0] * scale), int(size[1] * scale))
+            elif op == "blend" and steps and steps[-1][0] == "blend":
+                steps[-1] = ("blend", steps[-1][1] + arg)
+            else:
+                steps.append((op, arg))
+        
+        if size != (w, h):
+            steps.insert(0, ("resize", size))
+        return steps
+    
+    def compute(self):
+        """تنفيذ / Run pending operations"""
+        steps = None
+        if self._image is None:
+            if not self.image_path.exists():
+                return self
+            # Plan from the header, so a leading resize can shrink the decode
+            size = probe_size(self.image_path) if self.ops else None
+            if size is not None:
+                steps = self.plan((size[1], size[0]))
+            max_side = max(steps[0][1]) if steps and steps[0][0] == "resize" else None
+            self.load_image(max_side)
+        
+        if self.ops:
+            image = self._image
+            for op, arg in steps if steps is not None else self.plan(image.shape):
+                if op == "resize":
+                    image = cv2.resize(image, arg, interpolation=cv2.INTER_AREA)
+                elif op == "clahe":
+                    image = enhance_contrast(image, arg)
+                elif op == "blend":
+                    h, w = image.shape[:2]
+                    layers = [
+                        (mask if mask.shape[:2] == (h, w)
+                         else cv2.resize(mask, (w, h), interpolation=cv2.INTER_AREA), alpha)
+                        for mask, alpha in arg
+                    ]
+                    image = blend_layers(image, layers)
+            self._image = image
+            self.ops = []
         return self
     
     def save(self, output_path: str):
-        """حفظ الصورة / Save image"""
+        """حفظ الصورة / Save image (runs pending operations)"""
         cv2.imwrite(output_path, self.image)
         return self
     
     def reset(self):
-        """إعادة تعيين إلى الأصلي / Reset to original"""
-        self.image = self.original.copy()
+        """إعادة تعيين إلى الأصلي / Reset to original (reloaded from image_path on use)"""
+        self._image = None
+        self.ops = []
         return self
 
 def print_version():
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Visual Output Tiers for Virtual Try-On AI
+مستويات الصور المرئية لتطبيق الملابس الافتراضية
+
+Visual artifacts (parsing visualization and overlay, pose skeleton) are
+only looked at, so how they are produced is configurable
+(VISUAL_OUTPUT_TIER):
+
+    none      - not rendered, not written
+    thumbnail - rendered directly at VISUAL_THUMBNAIL_SIZE (long side)
+                from downsampled labels / normalized keypoints, written
+                as VISUAL_FORMAT (jpg or webp)
+    full      - full resolution PNG (the original output)
+"""
+
+from pathlib import Path
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .config import (
+    VISUAL_FORMAT,
+    VISUAL_OUTPUT_TIER,
+    VISUAL_QUALITY,
+    VISUAL_THUMBNAIL_SIZE,
+)
+
+VISUAL_TIERS = ("none", "thumbnail", "full")
+VISUAL_FORMATS = ("jpg", "webp")
+
+# Source pixels per output pixel kept for INTER_AREA after decimation
+_AREA_FOOTPRINT = 4
+
+def _check_tier(tier: str):
+    if tier not in VISUAL_TIERS:
+        raise ValueError(f"Unknown visual tier: {tier} (expected one of {VISUAL_TIERS})")
+
+def visual_extension(tier: str = VISUAL_OUTPUT_TIER, fmt: str = VISUAL_FORMAT) -> Optional[str]:
+    """امتداد الملف / File extension of a tier (None for "none")"""
+    _check_tier(tier)
+    if tier == "none":
+        return None
+    if tier == "full":
+        return ".png"
+    if fmt not in VISUAL_FORMATS:
+        raise ValueError(f"Unknown visual format: {fmt} (expected one of {VISUAL_FORMATS})")
+    return f".{fmt}"
+
+def visual_name(stem: str, tier: str = VISUAL_OUTPUT_TIER) -> Optional[str]:
+    """اسم الملف / "test_visual" -> "test_visual.jpg" (None for "none")"""
+    extension = visual_extension(tier)
+    return None if extension is None else stem + extension
+
+def target_size(shape: Tuple[int, ...], tier: str = VISUAL_OUTPUT_TIER,
+                max_side: int = VISUAL_THUMBNAIL_SIZE) -> Optional[Tuple[int, int]]:
+    """
+    حجم الإخراج / (width, height) a visual is rendered at for an image shape
+    None for "none"; thumbnails never upscale.
+    """
+    _check_tier(tier)
+    if tier == "none":
+        return None
+    h, w = shape[:2]
+    scale = min(1.0, max_side / max(h, w)) if tier == "thumbnail" else 1.0
+    return max(1, round(w * scale)), max(1, round(h * scale))
+
+def shrink_image(image: np.ndarray, size: Tuple[int, int]) -> np.ndarray:
+    """
+    تصغير سريع / Downscale an image for a preview
+    Large reductions first take every k-th pixel (a view), leaving INTER_AREA
+    a _AREA_FOOTPRINT-pixel footprint: ~6x faster at 4000px -> 256px.
+    """
+    if size == (image.shape[1], image.shape[0]):
+        return image
+    step = int(image.shape[1] / size[0]) // _AREA_FOOTPRINT
+    if step > 1:
+        image = image[::step, ::step]
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+def shrink_labels(labels: np.ndarray, size: Tuple[int, int]) -> np.ndarray:
+    """تصغير التسميات / Nearest-neighbour label map at (width, height)"""
+    if size == (labels.shape[1], labels.shape[0]):
+        return labels
+    return cv2.resize(labels, size, interpolation=cv2.INTER_NEAREST)
+
+def encode_params(extension: str, quality: int = VISUAL_QUALITY):
+    """معاملات الترميز / cv2.imwrite parameters for an extension"""
+    if extension in (".jpg", ".jpeg"):
+        return [cv2.IMWRITE_JPEG_QUALITY, int(quality)]
+    if extension == ".webp":
+        return [cv2.IMWRITE_WEBP_QUALITY, int(quality)]
+    return []
+
+def write_visual(path, image: np.ndarray) -> int:
+    """
+    كتابة صورة مرئية / Encode and write a visual; returns bytes written
+    The format follows the file extension (see visual_name).
+    """
+    path = Path(path)
+    ok, buf = cv2.imencode(path.suffix, image, encode_params(path.suffix.lower()))
+    if not ok:
+        raise RuntimeError(f"Encoding failed for {path.name}")
+    path.write_bytes(buf)
+    return buf.nbytes
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Folder Watcher for Virtual Try-On AI
+مراقب المجلدات لتطبيق الملابس الافتراضية
+
+Reports image files that appear in a directory once they are fully
+written. On Linux it listens to inotify events (through ctypes, no extra
+packages); elsewhere it falls back to periodic os.scandir polling. In both
+modes a file is only reported after its size and mtime have stayed
+unchanged for settle_seconds, which debounces partially written uploads.
+Files that are deleted or moved away are forgotten, so a long-running
+watcher only remembers the files currently in the directory.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .config import (
+    SUPPORTED_IMAGE_FORMATS,
+    WATCH_SETTLE_SECONDS,
+    WATCH_POLL_INTERVAL,
+    WATCH_IGNORE_SUFFIXES,
+)
+
+# inotify constants from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+_EVENT_HEADER = struct.Struct("iIII")
+
+class _Inotify:
+    """واجهة inotify / Minimal ctypes binding to Linux inotify"""
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches: Dict[int, str] = {}
+
+    def add_watch(self, path: str):
+        """إضافة مراقبة / Watch one directory"""
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed: {path}")
+        self.watches[wd] = path
+
+    def read_events(self, timeout: float) -> List[Tuple[str, int]]:
+        """قراءة الأحداث / Wait up to timeout, return (path, mask) events"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                events.append(("", mask))
+                continue
+            if mask & IN_IGNORED:
+                # The watched directory was removed
+                self.watches.pop(wd, None)
+                continue
+
+            directory = self.watches.get(wd)
+            if directory is not None and name:
+                events.append((os.path.join(directory, os.fsdecode(name)), mask))
+
+        return events
+
+    def close(self):
+        """إغلاق / Release the inotify descriptor"""
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+class FolderWatcher:
+    """
+    مراقب المجلد / Yield new, fully written image files in a directory
+
+    Usage:
+        watcher = FolderWatcher(INPUT_DIR)
+        while running:
+            for path in watcher.poll(timeout=0.5):
+                handle(path)
+        watcher.close()
+    """
+
+    def __init__(self, directory, recursive: bool = False,
+                 settle_seconds: float = WATCH_SETTLE_SECONDS,
+                 poll_interval: float = WATCH_POLL_INTERVAL,
+                 use_inotify: bool = True):
+        """تهيئة المراقب / Initialize watcher and scan existing files"""
+        self.directory = Path(directory)
+        self.recursive = recursive
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.formats = {ext.lower() for ext in SUPPORTED_IMAGE_FORMATS}
+
+        # path -> (size, mtime_ns, time of last change)
+        self._pending: Dict[str, Tuple[int, int, float]] = {}
+        # path -> (size, mtime_ns) when it was last reported
+        self._reported: Dict[str, Tuple[int, int]] = {}
+        self._last_scan = 0.0
+
+        self._inotify: Optional[_Inotify] = None
+        if use_inotify and sys.platform.startswith("linux"):
+            try:
+                self._inotify = _Inotify()
+            except (OSError, AttributeError):
+                self._inotify = None
+
+        self.backend = "inotify" if self._inotify is not None else "polling"
+        self._scan(watch=True)
+
+    def _is_candidate(self, name: str) -> bool:
+        """هل الملف صورة / True for supported, non-temporary image names"""
+        if name.startswith("."):
+            return False
+        lower = name.lower()
+        if any(lower.endswith(suffix) for suffix in WATCH_IGNORE_SUFFIXES):
+            return False
+        return os.path.splitext(lower)[1] in self.formats
+
+    def _scan(self, root: Optional[str] = None, watch: bool = False):
+        """
+        مسح المجلد / Walk the tree, marking files and adding watches
+        A complete scan of the whole tree also forgets reported files that
+        are gone.
+        """
+        directories = [root or str(self.directory)]
+        seen = set()
+        complete = True
+        while directories:
+            directory = directories.pop()
+            if watch and self._inotify is not None:
+                try:
+                    self._inotify.add_watch(directory)
+                except OSError:
+                    pass
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if self.recursive:
+                                    directories.append(entry.path)
+                            elif entry.is_file() and self._is_candidate(entry.name):
+                                seen.add(entry.path)
+                                self._touch(entry.path)
+                        except OSError:
+                            continue
+            except OSError:
+                complete = False
+                continue
+        if root is None and complete:
+            for path in self._reported.keys() - seen:
+                del self._reported[path]
+        self._last_scan = time.monotonic()
+
+    def _forget_tree(self, directory: str):
+        """نسيان مجلد / Drop every file under a removed directory"""
+        prefix = directory + os.sep
+        for files in (self._pending, self._reported):
+            for path in [path for path in files if path.startswith(prefix)]:
+                del files[path]
+
+    def _touch(self, path: str):
+        """تسجيل تغيير / Note that a file may have changed"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            # Deleted or moved away
+            self._pending.pop(path, None)
+            self._reported.pop(path, None)
+            return
+
+        signature = (st.st_size, st.st_mtime_ns)
+        if self._reported.get(path) == signature:
+            return
+
+        previous = self._pending.get(path)
+        if previous is None or previous[:2] != signature:
+            self._pending[path] = signature + (time.monotonic(),)
+
+    def _collect_events(self, timeout: float):
+        """جمع التغييرات / Gather changes from inotify or a rescan"""
+        if self._inotify is not None:
+            for path, mask in self._inotify.read_events(timeout):
+                if mask & IN_Q_OVERFLOW:
+                    self._scan()
+                elif mask & IN_ISDIR:
+                    if self.recursive and mask & (IN_CREATE | IN_MOVED_TO):
+                        self._scan(path, watch=True)
+                    elif mask & (IN_DELETE | IN_MOVED_FROM):
+                        self._forget_tree(path)
+                elif self._is_candidate(os.path.basename(path)):
+                    self._touch(path)
+            return
+
+        wait = self._last_scan + self.poll_interval - time.monotonic()
+        if wait > 0:
+            time.sleep(min(wait, timeout))
+        if time.monotonic() - self._last_scan >= self.poll_interval:
+            self._scan()
+
+    def poll(self, timeout: float = 0.5) -> List[Path]:
+        """
+        انتظار الملفات الجاهزة / Wait up to timeout and return settled files
+        A file is settled once its size and mtime are unchanged for
+        settle_seconds. Each version of a file is reported once.
+        """
+        # Pending files must be re-checked even when no events arrive
+        if self._pending:
+            timeout = min(timeout, self.settle_seconds / 2 or timeout)
+        self._collect_events(timeout)
+
+        now = time.monotonic()
+        ready = []
+        for path, (size, mtime_ns, changed_at) in list(self._pending.items()):
+            try:
+                st = os.stat(path)
+            except OSError:
+                del self._pending[path]
+                continue
+
+            signature = (st.st_size, st.st_mtime_ns)
+            if signature != (size, mtime_ns):
+                self._pending[path] = signature + (now,)
+            elif size > 0 and now - changed_at >= self.settle_seconds:
+                del self._pending[path]
+                self._reported[path] = signature
+                ready.append(Path(path))
+
+        return ready
+
+    def close(self):
+        """إيقاف المراقب / Stop watching"""
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Watch-Folder Daemon for Virtual Try-On AI
+خدمة مراقبة المجلد لتطبيق الملابس الافتراضية
+
+Watches the input folder (inotify, or polling as a fallback) and pushes
+every new, fully written image through warm in-process models. Results go
+into the usual batch_<timestamp>/<image>/ structure with a journal, so a
+restarted daemon picks up where it left off. SIGINT/SIGTERM stop intake,
+finish in-flight images and write the batch report.
+"""
+
+import sys
+import signal
+import argparse
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+PROJECT_ROOT = Path(__file__).parent.absolute()
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from scripts.config import (
+    INPUT_DIR,
+    OUTPUT_DIR,
+    BATCH_INPUT_MODE,
+    BATCH_OUTPUT_LAYOUT,
+    DECODE_MAX_SIDE,
+    VISUAL_OUTPUT_TIER,
+    WATCH_SETTLE_SECONDS,
+    WATCH_POLL_INTERVAL,
+    WATCH_MAX_CONCURRENCY,
+)
+from scripts.fileops import INPUT_MODES
+from scripts.shards import LAYOUTS, ShardWriter
+from scripts.visuals import VISUAL_TIERS
+from scripts.watcher import FolderWatcher
+from batch_process import (
+    print_header,
+    print_status,
+    BatchJournal,
+    WarmPipeline,
+    create_batch_structure,
+    find_latest_batch,
+    restore_from_journal,
+    process_image,
+    cleanup_temp_files,
+    generate_batch_report,
+)
+
+def install_signal_handlers(stop_event: threading.Event):
+    """تثبيت معالجات الإشارات / Stop gracefully on SIGINT and SIGTERM"""
+    def handle(signum, frame):
+        if stop_event.is_set():
+            return
+        print_status(f"Received signal {signum}, finishing in-flight images...", "WARNING")
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, handle)
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, handle)
+
+def run_daemon(args) -> int:
+    """تشغيل الخدمة / Main watch loop"""
+    input_dir = Path(args.input_dir)
+    output_dir = Path(args.output_dir)
+
+    if not input_dir.exists():
+        print_status(f"Input directory not found: {input_dir}", "ERROR")
+        return 1
+
+    # Continue the latest batch or open a new one
+    batch_dir = None
+    if args.resume:
+        batch_dir = find_latest_batch(output_dir)
+        if batch_dir is None:
+            print_status(f"No previous batch found in {output_dir}, starting a new one", "WARNING")
+
+    batch_info = create_batch_structure(output_dir, 0, batch_dir)
+    batch_dir = Path(batch_info["batch_dir"])
+    journal = BatchJournal(batch_dir)
+    if journal.completed:
+        restore_from_journal(batch_info, journal)
+        print_status(f"Resuming: {len(journal.completed)} images already done", "SUCCESS")
+
+    print_status("Loading models...")
+    pipeline = WarmPipeline(micro_batch=args.micro_batch, visual_tier=args.visuals,
+                            quality_gate=not args.no_quality_gate, max_side=args.max_side)
+    print_status("Models ready", "SUCCESS")
+
+    shards = ShardWriter(batch_dir) if args.layout == "shards" else None
+    batch_info["layout"] = args.layout
+
+    watcher = FolderWatcher(
+        input_dir,
+        recursive=args.recursive,
+        settle_seconds=args.settle,
+        poll_interval=args.poll_interval,
+        use_inotify=not args.polling,
+    )
+    print_status(f"Watching {input_dir} ({watcher.backend}), "
+                 f"up to {args.workers} images at a time", "SUCCESS")
+
+    stop_event = threading.Event()
+    install_signal_handlers(stop_event)
+
+    # Bounded concurrency: a slot must be free before an image is submitted
+    slots = threading.BoundedSemaphore(args.workers)
+    in_flight = set()
+    in_flight_lock = threading.Lock()
+    submitted = 0
+
+    def worker(image_path: Path):
+        try:
+            process_image(image_path, batch_dir, batch_info, journal, pipeline,
+                          args.input_mode, shards)
+        finally:
+            with in_flight_lock:
+                in_flight.discard(journal.key(image_path))
+            slots.release()
+
+    executor = ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix="vton-worker")
+    try:
+        while not stop_event.is_set():
+            for image_path in watcher.poll(timeout=0.5):
+                key = journal.key(image_path)
+                with in_flight_lock:
+                    if journal.is_done(image_path) or key in in_flight:
+                        continue
+
+                while not slots.acquire(timeout=0.5):
+                    if stop_event.is_set():
+                        break
+                else:
+                    with in_flight_lock:
+                        in_flight.add(key)
+                    submitted += 1
+                    print_status(f"Queued [{submitted}]: {image_path.name}")
+                    executor.submit(worker, image_path)
+                    continue
+                break
+    finally:
+        watcher.close()
+        executor.shutdown(wait=True)
+        journal.close()
+        pipeline.close()
+        if shards is not None:
+            shards.close()
+
+    cleanup_temp_files(batch_dir)
+    batch_info["total_images"] = batch_info["stats"].processed
+    generate_batch_report(batch_info, output_dir)
+    print_status("Daemon stopped", "SUCCESS")
+    return 0
+
+def main():
+    """الدالة الرئيسية / Main function"""
+    parser = argparse.ArgumentParser(
+        description="Watch a folder and process new images continuously"
+    )
+    parser.add_argument(
+        "--input-dir",
+        type=str,
+        default=str(INPUT_DIR),
+        help="Folder to watch"
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=str,
+        default=str(OUTPUT_DIR),
+        help="Output directory for batch results"
+    )
+    parser.add_argument(
+        "--recursive",
+        action="store_true",
+        help="Also watch subdirectories"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=WATCH_MAX_CONCURRENCY,
+        help="Maximum images processed concurrently"
+    )
+    parser.add_argument(
+        "--settle",
+        type=float,
+        default=WATCH_SETTLE_SECONDS,
+        help="Seconds a file must stay unchanged before processing"
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=WATCH_POLL_INTERVAL,
+        help="Rescan interval in polling mode"
+    )
+    parser.add_argument(
+        "--polling",
+        action="store_true",
+        help="Force polling even when inotify is available"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Append to the latest batch instead of starting a new one"
+    )
+    parser.add_argument(
+        "--input-mode",
+        choices=INPUT_MODES,
+        default=BATCH_INPUT_MODE,
+        help="How the original image is placed in the batch (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--layout",
+        choices=LAYOUTS,
+        default=BATCH_OUTPUT_LAYOUT,
+        help="Output layout: one folder per image, or packed shard files"
+    )
+    parser.add_argument(
+        "--visuals",
+        choices=VISUAL_TIERS,
+        default=VISUAL_OUTPUT_TIER,
+        help="Visual artifacts: none, thumbnail or full"
+    )
+    parser.add_argument(
+        "--micro-batch",
+        action="store_true",
+        help="Share parsing forward passes between concurrent images"
+    )
+    parser.add_argument(
+        "--no-quality-gate",
+        action="store_true",
+        help="Do not reject small, blurry or badly exposed images"
+    )
+    parser.add_argument(
+        "--max-side",
+        type=int,
+        default=DECODE_MAX_SIDE,
+        help="Decode large JPEGs at reduced scale, keeping this long side"
+    )
+
+    args = parser.parse_args()
+    args.workers = max(1, args.workers)
+
+    print_header("Watch-Folder Daemon - Virtual Try-On AI")
+    print("خدمة مراقبة المجلد - تطبيق الملابس الافتراضية")
+
+    return run_daemon(args)
+
+if __name__ == "__main__":
+    sys.exit(main())